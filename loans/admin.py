@@ -1,9 +1,24 @@
 from django.contrib import admin
+from django.db.models import F
 from django.utils.html import format_html
 from django.urls import reverse
 from .models import Borrower, Loan, Installment, Payment
 
 
+class EffectiveStatusFilter(admin.SimpleListFilter):
+    """Filter installments on the status derived from due date and amounts"""
+    title = 'status'
+    parameter_name = 'effective_status'
+
+    def lookups(self, request, model_admin):
+        return Installment.STATUS_CHOICES
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(effective_status=self.value())
+        return queryset
+
+
 @admin.register(Borrower)
 class BorrowerAdmin(admin.ModelAdmin):
     list_display = ['name', 'phone', 'email', 'active_loans_count', 'total_outstanding', 'created_at']
@@ -24,27 +39,40 @@ class BorrowerAdmin(admin.ModelAdmin):
         })
     )
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_loan_summary()
+    
     def active_loans_count(self, obj):
-        count = obj.get_active_loans().count()
+        count = obj.active_loans_count
         if count > 0:
             url = reverse('admin:loans_loan_changelist') + f'?borrower__id__exact={obj.id}&status__exact=ACTIVE'
             return format_html('<a href="{}">{}</a>', url, count)
         return count
     active_loans_count.short_description = 'Active Loans'
+    active_loans_count.admin_order_field = 'active_loans_count'
     
     def total_outstanding(self, obj):
-        amount = obj.get_total_outstanding()
+        amount = obj.total_outstanding
         if amount > 0:
-            return format_html('<strong>₹{:,.2f}</strong>', amount)
+            return format_html('<strong>₹{}</strong>', f'{amount:,.2f}')
         return '₹0'
     total_outstanding.short_description = 'Outstanding Amount'
+    total_outstanding.admin_order_field = 'total_outstanding'
 
 
 class InstallmentInline(admin.TabularInline):
     model = Installment
     extra = 0
-    readonly_fields = ['installment_number', 'due_date', 'amount_due', 'status', 'get_remaining']
-    fields = ['installment_number', 'due_date', 'amount_due', 'amount_paid', 'status', 'get_remaining']
+    readonly_fields = ['installment_number', 'due_date', 'amount_due', 'get_status', 'get_remaining']
+    fields = ['installment_number', 'due_date', 'amount_due', 'amount_paid', 'get_status', 'get_remaining']
+    
+    def get_queryset(self, request):
+        # Installment.__str__ is rendered for every row
+        return super().get_queryset(request).with_effective_status().select_related('loan__borrower')
+    
+    def get_status(self, obj):
+        return dict(Installment.STATUS_CHOICES)[obj.effective_status]
+    get_status.short_description = 'Status'
     
     def get_remaining(self, obj):
         return f'₹{obj.get_remaining_amount():,.2f}'
@@ -54,7 +82,8 @@ class InstallmentInline(admin.TabularInline):
         return False
     
     def has_delete_permission(self, request, obj=None):
-        return obj and obj.amount_paid == 0 if obj else False
+        # obj is the parent loan; installments can go only while nothing is paid
+        return obj is not None and obj.paid_amount == 0
 
 
 @admin.register(Loan)
@@ -64,6 +93,7 @@ class LoanAdmin(admin.ModelAdmin):
         'start_date', 'status', 'paid_amount', 'outstanding_amount'
     ]
     list_filter = ['status', 'start_date', 'interest_rate']
+    list_select_related = ['borrower']
     search_fields = ['borrower__name', 'borrower__phone']
     readonly_fields = ['total_amount', 'monthly_installment', 'created_at', 'updated_at']
     inlines = [InstallmentInline]
@@ -95,18 +125,20 @@ class LoanAdmin(admin.ModelAdmin):
     borrower_name.admin_order_field = 'borrower__name'
     
     def paid_amount(self, obj):
-        amount = obj.get_paid_amount()
-        return format_html('<span style="color: green;">₹{:,.2f}</span>', amount)
+        amount = obj.paid_amount
+        return format_html('<span style="color: green;">₹{}</span>', f'{amount:,.2f}')
     paid_amount.short_description = 'Paid'
+    paid_amount.admin_order_field = 'paid_amount'
     
     def outstanding_amount(self, obj):
-        amount = obj.get_outstanding_amount()
+        amount = obj.outstanding_amount
         color = 'red' if amount > 0 else 'green'
-        return format_html('<span style="color: {};">₹{:,.2f}</span>', color, amount)
+        return format_html('<span style="color: {};">₹{}</span>', color, f'{amount:,.2f}')
     outstanding_amount.short_description = 'Outstanding'
+    outstanding_amount.admin_order_field = 'outstanding_amount'
     
     def get_readonly_fields(self, request, obj=None):
-        if obj and obj.get_paid_amount() > 0:
+        if obj and obj.paid_amount > 0:
             return self.readonly_fields + ['amount', 'interest_rate', 'tenure_months', 'start_date', 'installment_day']
         return self.readonly_fields
 
@@ -116,15 +148,21 @@ class PaymentInline(admin.TabularInline):
     extra = 0
     readonly_fields = ['created_at']
     fields = ['amount', 'payment_date', 'payment_method', 'notes', 'created_at']
+    
+    def get_queryset(self, request):
+        # Payment.__str__ is rendered for every row
+        return super().get_queryset(request).select_related('installment__loan__borrower')
 
 
 @admin.register(Installment)
 class InstallmentAdmin(admin.ModelAdmin):
     list_display = [
         'loan_borrower', 'installment_number', 'due_date', 'amount_due', 
-        'amount_paid', 'remaining_amount', 'status', 'days_overdue_display'
+        'amount_paid', 'remaining_amount', 'effective_status_display', 'days_overdue_display'
     ]
-    list_filter = ['status', 'due_date', 'loan__status']
+    list_filter = [EffectiveStatusFilter, 'due_date', 'loan__status']
+    list_select_related = ['loan__borrower']
+    show_full_result_count = False
     search_fields = ['loan__borrower__name', 'loan__borrower__phone']
     readonly_fields = ['loan', 'installment_number', 'due_date', 'amount_due', 'created_at', 'updated_at']
     inlines = [PaymentInline]
@@ -142,17 +180,28 @@ class InstallmentAdmin(admin.ModelAdmin):
         })
     )
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_effective_status().annotate(
+            remaining=F('amount_due') - F('amount_paid')
+        )
+    
     def loan_borrower(self, obj):
-        url = reverse('admin:loans_loan_change', args=[obj.loan.id])
+        url = reverse('admin:loans_loan_change', args=[obj.loan_id])
         return format_html('<a href="{}">{}</a>', url, obj.loan.borrower.name)
     loan_borrower.short_description = 'Borrower'
     loan_borrower.admin_order_field = 'loan__borrower__name'
     
     def remaining_amount(self, obj):
-        amount = obj.get_remaining_amount()
+        amount = obj.remaining
         color = 'red' if amount > 0 else 'green'
-        return format_html('<span style="color: {};">₹{:,.2f}</span>', color, amount)
+        return format_html('<span style="color: {};">₹{}</span>', color, f'{amount:,.2f}')
     remaining_amount.short_description = 'Remaining'
+    remaining_amount.admin_order_field = 'remaining'
+    
+    def effective_status_display(self, obj):
+        return dict(Installment.STATUS_CHOICES)[obj.effective_status]
+    effective_status_display.short_description = 'Status'
+    effective_status_display.admin_order_field = 'effective_status'
     
     def days_overdue_display(self, obj):
         days = obj.days_overdue()
@@ -160,6 +209,7 @@ class InstallmentAdmin(admin.ModelAdmin):
             return format_html('<span style="color: red;">{} days</span>', days)
         return '-'
     days_overdue_display.short_description = 'Overdue'
+    days_overdue_display.admin_order_field = 'overdue_days'
 
 
 @admin.register(Payment)
@@ -169,6 +219,8 @@ class PaymentAdmin(admin.ModelAdmin):
         'payment_date', 'payment_method', 'created_at'
     ]
     list_filter = ['payment_method', 'payment_date', 'created_at']
+    list_select_related = ['installment__loan__borrower']
+    show_full_result_count = False
     search_fields = ['installment__loan__borrower__name', 'installment__loan__borrower__phone']
     readonly_fields = ['created_at']
     
@@ -0,0 +1,134 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .utils import (
+    get_dashboard_stats, get_upcoming_dues, get_recent_payments, get_aging_summary,
+    get_overdue_installments, get_upcoming_installments, get_installment_totals, get_weekly_totals,
+    get_collection_report
+)
+
+
+DASHBOARD_VERSION_KEY = 'dashboard:version'
+
+# CACHES for throwaway data (tests, bench): keeps it out of the shared
+# cache a running server reads
+PRIVATE_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'loantracker-private',
+    }
+}
+
+_counters_lock = threading.Lock()
+_counters = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+
+def _count(name):
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def get_dashboard_cache_timeout():
+    """TTL (seconds) of cached dashboard data; a safety net behind signal invalidation"""
+    return getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 60)
+
+
+def _new_version():
+    """
+    Starting generation when the version key is missing. The file cache may
+    cull the key like any other entry; seeding from the clock (nanoseconds,
+    which grow faster than invalidations can bump it) means a reset can never
+    land on a generation whose entries are still cached.
+    """
+    return time.time_ns()
+
+
+def _get_version():
+    """Current generation of the dashboard cache; bumped on every invalidation"""
+    version = cache.get(DASHBOARD_VERSION_KEY)
+    if version is None:
+        version = _new_version()
+        # Another process may have seeded it first
+        if not cache.add(DASHBOARD_VERSION_KEY, version, timeout=None):
+            version = cache.get(DASHBOARD_VERSION_KEY, version)
+    return version
+
+
+def _get_or_compute(name, compute):
+    """Return cached value for name, computing and storing it on a miss"""
+    # The date is part of the key so "today"-relative figures roll over at midnight
+    key = f'dashboard:{_get_version()}:{timezone.now().date().isoformat()}:{name}'
+    value = cache.get(key)
+    if value is not None:
+        _count('hits')
+        return value
+
+    _count('misses')
+    value = compute()
+    cache.set(key, value, get_dashboard_cache_timeout())
+    return value
+
+
+def get_cached_dashboard_stats():
+    """Cached version of get_dashboard_stats()"""
+    return _get_or_compute('stats', get_dashboard_stats)
+
+
+def get_cached_upcoming_dues(days=7, limit=10):
+    """Cached (evaluated) first `limit` rows of get_upcoming_dues()"""
+    return _get_or_compute(f'upcoming:{days}:{limit}', lambda: list(get_upcoming_dues(days=days)[:limit]))
+
+
+def get_cached_recent_payments(limit=10):
+    """Cached (evaluated) version of get_recent_payments()"""
+    return _get_or_compute(f'recent_payments:{limit}', lambda: list(get_recent_payments(limit=limit)))
+
+
+def get_cached_aging_summary():
+    """Cached version of get_aging_summary(); the one query scans every unpaid installment"""
+    return _get_or_compute('aging', get_aging_summary)
+
+
+def get_cached_overdue_totals():
+    """Cached get_installment_totals() of the overdue installments"""
+    return _get_or_compute('overdue_totals', lambda: get_installment_totals(get_overdue_installments()))
+
+
+def get_cached_upcoming_totals(days=30):
+    """Cached get_installment_totals() of the upcoming dues, with their weekly_totals"""
+    def compute():
+        installments = get_upcoming_installments(days=days)
+        totals = get_installment_totals(installments)
+        totals['weeks'] = get_weekly_totals(installments)
+        return totals
+    return _get_or_compute(f'upcoming_totals:{days}', compute)
+
+
+def get_cached_collection_report(start_month, end_month):
+    """Cached get_collection_report(); saves recomputing the current month on every view"""
+    return _get_or_compute(
+        f'collections:{start_month:%Y-%m}:{end_month:%Y-%m}',
+        lambda: get_collection_report(start_month, end_month)
+    )
+
+
+def invalidate_dashboard_cache():
+    """Drop every cached dashboard entry by moving to a new cache generation"""
+    try:
+        cache.incr(DASHBOARD_VERSION_KEY)
+    except ValueError:
+        cache.set(DASHBOARD_VERSION_KEY, _new_version(), timeout=None)
+    _count('invalidations')
+
+
+def get_dashboard_cache_stats():
+    """Hit/miss counters of this process since it started"""
+    with _counters_lock:
+        stats = dict(_counters)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = round(stats['hits'] / lookups * 100, 2) if lookups else 0
+    return stats
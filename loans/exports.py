@@ -0,0 +1,128 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.dateparse import parse_date
+
+from .models import Loan, Installment, Payment
+
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+EXPORT_CHUNK_SIZE = 2000
+
+# dataset -> (model, lookup prefix for the borrower, date field, [(header, field), ...])
+EXPORT_DATASETS = {
+    'payments': (Payment, 'installment__loan__borrower', 'payment_date', [
+        ('payment_id', 'id'),
+        ('payment_date', 'payment_date'),
+        ('borrower', 'installment__loan__borrower__name'),
+        ('phone', 'installment__loan__borrower__phone'),
+        ('loan_id', 'installment__loan_id'),
+        ('installment_number', 'installment__installment_number'),
+        ('due_date', 'installment__due_date'),
+        ('amount', 'amount'),
+        ('payment_method', 'payment_method'),
+        ('notes', 'notes'),
+        ('created_at', 'created_at'),
+    ]),
+    'installments': (Installment, 'loan__borrower', 'due_date', [
+        ('installment_id', 'id'),
+        ('loan_id', 'loan_id'),
+        ('borrower', 'loan__borrower__name'),
+        ('phone', 'loan__borrower__phone'),
+        ('installment_number', 'installment_number'),
+        ('due_date', 'due_date'),
+        ('amount_due', 'amount_due'),
+        ('amount_paid', 'amount_paid'),
+        # Derived like on every screen; the stored status lags as due dates pass
+        ('status', 'effective_status'),
+        ('payment_date', 'payment_date'),
+    ]),
+    'loans': (Loan, 'borrower', 'start_date', [
+        ('loan_id', 'id'),
+        ('borrower', 'borrower__name'),
+        ('phone', 'borrower__phone'),
+        ('amount', 'amount'),
+        ('interest_rate', 'interest_rate'),
+        ('tenure_months', 'tenure_months'),
+        ('start_date', 'start_date'),
+        ('total_amount', 'total_amount'),
+        ('monthly_installment', 'monthly_installment'),
+        ('paid_amount', 'paid_amount'),
+        ('outstanding_amount', 'outstanding_amount'),
+        ('overdue_amount', 'overdue_amount'),
+        ('status', 'status'),
+    ]),
+}
+
+
+def _to_date(value):
+    """Date from a date or an ISO string; None when missing or invalid"""
+    if not value or not isinstance(value, str):
+        return value or None
+    try:
+        return parse_date(value)
+    except ValueError:
+        return None
+
+
+def filter_ledger(queryset, dataset, borrower=None, date_from=None, date_to=None):
+    """
+    Apply the all-payments filters (borrower name, date range) to a queryset
+    of the given dataset; the range applies to its natural date column.
+    """
+    _, borrower_prefix, date_field, _ = EXPORT_DATASETS[dataset]
+    if borrower:
+        queryset = queryset.filter(**{f'{borrower_prefix}__name__icontains': borrower})
+    date_from = _to_date(date_from)
+    if date_from:
+        queryset = queryset.filter(**{f'{date_field}__gte': date_from})
+    date_to = _to_date(date_to)
+    if date_to:
+        queryset = queryset.filter(**{f'{date_field}__lte': date_to})
+    return queryset
+
+
+def get_export_headers(dataset):
+    return [header for header, _ in EXPORT_DATASETS[dataset][3]]
+
+
+def iter_export_rows(dataset, chunk_size=EXPORT_CHUNK_SIZE, **filters):
+    """Yield the dataset as plain tuples, chunk by chunk, in date order"""
+    model, _, date_field, columns = EXPORT_DATASETS[dataset]
+    queryset = model.objects.all()
+    if model is Installment:
+        queryset = queryset.with_effective_status()
+    queryset = filter_ledger(queryset, dataset, **filters)
+    return queryset.order_by(date_field, 'id').values_list(
+        *[field for _, field in columns]
+    ).iterator(chunk_size=chunk_size)
+
+
+class Echo:
+    """File-like object whose write() hands the line back instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(headers, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_jsonl(headers, rows):
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    for row in rows:
+        yield encoder.encode(dict(zip(headers, row))) + '\n'
+
+
+def iter_export(dataset, export_format='csv', chunk_size=EXPORT_CHUNK_SIZE, **filters):
+    """Encoded lines of a full export; nothing is queried until the first line is pulled"""
+    headers = get_export_headers(dataset)
+    rows = iter_export_rows(dataset, chunk_size=chunk_size, **filters)
+    if export_format == 'jsonl':
+        return iter_jsonl(headers, rows)
+    return iter_csv(headers, rows)
@@ -5,6 +5,15 @@ from decimal import Decimal
 import os
 
 
+def validate_phone(phone):
+    """Phone numbers need at least 10 digits; shared by the borrower form and the portfolio import"""
+    if phone:
+        # Remove any non-digit characters
+        digits_only = ''.join(filter(str.isdigit, phone))
+        if len(digits_only) < 10:
+            raise ValidationError("Phone number must be at least 10 digits")
+
+
 class BorrowerForm(forms.ModelForm):
     """Form for creating and editing borrowers"""
     
@@ -53,11 +62,7 @@ class BorrowerForm(forms.ModelForm):
     def clean_phone(self):
         """Validate phone number"""
         phone = self.cleaned_data.get('phone')
-        if phone:
-            # Remove any non-digit characters
-            digits_only = ''.join(filter(str.isdigit, phone))
-            if len(digits_only) < 10:
-                raise ValidationError("Phone number must be at least 10 digits")
+        validate_phone(phone)
         return phone
 
 
@@ -190,6 +195,27 @@ class PaymentForm(forms.ModelForm):
         return amount
 
 
+class PaymentImportForm(forms.Form):
+    """Form for uploading a CSV of collected payments"""
+    
+    csv_file = forms.FileField(
+        label='Payments CSV',
+        widget=forms.ClearableFileInput(attrs={
+            'class': 'form-control',
+            'accept': '.csv,text/csv'
+        })
+    )
+    
+    dry_run = forms.BooleanField(
+        required=False,
+        initial=True,
+        label='Dry run (validate only, save nothing)',
+        widget=forms.CheckboxInput(attrs={
+            'class': 'form-check-input'
+        })
+    )
+
+
 class LoanSearchForm(forms.Form):
     """Form for searching and filtering loans"""
     
@@ -200,6 +226,12 @@ class LoanSearchForm(forms.Form):
         ('DEFAULTED', 'Defaulted'),
     ]
     
+    SORT_CHOICES = [
+        ('', 'Newest First'),
+        ('outstanding', 'Highest Outstanding'),
+        ('overdue', 'Most Overdue First'),
+    ]
+    
     borrower_name = forms.CharField(
         required=False,
         widget=forms.TextInput(attrs={
@@ -231,10 +263,25 @@ class LoanSearchForm(forms.Form):
             'type': 'date'
         })
     )
+    
+    sort = forms.ChoiceField(
+        choices=SORT_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={
+            'class': 'form-control'
+        })
+    )
 
 
 class BorrowerSearchForm(forms.Form):
-    """Form for searching borrowers"""
+    """Form for searching and sorting borrowers"""
+    
+    SORT_CHOICES = [
+        ('', 'Sort by Name'),
+        ('-total_outstanding', 'Highest Outstanding'),
+        ('-active_loans_count', 'Most Active Loans'),
+        ('-created_at', 'Newest First'),
+    ]
     
     search = forms.CharField(
         required=False,
@@ -243,3 +290,11 @@ class BorrowerSearchForm(forms.Form):
             'placeholder': 'Search by name or phone'
         })
     )
+    
+    sort = forms.ChoiceField(
+        choices=SORT_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={
+            'class': 'form-control'
+        })
+    )
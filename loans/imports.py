@@ -0,0 +1,400 @@
+import csv
+import hashlib
+import json
+import os
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .cache import invalidate_dashboard_cache
+from .forms import validate_phone
+from .models import Borrower, Checkpoint, Loan, Installment, Payment
+from .utils import invalidate_collection_months, invalidate_performance_month
+
+
+PAYMENT_IMPORT_COLUMNS = [
+    'installment_id', 'loan_id', 'installment_number',
+    'amount', 'payment_date', 'payment_method', 'notes',
+]
+PAYMENT_IMPORT_BATCH_SIZE = 1000
+
+# Keeps IN (...) lists well under SQLite's bound-parameter limit
+LOOKUP_CHUNK_SIZE = 900
+
+
+def _chunks(items, size):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class PaymentImport:
+    """
+    A collector day-sheet: every row parsed and checked against the
+    installments up front, then applied in batches with bulk inserts and
+    set-based recomputes instead of one Payment.save() chain per row.
+
+    Each row names an installment either by installment_id or by loan_id
+    plus installment_number; payment_date defaults to today and
+    payment_method to CASH.
+    """
+
+    def __init__(self):
+        self.payments = []
+        self.errors = []
+        self.row_count = 0
+        self._line_errors = []
+        # installment id -> (loan id, amount due, amount paid, loan outstanding, due date)
+        self.installments = {}
+
+    @classmethod
+    def from_csv(cls, lines, today=None):
+        """Parse and validate CSV text lines (a file or any iterable of str)"""
+        payment_import = cls()
+        payment_import._parse(csv.DictReader(lines), today or timezone.now().date())
+        payment_import.errors.extend(
+            f'Line {line}: {message}' for line, message in sorted(payment_import._line_errors)
+        )
+        return payment_import
+
+    def is_valid(self):
+        return not self.errors
+
+    def _error(self, line, message):
+        self._line_errors.append((line, message))
+
+    def _parse(self, reader, today):
+        header = set(reader.fieldnames or [])
+        if 'amount' not in header or not (
+            'installment_id' in header or {'loan_id', 'installment_number'} <= header
+        ):
+            self.errors.append(
+                'Header must have amount and either installment_id or loan_id and installment_number'
+            )
+            return
+
+        methods = {}
+        for code, label in Payment._meta.get_field('payment_method').choices:
+            methods[code.lower()] = code
+            methods[label.lower()] = code
+
+        rows = []
+        for line, row in enumerate(reader, start=2):
+            self.row_count += 1
+            row = {key: (value or '').strip() for key, value in row.items() if key}
+
+            try:
+                amount = Decimal(row['amount'])
+                if not amount.is_finite():
+                    raise InvalidOperation
+                amount = amount.quantize(Decimal('0.01'))
+            except InvalidOperation:
+                self._error(line, f'invalid amount "{row["amount"]}"')
+                continue
+            if amount <= 0 or amount >= Decimal('100000000'):
+                self._error(line, f'amount must be between 0 and 100,000,000, got {amount}')
+                continue
+
+            payment_date = today
+            if row.get('payment_date'):
+                try:
+                    payment_date = parse_date(row['payment_date'])
+                except ValueError:
+                    payment_date = None
+                if payment_date is None:
+                    self._error(line, f'invalid payment_date "{row["payment_date"]}" (use YYYY-MM-DD)')
+                    continue
+
+            method = methods.get(row.get('payment_method', '').lower() or 'cash')
+            if method is None:
+                self._error(line, f'unknown payment_method "{row["payment_method"]}"')
+                continue
+
+            try:
+                if row.get('installment_id'):
+                    key = int(row['installment_id'])
+                else:
+                    key = (int(row['loan_id']), int(row['installment_number']))
+            except (KeyError, ValueError):
+                self._error(line, 'needs installment_id or a numeric loan_id and installment_number')
+                continue
+
+            rows.append((line, key, amount, payment_date, method, row.get('notes', '')))
+
+        by_id, by_number = self._fetch_installments({key for _, key, *_ in rows})
+
+        # Running paid total per installment, so several receipts for one
+        # installment cannot together exceed what is due
+        paid = {}
+        for line, key, amount, payment_date, method, notes in rows:
+            installment_id = by_id.get(key) if isinstance(key, int) else by_number.get(key)
+            if installment_id is None:
+                if isinstance(key, int):
+                    self._error(line, f'no installment with id {key}')
+                else:
+                    self._error(line, f'loan {key[0]} has no installment #{key[1]}')
+                continue
+
+            loan_id, amount_due, amount_paid, _, _ = self.installments[installment_id]
+            paid_so_far = paid.get(installment_id, amount_paid)
+            if paid_so_far + amount > amount_due:
+                self._error(
+                    line,
+                    f'amount {amount} exceeds the remaining {amount_due - paid_so_far} of installment {installment_id}'
+                )
+                continue
+            paid[installment_id] = paid_so_far + amount
+
+            self.payments.append(Payment(
+                installment_id=installment_id,
+                amount=amount,
+                payment_date=payment_date,
+                payment_method=method,
+                notes=notes,
+            ))
+
+    def _fetch_installments(self, keys):
+        """Resolve row keys to installment ids with a handful of IN queries"""
+        fields = ('id', 'loan_id', 'installment_number', 'amount_due', 'amount_paid', 'loan__outstanding_amount', 'due_date')
+        ids = [key for key in keys if isinstance(key, int)]
+        numbers = [key for key in keys if not isinstance(key, int)]
+
+        found = []
+        for chunk in _chunks(ids, LOOKUP_CHUNK_SIZE):
+            found.extend(Installment.objects.filter(pk__in=chunk).values_list(*fields))
+        wanted = set(numbers)
+        for chunk in _chunks({loan_id for loan_id, _ in numbers}, LOOKUP_CHUNK_SIZE):
+            found.extend(
+                row for row in Installment.objects.filter(loan_id__in=chunk).values_list(*fields)
+                if (row[1], row[2]) in wanted
+            )
+
+        by_id, by_number = {}, {}
+        for installment_id, loan_id, number, amount_due, amount_paid, outstanding, due_date in found:
+            self.installments[installment_id] = (loan_id, amount_due, amount_paid, outstanding, due_date)
+            by_id[installment_id] = installment_id
+            by_number[(loan_id, number)] = installment_id
+        return by_id, by_number
+
+    def summary(self):
+        """What applying the import would do; used for the dry-run report"""
+        loan_amounts = defaultdict(Decimal)
+        for payment in self.payments:
+            loan_amounts[self.installments[payment.installment_id][0]] += payment.amount
+
+        outstanding = {
+            loan_id: loan_outstanding
+            for loan_id, _, _, loan_outstanding, _ in self.installments.values()
+        }
+        return {
+            'rows': self.row_count,
+            'payments': len(self.payments),
+            'errors': len(self.errors),
+            'total_amount': sum((payment.amount for payment in self.payments), Decimal('0')),
+            'installments': len({payment.installment_id for payment in self.payments}),
+            'loans': len(loan_amounts),
+            'loans_closing': sum(
+                1 for loan_id, amount in loan_amounts.items() if outstanding[loan_id] - amount <= 0
+            ),
+        }
+
+    def apply(self, batch_size=PAYMENT_IMPORT_BATCH_SIZE):
+        """
+        Insert the payments batch by batch; each batch is one transaction that
+        also recomputes its installments and loans and closes paid-off loans.
+        Returns the number of loans closed.
+        """
+        if self.errors:
+            raise ValueError('Cannot apply an import with validation errors')
+
+        today = timezone.now().date()
+        closed = 0
+        for batch in _chunks(self.payments, batch_size):
+            installment_ids = {payment.installment_id for payment in batch}
+            loan_ids = {self.installments[installment_id][0] for installment_id in installment_ids}
+            with transaction.atomic():
+                Payment.objects.bulk_create(batch)
+                installments = Installment.objects.filter(pk__in=installment_ids)
+                installments.refresh_amount_paid()
+                installments.refresh_statuses(today)
+                loans = Loan.objects.filter(pk__in=loan_ids)
+                loans.refresh_balances()
+                closed += loans.close_paid_off()
+
+        # bulk_create() and update() send no model signals
+        invalidate_dashboard_cache()
+        for month in {payment.payment_date.replace(day=1) for payment in self.payments}:
+            invalidate_performance_month(month)
+        due_dates = [self.installments[payment.installment_id][4] for payment in self.payments]
+        if due_dates:
+            invalidate_collection_months(min(due_dates), max(due_dates))
+        return closed
+
+
+PORTFOLIO_IMPORT_COLUMNS = [
+    'borrower_name', 'phone', 'email', 'address',
+    'amount', 'interest_rate', 'tenure_months', 'start_date', 'installment_day', 'status',
+]
+PORTFOLIO_IMPORT_BATCH_SIZE = 500
+
+
+def read_portfolio_rows(path, file_format=None):
+    """
+    Rows (dicts) of a portfolio file: CSV with a header line, a JSON array of
+    objects (or {"loans": [...]}) or JSON lines; the format follows the extension.
+    """
+    file_format = file_format or os.path.splitext(path)[1].lstrip('.').lower()
+    with open(path, newline='', encoding='utf-8-sig') as portfolio_file:
+        if file_format == 'csv':
+            return list(csv.DictReader(portfolio_file))
+        if file_format == 'jsonl':
+            return [json.loads(line) for line in portfolio_file if line.strip()]
+        if file_format == 'json':
+            data = json.load(portfolio_file)
+            return data['loans'] if isinstance(data, dict) else data
+    raise ValueError(f'Unsupported portfolio format "{file_format}" (use csv, json or jsonl)')
+
+
+class PortfolioImport:
+    """
+    Borrowers and loans of a migrated branch, one loan per row with its
+    borrower's details. Rows are validated with the model field validators up
+    front (phone numbers as BorrowerForm checks them; only ACTIVE loans, as
+    their schedules start fully unpaid), then inserted in chunks: borrowers (matched on name and phone, so
+    existing ones are reused), loans with calculate_totals() and their
+    installment schedules, each chunk in one transaction together with its
+    Checkpoint so an interrupted import resumes after the last committed chunk.
+    """
+
+    def __init__(self, rows, checkpoint_name):
+        self.rows = rows
+        self.checkpoint_name = checkpoint_name
+        self.errors = []
+        self.loans = []
+
+    @classmethod
+    def from_file(cls, path, file_format=None):
+        rows = read_portfolio_rows(path, file_format)
+        with open(path, 'rb') as portfolio_file:
+            digest = hashlib.sha256(portfolio_file.read()).hexdigest()[:16]
+        portfolio_import = cls(rows, f'import_portfolio:{digest}')
+        portfolio_import._validate()
+        return portfolio_import
+
+    def is_valid(self):
+        return not self.errors
+
+    def _validate(self):
+        for line, row in enumerate(self.rows, start=2):
+            row = {key: str(value).strip() for key, value in row.items() if key and value is not None}
+            borrower = Borrower(
+                name=row.get('borrower_name', ''),
+                phone=row.get('phone', ''),
+                email=row.get('email') or None,
+                address=row.get('address', ''),
+            )
+            loan = Loan(
+                amount=row.get('amount'),
+                interest_rate=row.get('interest_rate'),
+                tenure_months=row.get('tenure_months'),
+                start_date=row.get('start_date'),
+                installment_day=row.get('installment_day') or 5,
+                status=row.get('status', '').upper() or 'ACTIVE',
+            )
+            errors = {}
+            checks = [
+                (borrower, ['id_proof']),
+                (loan, ['borrower', 'total_amount', 'monthly_installment']),
+            ]
+            for instance, exclude in checks:
+                try:
+                    instance.clean_fields(exclude=exclude)
+                except ValidationError as e:
+                    errors.update(e.message_dict)
+            if 'phone' not in errors:
+                try:
+                    validate_phone(borrower.phone)
+                except ValidationError as e:
+                    errors['phone'] = e.messages
+            # Loans are imported with a fully unpaid schedule, which only
+            # fits a loan that is still running
+            if 'status' not in errors and loan.status != 'ACTIVE':
+                errors['status'] = [
+                    f'only ACTIVE loans can be imported, got {loan.status}; '
+                    'add closed or defaulted loans with their payments instead'
+                ]
+            if errors:
+                for field, messages in errors.items():
+                    self.errors.append(f'Line {line}: {field}: {" ".join(messages)}')
+                continue
+
+            loan.calculate_totals()
+            loan.outstanding_amount = loan.total_amount
+            self.loans.append((borrower, loan))
+
+    def get_position(self):
+        """Number of loans already imported by an earlier, interrupted run"""
+        return int(Checkpoint.get(self.checkpoint_name, 0))
+
+    def reset(self):
+        Checkpoint.objects.filter(name=self.checkpoint_name).delete()
+
+    def apply(self, batch_size=PORTFOLIO_IMPORT_BATCH_SIZE, progress=None):
+        """
+        Import the loans past the checkpoint, chunk by chunk; progress is
+        called with (loans done, installments created) after every commit.
+        Returns (borrowers created, loans created, installments created).
+        """
+        if self.errors:
+            raise ValueError('Cannot apply an import with validation errors')
+
+        position = self.get_position()
+        borrowers_created = loans_created = installments_created = 0
+        for start in range(position, len(self.loans), batch_size):
+            chunk = self.loans[start:start + batch_size]
+            with transaction.atomic():
+                borrower_ids, created = self._save_borrowers([borrower for borrower, _ in chunk])
+                loans = []
+                for borrower, loan in chunk:
+                    loan.borrower_id = borrower_ids[(borrower.name, borrower.phone)]
+                    loans.append(loan)
+                Loan.objects.bulk_create(loans)
+                installments_created += Loan.bulk_generate_installments(loans)
+                Checkpoint.set(self.checkpoint_name, start + len(chunk))
+
+            borrowers_created += created
+            loans_created += len(chunk)
+            if progress:
+                progress(start + len(chunk), installments_created)
+
+        # bulk_create() sends no model signals
+        invalidate_dashboard_cache()
+        for month in {loan.start_date.replace(day=1) for _, loan in self.loans[position:]}:
+            invalidate_performance_month(month)
+        if self.loans[position:]:
+            # Only months that have ended are persisted
+            first_start = min(loan.start_date for _, loan in self.loans[position:])
+            invalidate_collection_months(first_start, timezone.now().date())
+        return borrowers_created, loans_created, installments_created
+
+    def _save_borrowers(self, borrowers):
+        """Map (name, phone) to a borrower id, creating the borrowers not found"""
+        borrower_ids = {}
+        for chunk in _chunks({borrower.phone for borrower in borrowers}, LOOKUP_CHUNK_SIZE):
+            borrower_ids.update(
+                ((name, phone), pk)
+                for pk, name, phone in Borrower.objects.filter(phone__in=chunk).values_list('pk', 'name', 'phone')
+            )
+
+        new_borrowers = {}
+        for borrower in borrowers:
+            key = (borrower.name, borrower.phone)
+            if key not in borrower_ids and key not in new_borrowers:
+                new_borrowers[key] = borrower
+        for borrower in Borrower.objects.bulk_create(new_borrowers.values()):
+            borrower_ids[(borrower.name, borrower.phone)] = borrower.pk
+        return borrower_ids, len(new_borrowers)
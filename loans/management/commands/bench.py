@@ -0,0 +1,327 @@
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from loans.cache import PRIVATE_CACHES
+from loans.metrics import QueryRecorder, percentile
+from loans.models import Borrower, Checkpoint, Installment, Loan, Payment
+from loans.sample_data import generate_portfolio
+from loans.urls import urlpatterns
+
+
+SEED_CHECKPOINT = 'bench:seed'
+
+# Query strings benchmarked in addition to the bare URL, by URL name
+BENCH_VARIANTS = {
+    'loan_list': ['status=ACTIVE', 'sort=outstanding', 'sort=overdue'],
+    'overdue_installments': ['group=date', 'group=borrower'],
+    'upcoming_dues': ['group=date', 'group=borrower'],
+    'aging_report': ['bucket=90_plus'],
+    'aging_report_ajax': ['bucket=1_30'],
+    'all_payments': ['borrower=Sharma'],
+    'calculate_loan_ajax': ['amount=100000&interest_rate=24&tenure_months=12'],
+}
+# Not benchmarked: ends the session of the client
+BENCH_SKIP = {'logout'}
+# Requested without logging in: they redirect a logged-in user
+BENCH_ANONYMOUS = {'login'}
+# Redirects by design, so not flagged for their status
+BENCH_REDIRECTS = {'home'}
+# Benchmarked with POSTs, each against a different unpaid installment, after
+# every read-only view
+BENCH_POST = {'mark_installment_paid_ajax'}
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway database with a portfolio of the given size, request every URL of the '
+        'loans app through the test client and report p50/p95 latency, query count and peak memory '
+        'per view as JSON, compared with an earlier report used as baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--borrowers',
+            type=int,
+            default=1000,
+            help='Borrowers to seed, e.g. 1000, 10000 or 100000 (1.6 loans and about 30 installments each)',
+        )
+        parser.add_argument('--seed', type=int, default=42, help='Random seed of the generated portfolio')
+        parser.add_argument('--repeat', type=int, default=10, help='Timed requests per URL after a cold one')
+        parser.add_argument(
+            '--db-file',
+            help='Keep the seeded SQLite database in this file and reuse it on later runs of the same '
+                 'size and seed (default: a temporary file, deleted afterwards)',
+        )
+        parser.add_argument('--only', nargs='+', metavar='URL_NAME', help='Only benchmark these URL names')
+        parser.add_argument(
+            '--output',
+            help='Report file (default: logs/bench/bench-<borrowers>.json)',
+        )
+        parser.add_argument('--baseline', help='Earlier report to compare with')
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.25,
+            help='Relative p50 slowdown against the baseline reported as a regression',
+        )
+        parser.add_argument(
+            '--fail-on-regression',
+            action='store_true',
+            help='Exit with an error when a view regressed against the baseline',
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline'], encoding='utf-8') as f:
+                    baseline = {result['name']: result for result in json.load(f)['results']}
+            except (OSError, ValueError, KeyError) as e:
+                raise CommandError(f'Cannot read baseline {options["baseline"]}: {e}')
+
+        db_file = options['db_file']
+        if connection.vendor == 'sqlite':
+            connection.settings_dict.setdefault('TEST', {})['NAME'] = (
+                db_file or os.path.join(tempfile.gettempdir(), f'loantracker-bench-{os.getpid()}.sqlite3')
+            )
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False, keepdb=bool(db_file)
+        )
+        try:
+            with override_settings(DEBUG=False, ALLOWED_HOSTS=['*'], CACHES=PRIVATE_CACHES):
+                report = self.run_bench(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=bool(db_file))
+
+        output = Path(options['output'] or settings.BASE_DIR / 'logs' / 'bench' / f'bench-{options["borrowers"]}.json')
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+        regressions = self.print_report(report, baseline, options['tolerance'])
+        self.stdout.write(self.style.SUCCESS(f'Report written to {output}'))
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f'{len(regressions)} views regressed: {", ".join(regressions)}')
+
+    def run_bench(self, options):
+        borrowers, seed = options['borrowers'], options['seed']
+        seed_key = f'{borrowers}:{seed}'
+        started = time.perf_counter()
+        if Checkpoint.get(SEED_CHECKPOINT) != seed_key:
+            if Borrower.objects.exists():
+                call_command('flush', interactive=False, verbosity=0)
+            self.stdout.write(f'Seeding {borrowers} borrowers...')
+            generate_portfolio(borrowers, seed=seed)
+            Checkpoint.set(SEED_CHECKPOINT, seed_key)
+        seed_seconds = time.perf_counter() - started
+
+        user = User.objects.filter(username='bench').first() or User.objects.create_superuser(
+            'bench', 'bench@example.com', None
+        )
+        # Server errors are reported as a 500 status instead of aborting the run
+        client = Client(raise_request_exception=False)
+        client.force_login(user)
+        anonymous_client = Client(raise_request_exception=False)
+
+        today = timezone.now().date()
+        sample = Installment.objects.overdue(today).select_related('loan').order_by('id').first()
+        sample = sample or Installment.objects.select_related('loan').order_by('id').first()
+        if sample is None:
+            raise CommandError('The seeded database has no installments')
+        kwargs = {
+            'borrower_id': sample.loan.borrower_id,
+            'loan_id': sample.loan_id,
+            'installment_id': sample.id,
+            'dataset': 'loans',
+        }
+        unpaid_ids = iter(
+            Installment.objects.unpaid().exclude(pk=sample.pk).order_by('-id')
+            .values_list('id', flat=True)[:len(BENCH_POST) * (options['repeat'] + 2)]
+        )
+        # Edit and delete pages are only shown for loans without payments and
+        # borrowers without active loans; the sample redirects from them
+        new_loan, no_loans = self.get_editable_objects()
+        overrides = {
+            'loan_edit': {'loan_id': new_loan.id},
+            'loan_delete': {'loan_id': new_loan.id},
+            'borrower_delete': {'borrower_id': no_loans.id},
+        }
+
+        requests = []
+        for pattern in urlpatterns:
+            name = pattern.name
+            if name in BENCH_SKIP or (options['only'] and name not in options['only']):
+                continue
+            url_kwargs = {key: kwargs[key] for key in pattern.pattern.converters}
+            url_kwargs.update(overrides.get(name, {}))
+            if name in BENCH_POST:
+                requests.append((name, 'post', [
+                    reverse(name, kwargs={**url_kwargs, 'installment_id': next(unpaid_ids, sample.id)})
+                    for _ in range(options['repeat'] + 2)
+                ]))
+                continue
+            url = reverse(name, kwargs=url_kwargs)
+            requests.append((name, 'get', [url]))
+            for query in BENCH_VARIANTS.get(name, []):
+                requests.append((f'{name}?{query}', 'get', [f'{url}?{query}']))
+        # Writes last, so every read-only view sees the seeded data
+        requests.sort(key=lambda request: request[1] == 'post')
+
+        results = []
+        for name, method, urls in requests:
+            result = self.measure(
+                anonymous_client if name in BENCH_ANONYMOUS else client, name, method, urls, options['repeat']
+            )
+            results.append(result)
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  {name}: p50 {result["p50_ms"]:.1f}ms, {result["queries"]} queries')
+
+        return {
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'borrowers': borrowers,
+            'seed': seed,
+            'repeat': options['repeat'],
+            'rows': {
+                'borrowers': Borrower.objects.count(),
+                'loans': Loan.objects.count(),
+                'installments': Installment.objects.count(),
+                'payments': Payment.objects.count(),
+            },
+            'seed_seconds': round(seed_seconds, 1),
+            'results': results,
+        }
+
+    def get_editable_objects(self):
+        """A loan without payments and a borrower without loans, created once per database"""
+        borrower, _ = Borrower.objects.get_or_create(
+            name='Bench New Loan', phone='9000000000', defaults={'address': 'Jaipur'}
+        )
+        loan = borrower.loans.first() or Loan.objects.create(
+            borrower=borrower, amount=Decimal('50000'), interest_rate=Decimal('24'), tenure_months=12,
+            start_date=timezone.now().date(), installment_day=5,
+        )
+        no_loans, _ = Borrower.objects.get_or_create(
+            name='Bench No Loans', phone='9000000001', defaults={'address': 'Jaipur'}
+        )
+        return loan, no_loans
+
+    def measure(self, client, name, method, urls, repeat):
+        """Time one cold and `repeat` warm requests, then measure peak memory of one more"""
+        def request(url):
+            recorder = QueryRecorder()
+            start = time.perf_counter()
+            with connection.execute_wrapper(recorder):
+                response = getattr(client, method)(url)
+                # Streaming responses run their queries while being consumed
+                size = (
+                    sum(len(chunk) for chunk in response.streaming_content)
+                    if response.streaming else len(response.content)
+                )
+            return time.perf_counter() - start, recorder, response.status_code, size
+
+        def url_at(index):
+            return urls[index % len(urls)]
+
+        cache.clear()
+        cold, cold_recorder, cold_status, _ = request(url_at(0))
+        statuses = [cold_status]
+        timings = []
+        for index in range(1, repeat + 1):
+            elapsed, recorder, status, size = request(url_at(index))
+            statuses.append(status)
+            timings.append(elapsed * 1000)
+
+        tracemalloc.start()
+        try:
+            statuses.append(request(url_at(repeat + 1))[2])
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        # A redirect or error times something else than the view: report the first one
+        status = next((status for status in statuses if not 200 <= status < 300), status)
+
+        timings.sort()
+        return {
+            'name': name,
+            'url': urls[0],
+            'method': method.upper(),
+            'status': status,
+            'cold_ms': round(cold * 1000, 2),
+            'cold_queries': cold_recorder.count,
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'max_ms': round(timings[-1], 2),
+            'queries': recorder.count,
+            'duplicate_queries': recorder.duplicates,
+            'db_ms': round(recorder.duration * 1000, 2),
+            'peak_memory_kb': round(peak / 1024),
+            'response_bytes': size,
+        }
+
+    def is_view_status(self, result):
+        """Whether the requests got the view's own response rather than a redirect or an error"""
+        return 200 <= result['status'] < 300 or (result['name'] in BENCH_REDIRECTS and result['status'] == 302)
+
+    def print_report(self, report, baseline, tolerance):
+        """Print the results table; returns the names of the views that regressed against the baseline"""
+        rows = report['rows']
+        self.stdout.write(
+            f'{rows["borrowers"]} borrowers, {rows["loans"]} loans, {rows["installments"]} installments, '
+            f'{rows["payments"]} payments ({connection.vendor}), {report["repeat"]} requests per URL'
+        )
+        self.stdout.write(
+            f'{"URL":<48} {"status":>6} {"cold":>9} {"p50":>9} {"p95":>9} {"queries":>7} {"peak KB":>8}'
+            + ('  vs baseline' if baseline else '')
+        )
+
+        regressions = []
+        for result in report['results']:
+            line = (
+                f'{result["name"][:48]:<48} {result["status"]:>6} {result["cold_ms"]:>7.1f}ms '
+                f'{result["p50_ms"]:>7.1f}ms {result["p95_ms"]:>7.1f}ms {result["queries"]:>7} '
+                f'{result["peak_memory_kb"]:>8}'
+            )
+            if not self.is_view_status(result):
+                self.stdout.write(self.style.ERROR(line + '  not 2xx: timings are not of the view'))
+                continue
+            previous = baseline.get(result['name']) if baseline else None
+            if previous is None:
+                self.stdout.write(line + ('  new' if baseline else ''))
+                continue
+
+            change = (result['p50_ms'] - previous['p50_ms']) / previous['p50_ms'] if previous['p50_ms'] else 0
+            query_change = result['queries'] - previous['queries']
+            line += f'  {change:+.0%} p50'
+            if query_change:
+                line += f', {query_change:+d} queries'
+            if change > tolerance or query_change > 0:
+                regressions.append(result['name'])
+                self.stdout.write(self.style.ERROR(line))
+            elif change < -tolerance or query_change < 0:
+                self.stdout.write(self.style.SUCCESS(line))
+            else:
+                self.stdout.write(line)
+
+        failed = [result['name'] for result in report['results'] if not self.is_view_status(result)]
+        if failed:
+            self.stdout.write(self.style.WARNING(f'{len(failed)} URLs did not return 2xx: {", ".join(failed)}'))
+        return regressions
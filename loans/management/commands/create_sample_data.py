@@ -1,14 +1,16 @@
-from django.core.management.base import BaseCommand
-from django.utils import timezone
-from datetime import datetime, timedelta
-from decimal import Decimal
-import random
+import time
+from datetime import date
 
-from loans.models import Borrower, Loan, Payment
+from django.core.management.base import BaseCommand, CommandError
+from loans.sample_data import SAMPLE_BATCH_SIZE, generate_portfolio
 
 
 class Command(BaseCommand):
-    help = 'Generate sample data for testing the loan tracker application'
+    help = (
+        'Generate a reproducible sample portfolio: borrowers, loans started over the last five years, '
+        'their schedules and payments, with prompt, late, partial, prepaid and defaulting borrowers. '
+        'Bulk-inserted, so millions of rows take minutes; adds to the data already there.'
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -20,115 +22,46 @@ class Command(BaseCommand):
         parser.add_argument(
             '--loans',
             type=int,
-            default=15,
-            help='Number of loans to create'
+            help='Number of loans to create (default: 1.6 per borrower)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed; the same seed, sizes and --today generate the same portfolio'
+        )
+        parser.add_argument(
+            '--today',
+            type=date.fromisoformat,
+            help='Date the portfolio is generated as of, YYYY-MM-DD (default: the current date)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=SAMPLE_BATCH_SIZE,
+            help='Borrowers per transaction'
         )
 
     def handle(self, *args, **options):
+        if options['borrowers'] < 1:
+            raise CommandError('--borrowers must be at least 1')
         self.stdout.write(self.style.SUCCESS('Creating sample data...'))
-        
-        # Create borrowers
-        borrowers_created = self.create_borrowers(options['borrowers'])
-        self.stdout.write(f'Created {borrowers_created} borrowers')
-        
-        # Create loans
-        loans_created = self.create_loans(options['loans'])
-        self.stdout.write(f'Created {loans_created} loans')
-        
-        # Create some payments
-        payments_created = self.create_payments()
-        self.stdout.write(f'Created {payments_created} payments')
-        
-        self.stdout.write(
-            self.style.SUCCESS('Successfully created sample data!')
-        )
+        started = time.perf_counter()
 
-    def create_borrowers(self, count):
-        first_names = [
-            'Rajesh', 'Priya', 'Amit', 'Sunita', 'Vikram', 'Anjali', 'Suresh', 'Kavita',
-            'Ravi', 'Meera', 'Arun', 'Deepa', 'Sanjay', 'Rekha', 'Vinod', 'Pooja'
-        ]
-        last_names = [
-            'Sharma', 'Patel', 'Singh', 'Kumar', 'Gupta', 'Yadav', 'Joshi', 'Verma',
-            'Agarwal', 'Mishra', 'Tiwari', 'Pandey', 'Rana', 'Chauhan', 'Jain', 'Shah'
-        ]
-        
-        created = 0
-        for i in range(count):
-            name = f"{random.choice(first_names)} {random.choice(last_names)}"
-            phone = f"9{random.randint(100000000, 999999999)}"
-            
-            # Check if borrower already exists
-            if not Borrower.objects.filter(phone=phone).exists():
-                Borrower.objects.create(
-                    name=name,
-                    phone=phone,
-                    email=f"{name.lower().replace(' ', '.')}@example.com",
-                    address=f"House No. {random.randint(1, 999)}, {random.choice(['MG Road', 'Gandhi Nagar', 'Station Road', 'Market Street'])}, Jaipur"
+        def progress(counts):
+            if options['verbosity'] > 1:
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'{counts["borrowers"]}/{options["borrowers"]} borrowers, {counts["installments"]} '
+                    f'installments ({sum(counts.values()) / elapsed:,.0f} rows/s)'
                 )
-                created += 1
-        
-        return created
 
-    def create_loans(self, count):
-        borrowers = list(Borrower.objects.all())
-        if not borrowers:
-            self.stdout.write(self.style.ERROR('No borrowers found. Create borrowers first.'))
-            return 0
-        
-        loan_amounts = [50000, 75000, 100000, 125000, 150000, 200000, 250000, 300000]
-        interest_rates = [18, 20, 22, 24, 26, 28, 30]
-        tenures = [6, 9, 12, 15, 18, 24]
-        
-        created = 0
-        for i in range(count):
-            borrower = random.choice(borrowers)
-            
-            # Don't create more than 3 loans per borrower
-            if borrower.loans.count() >= 3:
-                continue
-            
-            start_date = timezone.now().date() - timedelta(days=random.randint(30, 365))
-            
-            loan = Loan.objects.create(
-                borrower=borrower,
-                amount=Decimal(str(random.choice(loan_amounts))),
-                interest_rate=Decimal(str(random.choice(interest_rates))),
-                tenure_months=random.choice(tenures),
-                start_date=start_date,
-                installment_day=random.randint(1, 28),
-                status=random.choice(['ACTIVE', 'ACTIVE', 'ACTIVE', 'CLOSED'])  # 75% active
-            )
-            created += 1
-        
-        return created
-
-    def create_payments(self):
-        # Create payments for some installments
-        from loans.models import Installment
-        
-        installments = Installment.objects.filter(
-            loan__status='ACTIVE',
-            due_date__lte=timezone.now().date()
-        ).order_by('due_date')
-        
-        created = 0
-        for installment in installments[:50]:  # Process first 50 overdue installments
-            # 70% chance of payment
-            if random.random() < 0.7:
-                payment_amount = installment.amount_due
-                
-                # 20% chance of partial payment
-                if random.random() < 0.2:
-                    payment_amount = installment.amount_due * Decimal(str(random.uniform(0.3, 0.9)))
-                
-                Payment.objects.create(
-                    installment=installment,
-                    amount=payment_amount,
-                    payment_date=installment.due_date + timedelta(days=random.randint(0, 15)),
-                    payment_method=random.choice(['CASH', 'BANK', 'ONLINE']),
-                    notes='Sample payment'
-                )
-                created += 1
-        
-        return created
+        counts = generate_portfolio(
+            options['borrowers'], loans=options['loans'], seed=options['seed'],
+            batch_size=options['batch_size'], progress=progress, today=options['today'],
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {counts["borrowers"]} borrowers, {counts["loans"]} loans, {counts["installments"]} '
+            f'installments and {counts["payments"]} payments in {elapsed:.1f}s'
+        ))
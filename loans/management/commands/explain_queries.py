@@ -0,0 +1,130 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+from datetime import timedelta
+from dateutil.relativedelta import relativedelta
+
+from loans.models import Borrower, Loan, Installment, Payment
+from loans.utils import (
+    get_upcoming_dues, get_recent_payments, get_aging_aggregates, get_aging_borrowers,
+    get_aging_bucket_installments, get_overdue_installments, get_upcoming_installments,
+    group_installments_by_date, get_installment_borrowers
+)
+
+
+class Command(BaseCommand):
+    help = 'Print the query plan of every hot dashboard/list query as a Markdown report'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Run ANALYZE first so the planner has fresh table statistics',
+        )
+
+    def get_hot_queries(self):
+        """Querysets with the same shape as the ones issued by the views and utils"""
+        today = timezone.now().date()
+        month_start = today.replace(day=1)
+        borrower = Borrower.objects.order_by('pk').first()
+        loan = Loan.objects.order_by('pk').first()
+
+        queries = [
+            ('get_dashboard_stats: installments due this month', Installment.objects.filter(
+                due_date__gte=month_start,
+                due_date__lt=month_start + relativedelta(months=1),
+                loan__status='ACTIVE'
+            ).order_by()),
+            ('get_installment_totals: overdue installments', get_overdue_installments(today).order_by()),
+            ('dashboard_view / overdue_installments_view: first overdue page', get_overdue_installments(
+                today
+            ).with_effective_status(today).select_related('loan', 'loan__borrower').order_by('due_date', 'id')[:51]),
+            ('overdue_installments_view: grouped by due date', group_installments_by_date(
+                get_overdue_installments(today)
+            ).order_by('due_date')[:51]),
+            ('overdue_installments_view: borrowers page', get_installment_borrowers(
+                get_overdue_installments(today)
+            ).order_by('name', 'id')[:26]),
+            ('get_upcoming_dues: first 10 of the next 7 days', get_upcoming_dues(days=7)[:10]),
+            ('upcoming_dues_view: first page of the next 30 days', get_upcoming_installments(
+                days=30, today=today
+            ).select_related('loan', 'loan__borrower').order_by('due_date', 'id')[:51]),
+            ('refresh_overdue_statuses: one chunk of newly overdue installments', Installment.objects.filter(
+                due_date__gte=today - timedelta(days=7),
+                due_date__lt=today,
+                amount_paid__lt=F('amount_due'),
+                status='PENDING'
+            ).order_by()),
+            ('Loan.refresh_balances: unpaid installments past due', Installment.objects.filter(
+                due_date__lt=today,
+                amount_paid__lt=F('amount_due')
+            ).order_by('due_date')),
+            ('all_payments_view: newest payments page', Payment.objects.select_related(
+                'installment', 'installment__loan', 'installment__loan__borrower'
+            ).order_by('-payment_date')[:50]),
+            ('all_payments_view: keyset page after a cursor', Payment.objects.select_related(
+                'installment', 'installment__loan', 'installment__loan__borrower'
+            ).filter(
+                Q(payment_date__lte=today) & (Q(payment_date__lt=today) | Q(payment_date=today, id__lt=1000))
+            ).order_by('-payment_date', '-id')[:51]),
+            ('get_recent_payments', get_recent_payments(limit=10)),
+            ('loan_list_view: newest loans page', Loan.objects.select_related('borrower')[:20]),
+            ('loan_list_view: keyset page after a cursor', Loan.objects.select_related('borrower').filter(
+                Q(start_date__lte=month_start) & (Q(start_date__lt=month_start) | Q(start_date=month_start, id__lt=1000))
+            ).order_by('-start_date', '-id')[:21]),
+            ('loan_list_view: active loans page', Loan.objects.select_related('borrower').filter(status='ACTIVE')[:20]),
+            ('loan_list_view: most overdue first page', Loan.objects.select_related('borrower').order_by(
+                F('first_unpaid_due_date').asc(nulls_last=True), 'id'
+            )[:20]),
+            ('aging_report_view: borrowers page', get_aging_borrowers().order_by('name', 'id')[:26]),
+            ('aging_report_view: aging buckets of one page of borrowers', Installment.objects.unpaid().filter(
+                loan__status='ACTIVE',
+                loan__borrower_id__in=[borrower.pk] if borrower else []
+            ).order_by().values('loan__borrower_id').annotate(**get_aging_aggregates(today))),
+            ('aging_report_view: 90+ days drill-down page', get_aging_bucket_installments(
+                '90_plus', today
+            ).order_by('due_date', 'id')[:51]),
+            ('Borrower.get_active_loans', Loan.objects.filter(borrower=borrower, status='ACTIVE')),
+            ('loan_detail_view: installment schedule', Installment.objects.filter(loan=loan).order_by('due_date')),
+        ]
+        return queries
+
+    def handle(self, *args, **options):
+        if options['analyze']:
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        counts = {
+            model.__name__: model.objects.count()
+            for model in (Borrower, Loan, Installment, Payment)
+        }
+        self.stdout.write('# Query plans for hot queries')
+        self.stdout.write('')
+        self.stdout.write(f'Database vendor: {connection.vendor}  ')
+        self.stdout.write(
+            'Row counts: ' + ', '.join(f'{name}={count:,}' for name, count in counts.items())
+        )
+
+        full_scans = 0
+        for label, queryset in self.get_hot_queries():
+            plan = queryset.explain()
+            self.stdout.write('')
+            self.stdout.write(f'## {label}')
+            self.stdout.write('')
+            self.stdout.write('```sql')
+            self.stdout.write(str(queryset.query))
+            self.stdout.write('```')
+            self.stdout.write('')
+            self.stdout.write('```')
+            self.stdout.write(plan)
+            self.stdout.write('```')
+            for line in plan.splitlines():
+                if 'SCAN' in line and 'USING' not in line:
+                    full_scans += 1
+
+        self.stdout.write('')
+        if full_scans:
+            self.stdout.write(self.style.WARNING(f'{full_scans} plan step(s) scan a table without an index'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Every hot query is served by an index'))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from loans.exports import EXPORT_CHUNK_SIZE, EXPORT_DATASETS, EXPORT_FORMATS, iter_export
+
+
+class Command(BaseCommand):
+    help = 'Stream a full payments/installments/loans ledger as CSV or JSON lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=list(EXPORT_DATASETS))
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv', dest='export_format')
+        parser.add_argument('--output', '-o', help='File to write (default: stdout)')
+        parser.add_argument('--borrower', help='Only rows of borrowers whose name contains this')
+        parser.add_argument('--date-from', help='Earliest date (YYYY-MM-DD) of the dataset\'s date column')
+        parser.add_argument('--date-to', help='Latest date (YYYY-MM-DD) of the dataset\'s date column')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        lines = iter_export(
+            options['dataset'],
+            options['export_format'],
+            chunk_size=options['chunk_size'],
+            borrower=options['borrower'],
+            date_from=options['date_from'],
+            date_to=options['date_to'],
+        )
+
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+                count = 0
+                for line in lines:
+                    output.write(line)
+                    count += 1
+            if options['export_format'] == 'csv':
+                count -= 1  # header line
+            self.stderr.write(self.style.SUCCESS(f'Exported {count} rows to {options["output"]}'))
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
@@ -1,6 +1,9 @@
 from django.core.management.base import BaseCommand
 from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from loans.cache import invalidate_dashboard_cache
 from loans.models import Loan, Installment
+from loans.utils import invalidate_collection_months
 from dateutil.relativedelta import relativedelta
 
 
@@ -25,13 +28,18 @@ class Command(BaseCommand):
         
         # Find loans that have installments starting in the same month as loan start date
         loans_to_update = []
+        first_due_date = Installment.objects.filter(
+            loan=OuterRef('pk')
+        ).order_by('installment_number').values('due_date')[:1]
+        loans = Loan.objects.filter(status='ACTIVE').select_related('borrower').annotate(
+            first_due_date=Subquery(first_due_date)
+        )
         
-        for loan in Loan.objects.filter(status='ACTIVE'):
-            first_installment = loan.installments.order_by('installment_number').first()
-            if first_installment:
+        for loan in loans:
+            if loan.first_due_date:
                 # Check if first installment is in the same month as loan start
-                if (first_installment.due_date.year == loan.start_date.year and 
-                    first_installment.due_date.month == loan.start_date.month):
+                if (loan.first_due_date.year == loan.start_date.year and 
+                    loan.first_due_date.month == loan.start_date.month):
                     loans_to_update.append(loan)
         
         if not loans_to_update:
@@ -43,10 +51,9 @@ class Command(BaseCommand):
         self.stdout.write(f'Found {len(loans_to_update)} loans that need updating:')
         
         for loan in loans_to_update:
-            first_installment = loan.installments.order_by('installment_number').first()
             self.stdout.write(
                 f'- Loan {loan.id}: {loan.borrower.name} '
-                f'(Start: {loan.start_date}, First EMI: {first_installment.due_date})'
+                f'(Start: {loan.start_date}, First EMI: {loan.first_due_date})'
             )
         
         if not apply_changes:
@@ -56,29 +63,37 @@ class Command(BaseCommand):
             return
         
         # Apply changes
-        updated_count = 0
-        
-        with transaction.atomic():
-            for loan in loans_to_update:
-                # Check if any payments have been made
-                if loan.get_paid_amount() > 0:
-                    self.stdout.write(
-                        self.style.WARNING(
-                            f'Skipping loan {loan.id} - payments already made'
-                        )
-                    )
-                    continue
-                
-                # Delete existing installments
-                loan.installments.all().delete()
-                
-                # Regenerate installments (will use new logic)
-                loan.generate_installments()
-                
-                updated_count += 1
+        regenerate = []
+        for loan in loans_to_update:
+            # Check if any payments have been made
+            if loan.get_paid_amount() > 0:
                 self.stdout.write(
-                    self.style.SUCCESS(f'Updated loan {loan.id} for {loan.borrower.name}')
+                    self.style.WARNING(
+                        f'Skipping loan {loan.id} - payments already made'
+                    )
                 )
+                continue
+            regenerate.append(loan)
+        
+        with transaction.atomic():
+            # Delete existing installments
+            Installment.objects.filter(loan__in=regenerate).delete()
+            
+            # Regenerate installments (will use new logic) in one batch
+            Loan.bulk_generate_installments(regenerate)
+        invalidate_dashboard_cache()
+        # The new schedules were bulk-created without signals
+        if regenerate:
+            invalidate_collection_months(
+                min(loan.start_date for loan in regenerate),
+                max(loan.start_date + relativedelta(months=loan.tenure_months + 1) for loan in regenerate)
+            )
+        
+        for loan in regenerate:
+            self.stdout.write(
+                self.style.SUCCESS(f'Updated loan {loan.id} for {loan.borrower.name}')
+            )
+        updated_count = len(regenerate)
         
         self.stdout.write(
             self.style.SUCCESS(
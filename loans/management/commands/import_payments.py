@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from loans.imports import PAYMENT_IMPORT_BATCH_SIZE, PaymentImport
+
+
+class Command(BaseCommand):
+    help = 'Import a CSV of collected payments (installment_id or loan_id + installment_number, amount, payment_date, payment_method, notes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help='Path of the CSV file')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate and report without saving anything',
+        )
+        parser.add_argument('--batch-size', type=int, default=PAYMENT_IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            with open(options['csv_file'], newline='', encoding='utf-8-sig') as csv_file:
+                payment_import = PaymentImport.from_csv(csv_file)
+        except OSError as e:
+            raise CommandError(str(e))
+
+        summary = payment_import.summary()
+        self.stdout.write(
+            f"{summary['rows']} rows: {summary['payments']} valid payments totalling "
+            f"₹{summary['total_amount']:,.2f} across {summary['installments']} installments "
+            f"of {summary['loans']} loans; {summary['loans_closing']} loans would be closed"
+        )
+        for error in payment_import.errors:
+            self.stdout.write(self.style.ERROR(error))
+
+        if not payment_import.is_valid():
+            raise CommandError(f"{summary['errors']} invalid rows; nothing was imported")
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run: nothing was imported'))
+            return
+
+        closed = payment_import.apply(batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {summary['payments']} payments and closed {closed} loans "
+                f"in {elapsed:.2f}s ({summary['payments'] / elapsed:,.0f} payments/s)"
+            )
+        )
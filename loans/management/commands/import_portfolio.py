@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from loans.imports import PORTFOLIO_IMPORT_BATCH_SIZE, PORTFOLIO_IMPORT_COLUMNS, PortfolioImport
+
+
+class Command(BaseCommand):
+    help = (
+        'Import borrowers and active loans (with their installment schedules) from a CSV, JSON or JSON lines file. '
+        f'Fields: {", ".join(PORTFOLIO_IMPORT_COLUMNS)}. Re-running after an interruption resumes where it stopped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Path of the portfolio file')
+        parser.add_argument('--format', choices=['csv', 'json', 'jsonl'], dest='file_format',
+                            help='File format (default: from the extension)')
+        parser.add_argument('--batch-size', type=int, default=PORTFOLIO_IMPORT_BATCH_SIZE,
+                            help='Loans per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Validate the file without importing')
+        parser.add_argument('--restart', action='store_true',
+                            help='Ignore the progress of an earlier run of this file and import it again')
+
+    def handle(self, *args, **options):
+        try:
+            portfolio_import = PortfolioImport.from_file(options['file'], options['file_format'])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for error in portfolio_import.errors:
+            self.stdout.write(self.style.ERROR(error))
+        if not portfolio_import.is_valid():
+            raise CommandError(f'{len(portfolio_import.errors)} validation errors; nothing was imported')
+
+        total = len(portfolio_import.loans)
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'Dry run: {total} loans are valid, nothing was imported'))
+            return
+
+        if options['restart']:
+            portfolio_import.reset()
+        position = portfolio_import.get_position()
+        if position >= total:
+            self.stdout.write(self.style.WARNING(
+                f'All {total} loans of this file were already imported (use --restart to import them again)'
+            ))
+            return
+        if position:
+            self.stdout.write(f'Resuming after {position} of {total} loans imported earlier')
+
+        started = time.perf_counter()
+
+        def progress(done, installments):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{done}/{total} loans, {installments} installments '
+                f'({(done - position) / elapsed:,.0f} loans/s)'
+            )
+
+        borrowers, loans, installments = portfolio_import.apply(options['batch_size'], progress)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {loans} loans for {borrowers} new borrowers with {installments} installments '
+            f'in {elapsed:.2f}s ({loans / elapsed:,.0f} loans/s, {installments / elapsed:,.0f} installments/s)'
+        ))
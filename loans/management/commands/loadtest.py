@@ -0,0 +1,278 @@
+import http.cookiejar
+import json
+import queue
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+from loans.metrics import percentile
+from loans.models import Installment
+
+
+# Share of each collector action: open the dashboard, record a payment
+# through the payment form (GET and POST), or mark an installment paid from
+# the dashboard button
+DEFAULT_MIX = 'dashboard=2,pay=1,mark_paid=1'
+ACTIONS = ('dashboard', 'pay', 'mark_paid')
+LOCKED_MESSAGE = b'database is locked'
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Report redirects (login and payment success) instead of following them"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class Collector:
+    """One simulated collector: its own session, logged in through the login form"""
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies), _NoRedirect
+        )
+
+    def csrf_token(self):
+        return next((cookie.value for cookie in self.cookies if cookie.name == 'csrftoken'), '')
+
+    def request(self, path, data=None, headers=None):
+        """(status, body) of one request; redirects and error statuses are returned, not raised"""
+        if data is not None:
+            data = urllib.parse.urlencode(data).encode()
+        request = urllib.request.Request(self.base_url + path, data=data, headers=headers or {})
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    def post(self, path, data=None, ajax=False):
+        headers = {'X-CSRFToken': self.csrf_token(), 'X-Requested-With': 'XMLHttpRequest'} if ajax else {}
+        return self.request(path, {'csrfmiddlewaretoken': self.csrf_token(), **(data or {})}, headers)
+
+    def login(self, username, password):
+        login_url = reverse('login')
+        self.request(login_url)
+        return self.post(login_url, {'username': username, 'password': password})
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test a running server (runserver or gunicorn) with concurrent collectors: each logs in '
+        'through the login form, then opens the dashboard and records payments through the payment '
+        'form and the mark-paid button. Reports throughput, latency percentiles per action and the '
+        '"database is locked" error rate. Lock failures are only recognized with DEBUG on, where the '
+        'error page names them; with DEBUG off they are counted as server errors (5xx). Installments '
+        'to pay are read from the local database, which must be the one the server uses.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='Server to load')
+        parser.add_argument('--username', required=True, help='Account the collectors log in with')
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--concurrency', type=int, default=10, help='Collectors working at once')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run')
+        parser.add_argument(
+            '--mix',
+            default=DEFAULT_MIX,
+            help=f'Relative weight of each action, as name=weight pairs (default: {DEFAULT_MIX})',
+        )
+        parser.add_argument('--think-time', type=float, default=0, help='Seconds a collector waits between actions')
+        parser.add_argument('--timeout', type=float, default=30, help='Seconds before a request is abandoned')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed of the action sequence')
+        parser.add_argument('--output', help='Also write the report as JSON to this file')
+
+    def parse_mix(self, mix):
+        weights = {}
+        for part in mix.split(','):
+            name, _, weight = part.partition('=')
+            name = name.strip()
+            if name not in ACTIONS:
+                raise CommandError(f'Unknown action "{name}" in --mix; choose from {", ".join(ACTIONS)}')
+            try:
+                weights[name] = float(weight or 1)
+            except ValueError:
+                raise CommandError(f'Bad weight "{weight}" for {name} in --mix')
+        if not any(weights.values()):
+            raise CommandError('--mix gives every action a weight of zero')
+        return weights
+
+    def handle(self, *args, **options):
+        weights = self.parse_mix(options['mix'])
+        concurrency = options['concurrency']
+        if concurrency < 1:
+            raise CommandError('--concurrency must be at least 1')
+
+        # Installments oldest-due first, each paid once; payments stop when they run out
+        unpaid = queue.Queue()
+        for installment_id, remaining in (
+            Installment.objects.unpaid().filter(due_date__lte=timezone.now().date())
+            .annotate(remaining=F('amount_due') - F('amount_paid'))
+            .order_by('due_date', 'id').values_list('id', 'remaining')[:100000]
+        ):
+            unpaid.put((installment_id, remaining))
+        if unpaid.empty() and (weights.get('pay') or weights.get('mark_paid')):
+            self.stdout.write(self.style.WARNING('No unpaid installments due; only the dashboard will be loaded'))
+
+        samples = defaultdict(list)  # action: [(seconds, outcome)]
+        samples_lock = threading.Lock()
+        login_failures = []
+        deadline = []
+        # Every collector logs in first; the clock starts once all of them have
+        start_barrier = threading.Barrier(
+            concurrency + 1, action=lambda: deadline.append(time.perf_counter() + options['duration'])
+        )
+
+        def record(action, started, status, body):
+            elapsed = time.perf_counter() - started
+            if LOCKED_MESSAGE in body:
+                outcome = 'locked'
+            elif status >= 500:
+                # Includes lock failures behind the generic error page of DEBUG=False
+                outcome = 'server_error'
+            elif status >= 400 or (action == 'mark_paid' and b'"error"' in body):
+                outcome = 'error'
+            elif action == 'pay_submit' and status != 302:
+                # The form came back with errors instead of redirecting to the loan
+                outcome = 'error'
+            else:
+                outcome = 'ok'
+            with samples_lock:
+                samples[action].append((elapsed, outcome))
+
+        def timed(action, call, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                status, body = call(*args, **kwargs)
+            except (OSError, urllib.error.URLError) as e:
+                status, body = 599, str(e).encode()
+            record(action, started, status, body)
+            return status
+
+        def work(number):
+            collector = Collector(options['base_url'], options['timeout'])
+            rng = random.Random(options['seed'] * 1000 + number)
+            status = None
+            try:
+                status = timed('login', collector.login, options['username'], options['password'])
+            finally:
+                if status != 302:
+                    login_failures.append(status)
+                start_barrier.wait()
+            if status != 302:
+                return
+
+            actions, action_weights = zip(*weights.items())
+            while time.perf_counter() < deadline[0]:
+                action = rng.choices(actions, action_weights)[0]
+                if action == 'dashboard':
+                    timed('dashboard', collector.request, reverse('dashboard'))
+                else:
+                    try:
+                        installment_id, remaining = unpaid.get_nowait()
+                    except queue.Empty:
+                        timed('dashboard', collector.request, reverse('dashboard'))
+                        continue
+                    if action == 'pay':
+                        pay_url = reverse('installment_pay', args=[installment_id])
+                        timed('pay_form', collector.request, pay_url)
+                        timed('pay_submit', collector.post, pay_url, {
+                            'amount': remaining,
+                            'payment_date': timezone.now().date().isoformat(),
+                            'payment_method': 'CASH',
+                            'notes': 'Load test',
+                        })
+                    else:
+                        timed('mark_paid', collector.post,
+                              reverse('mark_installment_paid_ajax', args=[installment_id]), ajax=True)
+                if options['think_time']:
+                    time.sleep(options['think_time'])
+
+        threads = [threading.Thread(target=work, args=(number,), daemon=True) for number in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(f'Logging in {concurrency} collectors at {options["base_url"]}...')
+        start_barrier.wait()
+        if len(login_failures) == concurrency:
+            raise CommandError(f'No collector could log in (statuses: {set(login_failures)})')
+        started = deadline[0] - options['duration']
+        self.stdout.write(f'Running for {options["duration"]:.0f}s...')
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        report = self.build_report(samples, elapsed, options, concurrency - len(login_failures))
+        self.print_report(report)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Report written to {options["output"]}'))
+
+    def build_report(self, samples, elapsed, options, collectors):
+        actions = {}
+        for action, results in sorted(samples.items()):
+            timings = sorted(seconds * 1000 for seconds, _ in results)
+            outcomes = [outcome for _, outcome in results]
+            actions[action] = {
+                'requests': len(results),
+                'ok': outcomes.count('ok'),
+                'locked': outcomes.count('locked'),
+                'server_errors': outcomes.count('server_error'),
+                'errors': outcomes.count('error'),
+                'p50_ms': round(percentile(timings, 50), 1),
+                'p95_ms': round(percentile(timings, 95), 1),
+                'p99_ms': round(percentile(timings, 99), 1),
+                'max_ms': round(timings[-1], 1),
+            }
+        measured = {action: stats for action, stats in actions.items() if action != 'login'}
+        requests = sum(stats['requests'] for stats in measured.values())
+        locked = sum(stats['locked'] for stats in measured.values())
+        server_errors = sum(stats['server_errors'] for stats in measured.values())
+        errors = sum(stats['errors'] for stats in measured.values())
+        payments = sum(measured.get(action, {}).get('ok', 0) for action in ('pay_submit', 'mark_paid'))
+        return {
+            'created_at': timezone.now().isoformat(),
+            'base_url': options['base_url'],
+            'collectors': collectors,
+            'duration_s': round(elapsed, 1),
+            'mix': options['mix'],
+            'requests': requests,
+            'requests_per_s': round(requests / elapsed, 1) if elapsed else 0,
+            'payments_per_s': round(payments / elapsed, 1) if elapsed else 0,
+            'locked_rate': round(locked / requests, 4) if requests else 0,
+            'server_error_rate': round(server_errors / requests, 4) if requests else 0,
+            'error_rate': round(errors / requests, 4) if requests else 0,
+            'actions': actions,
+        }
+
+    def print_report(self, report):
+        self.stdout.write(
+            f'{report["collectors"]} collectors, {report["duration_s"]}s: {report["requests"]} requests, '
+            f'{report["requests_per_s"]} req/s, {report["payments_per_s"]} payments/s'
+        )
+        self.stdout.write(
+            f'{"action":<12} {"requests":>8} {"ok":>7} {"locked":>7} {"5xx":>7} {"errors":>7} '
+            f'{"p50":>9} {"p95":>9} {"p99":>9} {"max":>9}'
+        )
+        for action, stats in report['actions'].items():
+            self.stdout.write(
+                f'{action:<12} {stats["requests"]:>8} {stats["ok"]:>7} {stats["locked"]:>7} '
+                f'{stats["server_errors"]:>7} {stats["errors"]:>7} '
+                f'{stats["p50_ms"]:>7.1f}ms {stats["p95_ms"]:>7.1f}ms {stats["p99_ms"]:>7.1f}ms {stats["max_ms"]:>7.1f}ms'
+            )
+        style = self.style.ERROR if report['locked_rate'] or report['server_error_rate'] else self.style.SUCCESS
+        self.stdout.write(style(
+            f'"database is locked": {report["locked_rate"]:.2%} of requests; other server errors: '
+            f'{report["server_error_rate"]:.2%}; other errors: {report["error_rate"]:.2%}'
+        ))
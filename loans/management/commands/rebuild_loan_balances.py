@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from loans.cache import invalidate_dashboard_cache
+from loans.models import Loan
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized paid/outstanding/overdue amounts on every loan from its installments'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--status',
+            choices=[choice for choice, _ in Loan.STATUS_CHOICES],
+            help='Only rebuild loans with this status',
+        )
+
+    def handle(self, *args, **options):
+        loans = Loan.objects.all()
+        if options['status']:
+            loans = loans.filter(status=options['status'])
+
+        with transaction.atomic():
+            updated_count = loans.refresh_balances()
+        invalidate_dashboard_cache()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully rebuilt balances for {updated_count} loans!')
+        )
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+from loans.cache import invalidate_dashboard_cache
+from loans.utils import STATUS_WATERMARK, refresh_overdue_statuses
+
+
+class Command(BaseCommand):
+    help = (
+        'Mark installments that fell due since the last run as overdue and refresh the overdue '
+        'amounts of their loans, in short per due-date-range transactions. Safe to run every few minutes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-days',
+            type=int,
+            default=7,
+            help='Due-date range handled per transaction',
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Ignore the watermark and re-check every unpaid installment',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        verbose = options['verbosity'] > 1
+
+        def progress(start, end, totals):
+            if verbose:
+                self.stdout.write(
+                    f'  {start} .. {end}: {totals["installments"]} installments, '
+                    f'{totals["loan_refreshes"]} loan refreshes so far ({time.perf_counter() - started:.2f}s)'
+                )
+
+        totals = refresh_overdue_statuses(
+            chunk_days=options['chunk_days'], full=options['full'], progress=progress, watermark=STATUS_WATERMARK
+        )
+        if totals['installments'] or totals['loan_refreshes']:
+            invalidate_dashboard_cache()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Due dates {totals["start"]} .. {totals["end"]}: {totals["installments"]} installment statuses '
+            f'updated, {totals["loan_refreshes"]} loan balances refreshed in {totals["chunks"]} chunks, {elapsed:.2f}s'
+        ))
@@ -0,0 +1,112 @@
+import json
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from loans.metrics import fingerprint_sql, percentile
+
+
+SORT_KEYS = {
+    'total': lambda group: group['total'],
+    'p95': lambda group: group['p95'],
+    'max': lambda group: group['max'],
+    'count': lambda group: group['count'],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Summarize the slow-query log written by SlowQueryMiddleware: queries grouped by SQL '
+        'fingerprint (literals and IN-list lengths normalized) with count, p50/p95/max and total '
+        'time, and the views, templates and call sites they came from.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            default=None,
+            help='Slow-query log to read (default: SLOW_QUERY_LOG_FILE)',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=20,
+            help='Number of fingerprints to show',
+        )
+        parser.add_argument(
+            '--sort',
+            choices=sorted(SORT_KEYS),
+            default='total',
+            help='Order fingerprints by total time (default), p95, max or count',
+        )
+        parser.add_argument(
+            '--view',
+            help='Only queries issued by this view name',
+        )
+
+    def handle(self, *args, **options):
+        log_file = Path(options['file'] or settings.SLOW_QUERY_LOG_FILE)
+        if not log_file.exists():
+            raise CommandError(f'{log_file} does not exist; set SLOW_QUERY_THRESHOLD_MS to start recording')
+
+        groups = {}
+        skipped = 0
+        with open(log_file, encoding='utf-8') as log:
+            for line in log:
+                try:
+                    entry = json.loads(line)
+                    duration = float(entry['duration_ms'])
+                    sql = entry['sql']
+                except (ValueError, KeyError, TypeError):
+                    skipped += 1
+                    continue
+                if options['view'] and entry.get('view') != options['view']:
+                    continue
+
+                fingerprint = fingerprint_sql(sql)
+                group = groups.setdefault(fingerprint, {
+                    'durations': [], 'views': Counter(), 'templates': Counter(), 'call_sites': Counter(),
+                })
+                group['durations'].append(duration)
+                group['views'][entry.get('view') or '-'] += 1
+                if entry.get('template'):
+                    group['templates'][entry['template']] += 1
+                if entry.get('call_site'):
+                    group['call_sites'][entry['call_site']] += 1
+
+        if not groups:
+            self.stdout.write(f'No slow queries in {log_file}' + (f' ({skipped} unreadable lines)' if skipped else ''))
+            return
+
+        for group in groups.values():
+            durations = sorted(group['durations'])
+            group.update(
+                count=len(durations),
+                p50=percentile(durations, 50),
+                p95=percentile(durations, 95),
+                max=durations[-1],
+                total=sum(durations),
+            )
+        ranked = sorted(groups.items(), key=lambda item: SORT_KEYS[options['sort']](item[1]), reverse=True)
+
+        total_queries = sum(group['count'] for group in groups.values())
+        self.stdout.write(
+            f'{total_queries} slow queries, {len(groups)} fingerprints in {log_file}'
+            + (f', {skipped} unreadable lines skipped' if skipped else '')
+        )
+        for rank, (fingerprint, group) in enumerate(ranked[:options['limit']], 1):
+            self.stdout.write('')
+            self.stdout.write(self.style.WARNING(
+                f'#{rank}  count={group["count"]}  p50={group["p50"]:.1f}ms  p95={group["p95"]:.1f}ms  '
+                f'max={group["max"]:.1f}ms  total={group["total"]:.1f}ms'
+            ))
+            self.stdout.write(f'  views: {self._top(group["views"])}')
+            if group['templates']:
+                self.stdout.write(f'  templates: {self._top(group["templates"])}')
+            for call_site, count in group['call_sites'].most_common(3):
+                self.stdout.write(f'  at {call_site} ({count})')
+            self.stdout.write(f'  {fingerprint}')
+
+    def _top(self, counter, limit=5):
+        return ', '.join(f'{name} ({count})' for name, count in counter.most_common(limit))
@@ -0,0 +1,243 @@
+import json
+import linecache
+import math
+import os
+import re
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.template.base import Node, Template
+from django.utils import timezone
+
+from .cache import get_dashboard_cache_stats
+
+
+# Upper bounds (seconds) of the request duration histogram buckets
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Frames of the recording machinery itself never count as a call site
+_RECORDER_FILES = {__file__, os.path.join(os.path.dirname(__file__), 'middleware.py')}
+
+_lock = threading.Lock()
+_views = {}
+_started_at = time.time()
+
+
+class QueryRecorder:
+    """
+    connection.execute_wrapper() callable counting the queries of one request,
+    their total time and how many repeat an earlier query with the same SQL
+    and parameters.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duplicates = 0
+        self.duration = 0.0
+        self._seen = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            key = (sql, many, None if many else repr(params))
+            if key in self._seen:
+                self.duplicates += 1
+            else:
+                self._seen.add(key)
+
+
+class SlowQueryRecorder:
+    """
+    connection.execute_wrapper() callable appending every query slower than
+    threshold_ms to a JSON lines file, with its parameters, the view, the
+    template being rendered (if any) and the innermost project stack frames,
+    so the line of code that issued it can be found.
+    """
+
+    _write_lock = threading.Lock()
+
+    def __init__(self, threshold_ms, log_file, request=None):
+        self.threshold = threshold_ms / 1000
+        self.log_file = log_file
+        self.request = request
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            if duration >= self.threshold:
+                self.record(sql, params, many, duration)
+
+    def record(self, sql, params, many, duration):
+        match = getattr(self.request, 'resolver_match', None)
+        frames, template = get_call_site(sys._getframe(2))
+        entry = {
+            'time': timezone.now().isoformat(),
+            'duration_ms': round(duration * 1000, 3),
+            'sql': sql,
+            'params': None if many else params,
+            'many': many,
+            'view': match.view_name if match else None,
+            'path': self.request.path if self.request else None,
+            'template': template,
+            'call_site': frames[0] if frames else None,
+            'stack': frames,
+        }
+        line = json.dumps(entry, default=str) + '\n'
+        with self._write_lock:
+            with open(self.log_file, 'a', encoding='utf-8') as log:
+                log.write(line)
+
+
+def get_call_site(frame, limit=5):
+    """
+    Innermost frames of project code (under BASE_DIR, outside virtualenvs and
+    the metrics modules) as "path:line in function: source" strings, and the name of
+    the template being rendered when the query came from a template.
+    """
+    root = os.path.join(str(settings.BASE_DIR), '')
+    frames = []
+    template = None
+    while frame is not None and len(frames) < limit:
+        filename = frame.f_code.co_filename
+        if template is None and f'django{os.sep}template{os.sep}' in filename:
+            # The innermost node being rendered knows its own (included/extended) template
+            owner = frame.f_locals.get('self')
+            if isinstance(owner, Node) and getattr(owner, 'origin', None):
+                template = owner.origin.template_name
+            elif isinstance(owner, Template):
+                template = owner.name
+        if (
+            filename.startswith(root)
+            and filename not in _RECORDER_FILES
+            and 'site-packages' not in filename
+        ):
+            source = linecache.getline(filename, frame.f_lineno).strip()
+            frames.append(
+                f'{os.path.relpath(filename, root)}:{frame.f_lineno} in {frame.f_code.co_name}: {source}'
+            )
+        frame = frame.f_back
+    return frames, template
+
+
+_FINGERPRINT_RULES = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),           # string literals
+    (re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?\b'), '?'),  # numbers, not digits inside identifiers
+    (re.compile(r'%s'), '?'),                          # placeholders
+    (re.compile(r'\?(?:\s*,\s*\?)+'), '?, ...'),        # IN lists of any length
+    (re.compile(r'\s+'), ' '),
+]
+
+
+def fingerprint_sql(sql):
+    """SQL with literals, placeholders and IN-list lengths normalized, to group queries of one shape"""
+    for pattern, replacement in _FINGERPRINT_RULES:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0
+    rank = max(math.ceil(percent / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def record_request(view, status_code, duration, recorder):
+    """Add one request to the in-process aggregate of its view"""
+    with _lock:
+        stats = _views.get(view)
+        if stats is None:
+            stats = _views[view] = {
+                'requests': 0,
+                'errors': 0,
+                'duration': 0.0,
+                'db_duration': 0.0,
+                'queries': 0,
+                'duplicates': 0,
+                'max_queries': 0,
+                'buckets': [0] * len(LATENCY_BUCKETS),
+            }
+        stats['requests'] += 1
+        if status_code >= 500:
+            stats['errors'] += 1
+        stats['duration'] += duration
+        stats['db_duration'] += recorder.duration
+        stats['queries'] += recorder.count
+        stats['duplicates'] += recorder.duplicates
+        stats['max_queries'] = max(stats['max_queries'], recorder.count)
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if duration <= bound:
+                stats['buckets'][index] += 1
+
+
+def get_request_metrics():
+    """Copy of the per-view aggregate of this process"""
+    with _lock:
+        return {view: dict(stats, buckets=list(stats['buckets'])) for view, stats in _views.items()}
+
+
+def reset_request_metrics():
+    with _lock:
+        _views.clear()
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _metric(lines, name, metric_type, help_text, samples):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} {metric_type}')
+    for labels, value in samples:
+        label_text = ','.join(f'{key}="{_label(val)}"' for key, val in labels)
+        lines.append(f'{name}{{{label_text}}} {value}' if label_text else f'{name} {value}')
+
+
+def render_prometheus():
+    """Request and dashboard cache metrics of this process in the Prometheus text format"""
+    views = sorted(get_request_metrics().items())
+    lines = []
+
+    histogram = []
+    for view, stats in views:
+        for bound, count in zip(LATENCY_BUCKETS, stats['buckets']):
+            histogram.append(((('view', view), ('le', bound)), count))
+        histogram.append(((('view', view), ('le', '+Inf')), stats['requests']))
+    lines.append('# HELP loantracker_request_duration_seconds Wall time of requests by view')
+    lines.append('# TYPE loantracker_request_duration_seconds histogram')
+    for labels, value in histogram:
+        label_text = ','.join(f'{key}="{_label(val)}"' for key, val in labels)
+        lines.append(f'loantracker_request_duration_seconds_bucket{{{label_text}}} {value}')
+    for view, stats in views:
+        lines.append(f'loantracker_request_duration_seconds_sum{{view="{_label(view)}"}} {stats["duration"]:.6f}')
+        lines.append(f'loantracker_request_duration_seconds_count{{view="{_label(view)}"}} {stats["requests"]}')
+
+    _metric(lines, 'loantracker_request_errors_total', 'counter', 'Requests answered with a 5xx status by view',
+            [((('view', view),), stats['errors']) for view, stats in views])
+    _metric(lines, 'loantracker_db_duration_seconds_total', 'counter', 'Time spent in database queries by view',
+            [((('view', view),), f'{stats["db_duration"]:.6f}') for view, stats in views])
+    _metric(lines, 'loantracker_db_queries_total', 'counter', 'Database queries by view',
+            [((('view', view),), stats['queries']) for view, stats in views])
+    _metric(lines, 'loantracker_db_duplicate_queries_total', 'counter',
+            'Queries repeating an earlier query of the same request (same SQL and parameters) by view',
+            [((('view', view),), stats['duplicates']) for view, stats in views])
+    _metric(lines, 'loantracker_db_queries_max', 'gauge', 'Most queries seen in a single request by view',
+            [((('view', view),), stats['max_queries']) for view, stats in views])
+
+    cache_stats = get_dashboard_cache_stats()
+    for name in ('hits', 'misses', 'invalidations'):
+        _metric(lines, f'loantracker_dashboard_cache_{name}_total', 'counter', f'Dashboard cache {name}',
+                [((), cache_stats[name])])
+    _metric(lines, 'loantracker_process_start_time_seconds', 'gauge', 'Start time of this process (Unix time)',
+            [((), f'{_started_at:.3f}')])
+    return '\n'.join(lines) + '\n'
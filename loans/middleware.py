@@ -0,0 +1,91 @@
+import logging
+import time
+from contextlib import ExitStack
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .metrics import QueryRecorder, SlowQueryRecorder, record_request
+
+
+logger = logging.getLogger('loans.metrics')
+
+
+def configure_metrics_log():
+    """Send the per-request lines of loans.metrics to the rotating QUERY_METRICS_LOG_FILE"""
+    log_file = getattr(settings, 'QUERY_METRICS_LOG_FILE', None)
+    if not log_file or logger.handlers:
+        return
+    Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+    handler = RotatingFileHandler(
+        log_file,
+        maxBytes=getattr(settings, 'QUERY_METRICS_LOG_MAX_BYTES', 10 * 1024 * 1024),
+        backupCount=getattr(settings, 'QUERY_METRICS_LOG_BACKUP_COUNT', 5),
+    )
+    handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+class QueryMetricsMiddleware:
+    """
+    Record wall time, DB time, query count and duplicate queries of every
+    request under its view name: one line in the metrics log and the
+    in-process aggregate served at /ops/metrics/. Put it first in MIDDLEWARE
+    so the session and auth queries count too. With QUERY_METRICS_ENABLED
+    off, Django drops the middleware at startup and requests pay nothing.
+    Queries run while a streaming response is consumed are not counted.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        configure_metrics_log()
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        record_request(view, response.status_code, duration, recorder)
+        logger.info(
+            'view=%s method=%s path=%s status=%s wall_ms=%.1f db_ms=%.1f queries=%d duplicates=%d',
+            view, request.method, request.path, response.status_code,
+            duration * 1000, recorder.duration * 1000, recorder.count, recorder.duplicates,
+        )
+        return response
+
+
+class SlowQueryMiddleware:
+    """
+    Append every query of a request slower than SLOW_QUERY_THRESHOLD_MS to
+    SLOW_QUERY_LOG_FILE (JSON lines) with its parameters, view, template and
+    the project code that issued it; summarize with `manage.py slow_queries`.
+    Off (removed at startup) while SLOW_QUERY_THRESHOLD_MS is None.
+    """
+
+    def __init__(self, get_response):
+        self.threshold_ms = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', None)
+        if self.threshold_ms is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.log_file = settings.SLOW_QUERY_LOG_FILE
+        Path(self.log_file).parent.mkdir(parents=True, exist_ok=True)
+
+    def __call__(self, request):
+        recorder = SlowQueryRecorder(self.threshold_ms, self.log_file, request)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            return self.get_response(request)
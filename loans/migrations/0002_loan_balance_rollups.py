@@ -0,0 +1,53 @@
+# Generated by Django 5.2.4 on 2026-10-18 08:41
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def populate_loan_balances(apps, schema_editor):
+    Loan = apps.get_model('loans', 'Loan')
+    Installment = apps.get_model('loans', 'Installment')
+
+    zero = Value(Decimal('0'), output_field=models.DecimalField(max_digits=10, decimal_places=2))
+    installments = Installment.objects.filter(loan=OuterRef('pk')).order_by().values('loan')
+    paid = installments.annotate(total=Sum('amount_paid')).values('total')
+    overdue = installments.filter(
+        due_date__lt=timezone.now().date(),
+        amount_paid__lt=F('amount_due')
+    ).annotate(total=Sum(F('amount_due') - F('amount_paid'))).values('total')
+
+    Loan.objects.update(
+        paid_amount=Coalesce(Subquery(paid), zero),
+        outstanding_amount=F('total_amount') - Coalesce(Subquery(paid), zero),
+        overdue_amount=Coalesce(Subquery(overdue), zero),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loan',
+            name='outstanding_amount',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Total amount still to be repaid', max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='loan',
+            name='overdue_amount',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Unpaid amount of installments past their due date', max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='loan',
+            name='paid_amount',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Total amount paid across all installments', max_digits=10),
+        ),
+        migrations.RunPython(populate_loan_balances, migrations.RunPython.noop),
+    ]
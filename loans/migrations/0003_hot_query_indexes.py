@@ -0,0 +1,49 @@
+# Generated by Django 5.2.4 on 2026-10-18 08:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0002_loan_balance_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='installment',
+            index=models.Index(fields=['status', 'due_date', 'loan'], name='installment_status_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='installment',
+            index=models.Index(fields=['due_date'], name='installment_due_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='installment',
+            index=models.Index(fields=['loan', 'due_date'], name='installment_loan_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='installment',
+            index=models.Index(condition=models.Q(('amount_paid__lt', models.F('amount_due'))), fields=['due_date'], name='installment_unpaid_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['-start_date'], name='loan_start_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['status', '-start_date'], name='loan_status_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['borrower', 'status', '-start_date'], name='loan_borrower_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['-payment_date'], name='payment_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['-created_at'], name='payment_created_idx'),
+        ),
+    ]
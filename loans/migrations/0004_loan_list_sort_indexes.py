@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 08:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0003_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='installment',
+            index=models.Index(condition=models.Q(('amount_paid__lt', models.F('amount_due'))), fields=['loan', 'due_date'], name='installment_loan_unpaid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['-outstanding_amount'], name='loan_outstanding_idx'),
+        ),
+    ]
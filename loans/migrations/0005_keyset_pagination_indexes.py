@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-18 08:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0004_loan_list_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='loan',
+            name='loan_start_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='payment',
+            name='payment_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['-start_date', '-id'], name='loan_start_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['-payment_date', '-id'], name='payment_date_id_idx'),
+        ),
+    ]
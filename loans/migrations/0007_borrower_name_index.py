@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0006_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='borrower',
+            index=models.Index(fields=['name', 'id'], name='borrower_name_id_idx'),
+        ),
+    ]
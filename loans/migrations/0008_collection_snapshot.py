@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:14
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0007_borrower_name_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollectionSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month', unique=True)),
+                ('total_due', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('total_collected', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('installments_count', models.PositiveIntegerField()),
+                ('paid_count', models.PositiveIntegerField()),
+                ('by_method', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['month'],
+            },
+        ),
+    ]
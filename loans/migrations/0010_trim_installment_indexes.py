@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0009_performance_snapshot'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='installment',
+            name='installment_status_due_idx',
+        ),
+        migrations.AlterField(
+            model_name='installment',
+            name='loan',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='installments', to='loans.loan'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:52
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+
+
+def populate_first_unpaid_due_date(apps, schema_editor):
+    Loan = apps.get_model('loans', 'Loan')
+    Installment = apps.get_model('loans', 'Installment')
+
+    first_unpaid = Installment.objects.filter(
+        loan=OuterRef('pk'),
+        amount_paid__lt=F('amount_due')
+    ).order_by('due_date').values('due_date')[:1]
+    Loan.objects.update(first_unpaid_due_date=Subquery(first_unpaid))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0010_trim_installment_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loan',
+            name='first_unpaid_due_date',
+            field=models.DateField(blank=True, editable=False, help_text='Due date of the earliest unpaid installment; in the past when the loan is overdue', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['first_unpaid_due_date', 'id'], name='loan_first_unpaid_idx'),
+        ),
+        migrations.RunPython(populate_first_unpaid_due_date, migrations.RunPython.noop),
+    ]
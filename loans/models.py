@@ -1,9 +1,14 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, Count, F, Min, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.dispatch import Signal
 from django.utils import timezone
 from decimal import Decimal
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from dateutil.relativedelta import relativedelta
+import calendar
 import os
 
 
@@ -12,6 +17,47 @@ def borrower_id_proof_path(instance, filename):
     return f'borrower_documents/{instance.id}/{filename}'
 
 
+class DaysSince(models.Func):
+    """Whole days from a date expression until the given day (negative if after it)"""
+    template = '(%(expressions)s)'
+    arg_joiner = ' - '
+    output_field = models.IntegerField()
+
+    def __init__(self, expression, day, **extra):
+        super().__init__(Value(day, output_field=models.DateField()), expression, **extra)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template='CAST(julianday(%(expressions)s) AS INTEGER)',
+            arg_joiner=') - julianday(',
+            **extra_context
+        )
+
+
+class BorrowerQuerySet(models.QuerySet):
+    """QuerySet with loan summary annotations for borrowers"""
+
+    def with_loan_summary(self):
+        """Annotate active_loans_count and total_outstanding of active loans"""
+        active_loans = Loan.objects.filter(
+            borrower=OuterRef('pk'),
+            status='ACTIVE'
+        ).order_by().values('borrower')
+
+        return self.annotate(
+            active_loans_count=Coalesce(
+                Subquery(active_loans.annotate(count=Count('id')).values('count')),
+                0
+            ),
+            total_outstanding=Coalesce(
+                Subquery(active_loans.annotate(total=Sum('outstanding_amount')).values('total')),
+                Value(Decimal('0')),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2)
+            ),
+        )
+
+
 class Borrower(models.Model):
     """Model for storing borrower information"""
     name = models.CharField(max_length=100)
@@ -26,8 +72,14 @@ class Borrower(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BorrowerQuerySet.as_manager()
+
     class Meta:
         ordering = ['name']
+        indexes = [
+            # Borrower lists by name, keyset-paginated on (name, id)
+            models.Index(fields=['name', 'id'], name='borrower_name_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.phone}"
@@ -37,10 +89,57 @@ class Borrower(models.Model):
 
     def get_total_outstanding(self):
         """Calculate total outstanding amount for all active loans"""
-        total = Decimal('0')
-        for loan in self.get_active_loans():
-            total += loan.get_outstanding_amount()
-        return total
+        return self.get_active_loans().aggregate(
+            total=Sum('outstanding_amount')
+        )['total'] or Decimal('0')
+
+
+class LoanQuerySet(models.QuerySet):
+    """QuerySet with set-based maintenance helpers for loans"""
+
+    def refresh_balances(self, today=None):
+        """Recompute paid/outstanding/overdue/first unpaid rollups from installments in one UPDATE"""
+        today = today or timezone.now().date()
+        zero = Value(Decimal('0'), output_field=models.DecimalField(max_digits=10, decimal_places=2))
+        installments = Installment.objects.filter(loan=OuterRef('pk')).order_by().values('loan')
+
+        paid = installments.annotate(total=Sum('amount_paid')).values('total')
+        overdue = installments.filter(
+            due_date__lt=today,
+            amount_paid__lt=F('amount_due')
+        ).annotate(total=Sum(F('amount_due') - F('amount_paid'))).values('total')
+        first_unpaid = Installment.objects.filter(
+            loan=OuterRef('pk'),
+            amount_paid__lt=F('amount_due')
+        ).order_by('due_date').values('due_date')[:1]
+
+        return self.update(
+            paid_amount=Coalesce(Subquery(paid), zero),
+            outstanding_amount=F('total_amount') - Coalesce(Subquery(paid), zero),
+            overdue_amount=Coalesce(Subquery(overdue), zero),
+            first_unpaid_due_date=Subquery(first_unpaid),
+        )
+
+    def close_paid_off(self):
+        """Close every active loan in the queryset whose stored outstanding amount is settled"""
+        return self.filter(status='ACTIVE', outstanding_amount__lte=0).update(
+            status='CLOSED', updated_at=timezone.now()
+        )
+
+    def with_schedule_summary(self, today=None):
+        """Annotate next_due_date, oldest_overdue_date and max_days_overdue"""
+        today = today or timezone.now().date()
+        unpaid = Installment.objects.filter(
+            loan=OuterRef('pk'),
+            amount_paid__lt=F('amount_due')
+        ).order_by('due_date').values('due_date')
+
+        return self.annotate(
+            next_due_date=Subquery(unpaid.filter(due_date__gte=today)[:1]),
+            oldest_overdue_date=Subquery(unpaid.filter(due_date__lt=today)[:1]),
+        ).annotate(
+            max_days_overdue=Coalesce(DaysSince('oldest_overdue_date', today), 0)
+        )
 
 
 class Loan(models.Model):
@@ -83,24 +182,103 @@ class Loan(models.Model):
         help_text="Monthly installment amount"
     )
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='ACTIVE')
+
+    # Denormalized rollups of the installments, kept in sync by refresh_balances()
+    paid_amount = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text="Total amount paid across all installments"
+    )
+    outstanding_amount = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text="Total amount still to be repaid"
+    )
+    overdue_amount = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text="Unpaid amount of installments past their due date"
+    )
+    first_unpaid_due_date = models.DateField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Due date of the earliest unpaid installment; in the past when the loan is overdue"
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    ROLLUP_FIELDS = ('paid_amount', 'outstanding_amount', 'overdue_amount', 'first_unpaid_due_date')
+
+    objects = LoanQuerySet.as_manager()
+
     class Meta:
         ordering = ['-start_date']
+        indexes = [
+            # Loan list, newest first, with and without a status filter
+            models.Index(fields=['-start_date', '-id'], name='loan_start_date_id_idx'),
+            models.Index(fields=['status', '-start_date'], name='loan_status_start_idx'),
+            # Loan list sorted by outstanding amount, and most overdue first
+            models.Index(fields=['-outstanding_amount'], name='loan_outstanding_idx'),
+            models.Index(fields=['first_unpaid_due_date', 'id'], name='loan_first_unpaid_idx'),
+            # Active loans of a borrower, newest first
+            models.Index(fields=['borrower', 'status', '-start_date'], name='loan_borrower_status_idx'),
+        ]
 
     def __str__(self):
         return f"{self.borrower.name} - ₹{self.amount} ({self.status})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the schedule terms as loaded, so signals can invalidate the months an edit moves away from"""
+        instance = super().from_db(db, field_names, values)
+        loaded = dict(zip(field_names, values))
+        instance._loaded_start_date = loaded.get('start_date')
+        instance._loaded_tenure_months = loaded.get('tenure_months')
+        return instance
+
     def save(self, *args, **kwargs):
-        """Override save to calculate total_amount and monthly_installment"""
+        """
+        Override save to calculate total_amount and monthly_installment.
+        Only a new loan writes its rollups: updates leave them out, so an
+        instance loaded before a payment cannot overwrite them. Call
+        refresh_balances() after changing the totals of a saved loan.
+        """
         if not self.total_amount:
             self.calculate_totals()
-        super().save(*args, **kwargs)
-        
-        # Create installments if this is a new loan
-        if not self.installments.exists():
-            self.generate_installments()
+
+        # Build the schedule of a new loan up front so its balances are
+        # written by the same INSERT as the loan itself
+        schedule = None
+        if self._state.adding:
+            schedule = self.build_installments()
+            self.overdue_amount = sum(
+                (installment.amount_due for installment in schedule if installment.status == 'OVERDUE'),
+                Decimal('0')
+            )
+            self.outstanding_amount = self.total_amount - self.paid_amount
+            self.first_unpaid_due_date = schedule[0].due_date if schedule else None
+        elif kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.ROLLUP_FIELDS
+            ]
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            
+            # Create installments if this is a new loan
+            if schedule is not None:
+                Installment.objects.bulk_create(schedule)
+        self._loaded_start_date = self.start_date
+        self._loaded_tenure_months = self.tenure_months
 
     def calculate_totals(self):
         """Calculate total amount and monthly installment"""
@@ -113,54 +291,102 @@ class Loan(models.Model):
         self.total_amount = (principal + interest).quantize(Decimal('1'))  # Round to whole number
         self.monthly_installment = (self.total_amount / self.tenure_months).quantize(Decimal('1'))  # Round to whole number
 
-    def generate_installments(self):
-        """Generate monthly installment records starting from next month"""
-        # Start from next month after loan disbursement
-        current_date = self.start_date + relativedelta(months=1)
-        
-        for i in range(1, self.tenure_months + 1):
-            # Calculate due date for this installment
-            due_date = current_date.replace(day=min(self.installment_day, 
-                                                   self._get_last_day_of_month(current_date)))
-            
-            Installment.objects.create(
+    def get_due_dates(self):
+        """Calculate the due date of every installment, starting from next month"""
+        return self.schedule_due_dates(self.start_date, self.installment_day, self.tenure_months)
+
+    @staticmethod
+    def schedule_due_dates(start_date, installment_day, tenure_months):
+        """Due dates of a loan with these terms, for callers without a Loan instance (sample data)"""
+        due_dates = []
+        for i in range(1, tenure_months + 1):
+            # Start from next month after loan disbursement; installment_day
+            # is moved back to the last day of shorter months
+            year, month = divmod(start_date.month - 1 + i, 12)
+            year += start_date.year
+            month += 1
+            due_dates.append(date(year, month, min(installment_day, calendar.monthrange(year, month)[1])))
+        return due_dates
+
+    def build_installments(self, today=None):
+        """Build (unsaved) monthly installment records for this loan"""
+        today = today or timezone.now().date()
+        installments = []
+        for number, due_date in enumerate(self.get_due_dates(), start=1):
+            installment = Installment(
                 loan=self,
-                installment_number=i,
+                installment_number=number,
                 due_date=due_date,
                 amount_due=self.monthly_installment
             )
-            
-            # Move to next month
-            current_date = current_date + relativedelta(months=1)
+            installment.update_status(today)
+            installments.append(installment)
+        return installments
 
-    def _get_last_day_of_month(self, date):
-        """Get the last day of the month for the given date"""
-        next_month = date.replace(day=28) + timedelta(days=4)
-        return (next_month - timedelta(days=next_month.day)).day
+    def generate_installments(self):
+        """Generate monthly installment records starting from next month"""
+        with transaction.atomic():
+            Installment.objects.bulk_create(self.build_installments())
+            self.refresh_balances()
+
+    @classmethod
+    def bulk_generate_installments(cls, loans, batch_size=1000):
+        """Generate installment schedules for many saved loans in one pass"""
+        today = timezone.now().date()
+        loans = list(loans)
+        schedule = []
+        for loan in loans:
+            schedule.extend(loan.build_installments(today))
+
+        with transaction.atomic():
+            Installment.objects.bulk_create(schedule, batch_size=batch_size)
+            loan_ids = [loan.pk for loan in loans]
+            for start in range(0, len(loan_ids), batch_size):
+                cls.objects.filter(pk__in=loan_ids[start:start + batch_size]).refresh_balances()
+
+        return len(schedule)
+
+    def refresh_balances(self):
+        """Recompute the paid/outstanding/overdue/first unpaid rollups from this loan's installments"""
+        today = timezone.now().date()
+        unpaid = Q(amount_paid__lt=F('amount_due'))
+        totals = self.installments.aggregate(
+            paid=Sum('amount_paid'),
+            overdue=Sum(
+                F('amount_due') - F('amount_paid'),
+                filter=Q(due_date__lt=today) & unpaid
+            ),
+            first_unpaid=Min('due_date', filter=unpaid)
+        )
+        self.paid_amount = totals['paid'] or Decimal('0')
+        self.overdue_amount = totals['overdue'] or Decimal('0')
+        self.outstanding_amount = self.total_amount - self.paid_amount
+        self.first_unpaid_due_date = totals['first_unpaid']
+
+        Loan.objects.filter(pk=self.pk).update(
+            paid_amount=self.paid_amount,
+            outstanding_amount=self.outstanding_amount,
+            overdue_amount=self.overdue_amount,
+            first_unpaid_due_date=self.first_unpaid_due_date
+        )
 
     def get_outstanding_amount(self):
-        """Calculate remaining amount to be paid"""
-        paid_amount = self.installments.aggregate(
-            total=models.Sum('amount_paid')
-        )['total'] or Decimal('0')
-        return self.total_amount - paid_amount
+        """Get remaining amount to be paid"""
+        return self.outstanding_amount
 
     def get_paid_amount(self):
-        """Calculate total amount paid so far"""
-        return self.installments.aggregate(
-            total=models.Sum('amount_paid')
-        )['total'] or Decimal('0')
+        """Get total amount paid so far"""
+        return self.paid_amount
 
     def get_overdue_installments(self):
         """Get overdue installments"""
-        return self.installments.filter(
-            status__in=['PENDING', 'PARTIAL'],
-            due_date__lt=timezone.now().date()
-        )
+        return self.installments.overdue()
 
     def get_next_installment(self):
-        """Get the next pending installment"""
-        return self.installments.filter(status='PENDING').first()
+        """Get the next unpaid installment that is not yet due"""
+        return self.installments.unpaid().filter(
+            due_date__gte=timezone.now().date()
+        ).order_by('due_date').first()
 
     def is_fully_paid(self):
         """Check if loan is fully paid"""
@@ -175,6 +401,68 @@ class Loan(models.Model):
         return False
 
 
+class InstallmentQuerySet(models.QuerySet):
+    """QuerySet with derived-status and set-based maintenance helpers for installments"""
+
+    def unpaid(self):
+        """Installments with something left to pay (matches the partial unpaid indexes)"""
+        return self.filter(amount_paid__lt=F('amount_due'))
+
+    def overdue(self, today=None):
+        """Unpaid installments past their due date, whatever their stored status says"""
+        today = today or timezone.now().date()
+        return self.unpaid().filter(due_date__lt=today)
+
+    def with_effective_status(self, today=None):
+        """
+        Annotate effective_status and overdue_days, derived in SQL from the due
+        date and amounts with the rules of Installment.update_status(), so they
+        are right even when the stored status is stale.
+        """
+        today = today or timezone.now().date()
+        past_due = Q(due_date__lt=today)
+        return self.annotate(
+            effective_status=Case(
+                When(amount_paid__gte=F('amount_due'), then=Value('PAID')),
+                When(amount_paid__gt=0, then=Value('PARTIAL')),
+                When(past_due, then=Value('OVERDUE')),
+                default=Value('PENDING'),
+                output_field=models.CharField(),
+            ),
+            overdue_days=Case(
+                When(past_due & Q(amount_paid__lt=F('amount_due')), then=DaysSince('due_date', today)),
+                default=Value(0),
+                output_field=models.IntegerField(),
+            ),
+        )
+
+    def refresh_amount_paid(self):
+        """Recompute amount_paid from the payment rows in one UPDATE"""
+        zero = Value(Decimal('0'), output_field=models.DecimalField(max_digits=10, decimal_places=2))
+        paid = Payment.objects.filter(
+            installment=OuterRef('pk')
+        ).order_by().values('installment').annotate(total=Sum('amount')).values('total')
+        return self.update(amount_paid=Coalesce(Subquery(paid), zero), updated_at=timezone.now())
+
+    def refresh_statuses(self, today=None):
+        """Set-based Installment.update_status(): one UPDATE for every installment in the queryset"""
+        today = today or timezone.now().date()
+        fully_paid = Q(amount_paid__gte=F('amount_due'))
+        return self.update(
+            status=Case(
+                When(fully_paid, then=Value('PAID')),
+                When(amount_paid__gt=0, then=Value('PARTIAL')),
+                When(due_date__lt=today, then=Value('OVERDUE')),
+                default=Value('PENDING'),
+            ),
+            payment_date=Case(
+                When(fully_paid & Q(payment_date__isnull=True), then=Value(today)),
+                default=F('payment_date'),
+            ),
+            updated_at=timezone.now(),
+        )
+
+
 class Installment(models.Model):
     """Model for storing installment information"""
     STATUS_CHOICES = [
@@ -184,7 +472,8 @@ class Installment(models.Model):
         ('OVERDUE', 'Overdue'),
     ]
 
-    loan = models.ForeignKey(Loan, on_delete=models.CASCADE, related_name='installments')
+    # No index of its own: (loan, installment_number) and (loan, due_date) start with it
+    loan = models.ForeignKey(Loan, on_delete=models.CASCADE, related_name='installments', db_index=False)
     installment_number = models.IntegerField()
     due_date = models.DateField()
     amount_due = models.DecimalField(max_digits=10, decimal_places=2)
@@ -195,27 +484,57 @@ class Installment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = InstallmentQuerySet.as_manager()
+
     class Meta:
         ordering = ['due_date']
         unique_together = ['loan', 'installment_number']
+        # Every index slows the bulk inserts of schedules and sample data;
+        # statuses are derived from the amounts, so none is keyed on status
+        indexes = [
+            # Month windows (dashboard, collection report) and the schedule of a loan
+            models.Index(fields=['due_date'], name='installment_due_date_idx'),
+            models.Index(fields=['loan', 'due_date'], name='installment_loan_due_idx'),
+            # Unpaid installments only; stays small as the book matures. The
+            # condition has no parameters so SQLite can match it against
+            # queries filtering on amount_paid__lt=F('amount_due')
+            models.Index(
+                fields=['due_date'],
+                condition=Q(amount_paid__lt=F('amount_due')),
+                name='installment_unpaid_due_idx'
+            ),
+            # Next due / oldest overdue installment of a loan
+            models.Index(
+                fields=['loan', 'due_date'],
+                condition=Q(amount_paid__lt=F('amount_due')),
+                name='installment_loan_unpaid_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.loan.borrower.name} - Installment {self.installment_number}"
 
     def save(self, *args, **kwargs):
         """Override save to update status based on payment"""
+        self.update_status()
+        
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.loan.refresh_balances()
+
+    def update_status(self, today=None):
+        """Update status (and payment date once fully paid) based on payment"""
+        today = today or timezone.now().date()
         if self.amount_paid >= self.amount_due:
             self.status = 'PAID'
             if not self.payment_date:
-                self.payment_date = timezone.now().date()
+                self.payment_date = today
         elif self.amount_paid > 0:
             self.status = 'PARTIAL'
-        elif self.due_date < timezone.now().date():
+        elif self.due_date < today:
             self.status = 'OVERDUE'
         else:
             self.status = 'PENDING'
-        
-        super().save(*args, **kwargs)
 
     def get_remaining_amount(self):
         """Get remaining amount to be paid for this installment"""
@@ -223,15 +542,48 @@ class Installment(models.Model):
 
     def is_overdue(self):
         """Check if installment is overdue"""
-        return self.due_date < timezone.now().date() and self.status != 'PAID'
+        return self.days_overdue() > 0
 
     def days_overdue(self):
-        """Calculate days overdue"""
-        if self.is_overdue():
-            return (timezone.now().date() - self.due_date).days
+        """Calculate days overdue; uses the with_effective_status() annotation when present"""
+        if hasattr(self, 'overdue_days'):
+            return self.overdue_days
+        today = timezone.now().date()
+        if self.due_date < today and self.amount_paid < self.amount_due:
+            return (today - self.due_date).days
         return 0
 
 
+# Sent by PaymentQuerySet.delete() with payments=[(installment id, payment
+# date, due date) of every deleted payment]; loans/signals.py invalidates the
+# cached and persisted figures they fed
+payments_deleted = Signal()
+
+
+class PaymentQuerySet(models.QuerySet):
+    """QuerySet whose delete() keeps installment and loan balances in step"""
+
+    def delete(self):
+        """
+        Delete the payments, recompute amount_paid and statuses of their
+        installments and the rollups of their loans in set-based UPDATEs,
+        then send payments_deleted. There are no post_delete receivers for
+        payments: they would make Django load every payment of a deleted
+        loan one by one instead of deleting them in one statement.
+        """
+        deleted = list(self.order_by().values_list('installment_id', 'payment_date', 'installment__due_date'))
+        with transaction.atomic():
+            result = super().delete()
+            installments = Installment.objects.filter(pk__in={installment_id for installment_id, _, _ in deleted})
+            installments.refresh_amount_paid()
+            installments.refresh_statuses()
+            Loan.objects.filter(pk__in=installments.values('loan_id')).refresh_balances()
+        payments_deleted.send(sender=Payment, payments=deleted)
+        return result
+
+    delete.queryset_only = True
+
+
 class Payment(models.Model):
     """Model for recording payment history"""
     installment = models.ForeignKey(Installment, on_delete=models.CASCADE, related_name='payments')
@@ -250,20 +602,91 @@ class Payment(models.Model):
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = PaymentQuerySet.as_manager()
+
     class Meta:
         ordering = ['-payment_date']
+        indexes = [
+            models.Index(fields=['-payment_date', '-id'], name='payment_date_id_idx'),
+            models.Index(fields=['-created_at'], name='payment_created_idx'),
+        ]
 
     def __str__(self):
         return f"₹{self.amount} - {self.installment.loan.borrower.name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the payment date as loaded, so signals can invalidate the month an edit moves it away from"""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_payment_date = dict(zip(field_names, values)).get('payment_date')
+        return instance
+
     def save(self, *args, **kwargs):
-        """Override save to update installment"""
-        super().save(*args, **kwargs)
-        
-        # Update installment amount_paid
-        total_paid = self.installment.payments.aggregate(
-            total=models.Sum('amount')
-        )['total'] or Decimal('0')
-        
-        self.installment.amount_paid = total_paid
-        self.installment.save()
+        """Override save to update installment and loan balances atomically"""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            
+            # Update installment amount_paid
+            total_paid = self.installment.payments.aggregate(
+                total=models.Sum('amount')
+            )['total'] or Decimal('0')
+            
+            self.installment.amount_paid = total_paid
+            self.installment.save()
+        self._loaded_payment_date = self.payment_date
+
+    def delete(self, *args, **kwargs):
+        """Override delete to update installment and loan balances, like save()"""
+        return Payment.objects.filter(pk=self.pk).delete()
+
+
+class Checkpoint(models.Model):
+    """Progress marker of a resumable batch job (import position, watermark, ...)"""
+    name = models.CharField(max_length=100, unique=True)
+    position = models.CharField(max_length=100)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.position}"
+
+    @classmethod
+    def get(cls, name, default=None):
+        """Stored position of the job, or default if it never ran"""
+        return cls.objects.filter(name=name).values_list('position', flat=True).first() or default
+
+    @classmethod
+    def set(cls, name, position):
+        """Record the job's position; call inside the transaction doing the work"""
+        cls.objects.update_or_create(name=name, defaults={'position': str(position)})
+
+
+class CollectionSnapshot(models.Model):
+    """Collection figures of a calendar month that has ended, persisted by the collection report"""
+    month = models.DateField(unique=True, help_text="First day of the month")
+    total_due = models.DecimalField(max_digits=14, decimal_places=2)
+    total_collected = models.DecimalField(max_digits=14, decimal_places=2)
+    installments_count = models.PositiveIntegerField()
+    paid_count = models.PositiveIntegerField()
+    # {payment_method: amount as a string}, for payments against the month's installments
+    by_method = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['month']
+
+    def __str__(self):
+        return f"{self.month:%b %Y}: ₹{self.total_collected} of ₹{self.total_due}"
+
+
+class PerformanceSnapshot(models.Model):
+    """Disbursed and collected totals of a calendar month that has ended, persisted by the performance chart"""
+    month = models.DateField(unique=True, help_text="First day of the month")
+    disbursed = models.DecimalField(max_digits=14, decimal_places=2)
+    collected = models.DecimalField(max_digits=14, decimal_places=2)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['month']
+
+    def __str__(self):
+        return f"{self.month:%b %Y}: ₹{self.disbursed} disbursed, ₹{self.collected} collected"
@@ -0,0 +1,166 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+def encode_cursor(values, reverse=False):
+    """Opaque URL-safe token for the sort key of a boundary row"""
+    payload = {
+        'v': [value.isoformat() if isinstance(value, (date, datetime)) else
+              str(value) if isinstance(value, Decimal) else value
+              for value in values],
+        'r': reverse,
+    }
+    data = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Inverse of encode_cursor(); returns (values, reverse) or None for a bad token"""
+    try:
+        data = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(data)
+        return list(payload['v']), bool(payload['r'])
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        return None
+
+
+def approximate_count(queryset, limit=1000):
+    """
+    Count rows but stop after limit + 1, so the database never walks more
+    than that many index entries. Returns (count, is_capped).
+    """
+    count = queryset.order_by().values('pk')[:limit + 1].count()
+    return min(count, limit), count > limit
+
+
+class CursorPage:
+    """One page of a CursorPaginator, quacking enough like Django's Page for templates"""
+
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Keyset pagination over a fixed ordering such as ('-payment_date', '-id').
+
+    Each page is fetched with a WHERE on the sort key of the previous page's
+    boundary row instead of an OFFSET, so page 1,000 costs the same as page 1
+    as long as an index matches the ordering. The last field must be unique.
+    """
+
+    def __init__(self, queryset, per_page, ordering, count_limit=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = list(ordering)
+        self.fields = [field.lstrip('-') for field in self.ordering]
+        self.count_limit = count_limit
+        self._count = None
+
+    @property
+    def count(self):
+        """Approximate total, capped at count_limit; None when counting is off"""
+        if self.count_limit is None:
+            return None
+        if self._count is None:
+            self._count = approximate_count(self.queryset, self.count_limit)
+        return self._count[0]
+
+    @property
+    def count_is_capped(self):
+        return self.count is not None and self._count[1]
+
+    def _seek_filter(self, values, reverse):
+        """WHERE clause selecting rows after (or, reversed, before) the given key"""
+        lookups = [
+            'gt' if ordering.startswith('-') == reverse else 'lt'
+            for ordering in self.ordering
+        ]
+        # (a, b) after (x, y) means a > x OR (a = x AND b > y), per direction
+        condition = Q()
+        for position, field in enumerate(self.fields):
+            equal = dict(zip(self.fields[:position], values))
+            condition |= Q(**equal, **{f'{field}__{lookups[position]}': values[position]})
+        # Redundant bound on the leading column so the planner can seek the
+        # index to the cursor instead of scanning it from the start
+        return Q(**{f'{self.fields[0]}__{lookups[0]}e': values[0]}) & condition
+
+    def _parse_key(self, values):
+        """Typed sort key from a decoded cursor, or None if it does not fit this ordering"""
+        # Sort keys are never NULL, and a NULL cannot be compared against
+        if len(values) != len(self.fields) or None in values:
+            return None
+        try:
+            return [
+                self.queryset.model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except (ValidationError, TypeError):
+            return None
+
+    def _key(self, obj):
+        # values() querysets (e.g. grouped rows) yield dicts rather than instances
+        if isinstance(obj, dict):
+            return [obj[field] for field in self.fields]
+        return [getattr(obj, field) for field in self.fields]
+
+    def get_page(self, cursor=None):
+        """Page following cursor; a missing or malformed cursor gives the first page"""
+        decoded = decode_cursor(cursor) if cursor else None
+        values, reverse = decoded or (None, False)
+        if values is not None:
+            values = self._parse_key(values)
+        if values is None:
+            reverse = False
+
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self._seek_filter(values, reverse))
+        if reverse:
+            ordering = [field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering]
+        else:
+            ordering = self.ordering
+        rows = list(queryset.order_by(*ordering)[:self.per_page + 1])
+
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+            # Walking backwards there is always a next page: the one we came from
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_cursor(self._key(rows[-1]))
+        if rows and has_previous:
+            previous_cursor = encode_cursor(self._key(rows[0]), reverse=True)
+        return CursorPage(rows, self, next_cursor, previous_cursor)
@@ -0,0 +1,326 @@
+import random
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from functools import lru_cache
+
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .cache import invalidate_dashboard_cache
+from .models import Borrower, Loan, Installment, Payment
+from .utils import invalidate_collection_months, invalidate_performance_month
+
+
+SAMPLE_BATCH_SIZE = 2000  # borrowers per transaction
+SAMPLE_HISTORY_DAYS = 5 * 365
+LOANS_PER_BORROWER = 1.6
+DEFAULT_AFTER_DAYS = 90
+
+FIRST_NAMES = [
+    'Rajesh', 'Priya', 'Amit', 'Sunita', 'Vikram', 'Anjali', 'Suresh', 'Kavita',
+    'Ravi', 'Meera', 'Arun', 'Deepa', 'Sanjay', 'Rekha', 'Vinod', 'Pooja'
+]
+LAST_NAMES = [
+    'Sharma', 'Patel', 'Singh', 'Kumar', 'Gupta', 'Yadav', 'Joshi', 'Verma',
+    'Agarwal', 'Mishra', 'Tiwari', 'Pandey', 'Rana', 'Chauhan', 'Jain', 'Shah'
+]
+STREETS = ['MG Road', 'Gandhi Nagar', 'Station Road', 'Market Street']
+
+# (value, weight) choices of the loan terms
+LOAN_AMOUNTS = [(25000, 10), (50000, 25), (75000, 20), (100000, 20), (150000, 12), (200000, 8), (300000, 5)]
+INTEREST_RATES = [(12, 5), (18, 20), (20, 20), (24, 30), (28, 15), (30, 10)]
+TENURES = [(6, 10), (9, 8), (12, 30), (18, 17), (24, 20), (36, 10), (48, 3), (60, 2)]
+PAYMENT_METHODS = [('CASH', 50), ('BANK', 25), ('ONLINE', 20), ('CHECK', 5)]
+
+# How the borrower of a loan pays, with the share of loans behaving that way:
+#   prompt   pays every installment within a few days of its due date
+#   late     pays every installment, one to eight weeks late
+#   partial  often pays part of an installment first and the rest later, or never
+#   prepaid  settles the whole loan at once partway through the tenure
+#   default  pays a few installments and stops; DEFAULTED once 90 days overdue
+REPAYMENT_PROFILES = [('prompt', 55), ('late', 18), ('partial', 10), ('prepaid', 7), ('default', 10)]
+
+
+def _weighted(choices):
+    values, weights = zip(*choices)
+    return list(values), list(weights)
+
+
+@lru_cache(maxsize=None)
+def _loan_totals(amount, interest_rate, tenure_months):
+    """(total_amount, monthly_installment) computed by Loan.calculate_totals()"""
+    loan = Loan(amount=Decimal(amount), interest_rate=Decimal(interest_rate), tenure_months=tenure_months)
+    loan.calculate_totals()
+    return loan.total_amount, loan.monthly_installment
+
+
+class PortfolioGenerator:
+    """
+    Seeded generator of a realistic portfolio: borrowers with one to several
+    loans started over the last five years, their installment schedules and
+    the payments against them, following REPAYMENT_PROFILES. The same
+    arguments, today included, always produce the same rows, and balances,
+    statuses and payment dates are consistent with what the app itself
+    would store.
+    """
+
+    BORROWER_FIELDS = ['id', 'name', 'phone', 'email', 'address', 'id_proof', 'created_at', 'updated_at']
+    LOAN_FIELDS = [
+        'id', 'borrower', 'amount', 'interest_rate', 'tenure_months', 'start_date', 'installment_day',
+        'total_amount', 'monthly_installment', 'status', 'paid_amount', 'outstanding_amount',
+        'overdue_amount', 'first_unpaid_due_date', 'created_at', 'updated_at',
+    ]
+    INSTALLMENT_FIELDS = [
+        'id', 'loan', 'installment_number', 'due_date', 'amount_due', 'amount_paid', 'payment_date',
+        'status', 'notes', 'created_at', 'updated_at',
+    ]
+    PAYMENT_FIELDS = ['id', 'installment', 'amount', 'payment_date', 'payment_method', 'notes', 'created_at']
+
+    def __init__(self, borrowers, loans=None, seed=42, today=None, history_days=SAMPLE_HISTORY_DAYS):
+        self.borrowers = borrowers
+        self.loans = round(borrowers * LOANS_PER_BORROWER) if loans is None else loans
+        self.seed = seed
+        self.today = today or timezone.now().date()
+        self.history_days = history_days
+        self.rng = random.Random(seed)
+        self.now = timezone.now()
+        self.counts = {'borrowers': 0, 'loans': 0, 'installments': 0, 'payments': 0}
+        self.first_start_date = None
+        self._adapters = {}
+
+        self._amounts = _weighted(LOAN_AMOUNTS)
+        self._rates = _weighted(INTEREST_RATES)
+        self._tenures = _weighted(TENURES)
+        self._methods = _weighted(PAYMENT_METHODS)
+        self._profiles = _weighted(REPAYMENT_PROFILES)
+
+    def loans_per_borrower(self):
+        """Number of loans of each borrower: one each while they last, the rest spread at random"""
+        counts = [1] * min(self.loans, self.borrowers) + [0] * max(self.borrowers - self.loans, 0)
+        for _ in range(self.loans - self.borrowers):
+            counts[self.rng.randrange(self.borrowers)] += 1
+        return counts
+
+    def generate(self, batch_size=SAMPLE_BATCH_SIZE, progress=None):
+        """
+        Insert the portfolio in one transaction per batch_size borrowers;
+        progress is called with the running counts after every commit.
+        Returns the counts of rows created.
+        """
+        loan_counts = self.loans_per_borrower()
+        self.next_ids = {
+            model: (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+            for model in (Borrower, Loan, Installment, Payment)
+        }
+
+        for start in range(0, self.borrowers, batch_size):
+            with transaction.atomic():
+                self.generate_batch(loan_counts[start:start + batch_size])
+            if progress:
+                progress(dict(self.counts))
+
+        # Rows were inserted with explicit ids; move the sequences past them
+        sequence_sql = connection.ops.sequence_reset_sql(no_style(), [Borrower, Loan, Installment, Payment])
+        if sequence_sql:
+            with connection.cursor() as cursor:
+                for sql in sequence_sql:
+                    cursor.execute(sql)
+
+        # Rows were written without model signals
+        invalidate_dashboard_cache()
+        if self.first_start_date:
+            invalidate_collection_months(self.first_start_date, self.today)
+            invalidate_performance_month(self.first_start_date, self.today)
+        return self.counts
+
+    def _adapter(self, field):
+        """
+        Memoized function turning a Python value into the database value of
+        field, or None if none is needed; dates, amounts and timestamps
+        repeat a lot, and adapting them dominates the insert otherwise.
+        """
+        if field not in self._adapters:
+            ops = connection.ops
+            if isinstance(field, models.DateTimeField):
+                adapt = ops.adapt_datetimefield_value
+            elif isinstance(field, models.DateField):
+                adapt = ops.adapt_datefield_value
+            elif isinstance(field, models.DecimalField):
+                def adapt(value):
+                    return ops.adapt_decimalfield_value(value, field.max_digits, field.decimal_places)
+            else:
+                adapt = None
+            self._adapters[field] = adapt and lru_cache(maxsize=2 ** 16)(adapt)
+        return self._adapters[field]
+
+    def _insert(self, model, field_names, rows):
+        """
+        INSERT rows (tuples in field_names order, primary keys included) with
+        one executemany(); skips the per-object work of bulk_create(), which
+        dominates at millions of rows.
+        """
+        if not rows:
+            return
+        fields = [model._meta.get_field(name) for name in field_names]
+        adapters = [(index, adapt) for index, adapt in enumerate(map(self._adapter, fields)) if adapt]
+        prepared = []
+        for row in rows:
+            row = list(row)
+            for index, adapt in adapters:
+                if row[index] is not None:
+                    row[index] = adapt(row[index])
+            prepared.append(row)
+
+        quote = connection.ops.quote_name
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote(model._meta.db_table),
+            ', '.join(quote(field.column) for field in fields),
+            ', '.join(['%s'] * len(fields)),
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, prepared)
+
+    def _next_id(self, model):
+        pk = self.next_ids[model]
+        self.next_ids[model] += 1
+        return pk
+
+    def generate_batch(self, loan_counts):
+        rng = self.rng
+        borrowers, loans, installments, payments = [], [], [], []
+
+        for loan_count in loan_counts:
+            borrower_id = self._next_id(Borrower)
+            first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            email = f'{first_name}.{last_name}{borrower_id}@example.com'.lower() if rng.random() < 0.6 else None
+            borrowers.append((
+                borrower_id,
+                f'{first_name} {last_name}',
+                f'9{borrower_id:09d}'[-10:],
+                email,
+                f'House No. {rng.randint(1, 999)}, {rng.choice(STREETS)}, Jaipur',
+                None,
+                self.now,
+                self.now,
+            ))
+            for _ in range(loan_count):
+                self.generate_loan(borrower_id, loans, installments, payments)
+
+        self._insert(Borrower, self.BORROWER_FIELDS, borrowers)
+        self._insert(Loan, self.LOAN_FIELDS, loans)
+        self._insert(Installment, self.INSTALLMENT_FIELDS, installments)
+        self._insert(Payment, self.PAYMENT_FIELDS, payments)
+
+        self.counts['borrowers'] += len(borrowers)
+        self.counts['loans'] += len(loans)
+        self.counts['installments'] += len(installments)
+        self.counts['payments'] += len(payments)
+
+    def _payment_time(self, day):
+        rng = self.rng
+        return datetime.combine(day, time(rng.randint(3, 13), rng.randint(0, 59)), tzinfo=dt_timezone.utc)
+
+    def _pay(self, payments, installment_id, amount, day):
+        payments.append((
+            self._next_id(Payment),
+            installment_id,
+            amount,
+            day,
+            self.rng.choices(*self._methods)[0],
+            '',
+            self._payment_time(day),
+        ))
+
+    def generate_loan(self, borrower_id, loans, installments, payments):
+        rng, today = self.rng, self.today
+        amount = rng.choices(*self._amounts)[0]
+        interest_rate = rng.choices(*self._rates)[0]
+        tenure = rng.choices(*self._tenures)[0]
+        total_amount, emi = _loan_totals(amount, interest_rate, tenure)
+        # Skewed towards recent loans, as in a growing book
+        start_date = today - timedelta(days=int(rng.triangular(0, self.history_days, 0)))
+        installment_day = rng.randint(1, 28)
+        profile = rng.choices(*self._profiles)[0]
+        if self.first_start_date is None or start_date < self.first_start_date:
+            self.first_start_date = start_date
+
+        loan_id = self._next_id(Loan)
+        due_dates = Loan.schedule_due_dates(start_date, installment_day, tenure)
+        stop_after = rng.randint(0, tenure // 2) if profile == 'default' else tenure
+        settle_date = None
+        if profile == 'prepaid':
+            settle_date = due_dates[rng.randint(tenure // 3, tenure - 1)] - timedelta(days=rng.randint(1, 20))
+
+        paid_total = overdue_total = Decimal('0')
+        first_unpaid = oldest_unpaid = None
+        for number, due_date in enumerate(due_dates, start=1):
+            installment_id = self._next_id(Installment)
+            paid, payment_date = Decimal('0'), None
+
+            if settle_date and settle_date <= today and due_date > settle_date:
+                # Everything still open is paid off on the settlement date
+                paid, payment_date = emi, settle_date
+                self._pay(payments, installment_id, emi, settle_date)
+            elif number <= stop_after:
+                if profile == 'late':
+                    day = due_date + timedelta(days=rng.randint(5, 60))
+                elif profile == 'partial' and rng.random() < 0.5:
+                    day = due_date + timedelta(days=rng.randint(0, 15))
+                    part = (emi * Decimal(rng.uniform(0.3, 0.8))).quantize(Decimal('1'))
+                    if day <= today:
+                        paid, payment_date = part, day
+                        self._pay(payments, installment_id, part, day)
+                    # The rest, later or never
+                    day = day + timedelta(days=rng.randint(15, 60)) if rng.random() < 0.6 else None
+                else:
+                    day = due_date + timedelta(days=rng.randint(-5, 3))
+
+                if day and day <= today:
+                    rest = emi - paid
+                    paid, payment_date = emi, day
+                    self._pay(payments, installment_id, rest, day)
+
+            if paid >= emi:
+                status = 'PAID'
+            else:
+                payment_date = None
+                if paid > 0:
+                    status = 'PARTIAL'
+                elif due_date < today:
+                    status = 'OVERDUE'
+                else:
+                    status = 'PENDING'
+                first_unpaid = first_unpaid or due_date
+                if due_date < today:
+                    overdue_total += emi - paid
+                    oldest_unpaid = oldest_unpaid or due_date
+
+            paid_total += paid
+            installments.append((
+                installment_id, loan_id, number, due_date, emi, paid, payment_date, status, '',
+                self.now, self.now,
+            ))
+
+        outstanding = total_amount - paid_total
+        if outstanding <= 0:
+            status = 'CLOSED'
+        elif profile == 'default' and oldest_unpaid and (today - oldest_unpaid).days > DEFAULT_AFTER_DAYS:
+            status = 'DEFAULTED'
+        else:
+            status = 'ACTIVE'
+        created_at = datetime.combine(start_date, time(5, 0), tzinfo=dt_timezone.utc)
+        loans.append((
+            loan_id, borrower_id, Decimal(amount), Decimal(interest_rate), tenure, start_date, installment_day,
+            total_amount, emi, status, paid_total, outstanding, overdue_total, first_unpaid, created_at, created_at,
+        ))
+
+
+def generate_portfolio(borrowers, loans=None, seed=42, batch_size=SAMPLE_BATCH_SIZE, progress=None, today=None):
+    """
+    Generate a seeded sample portfolio; returns the counts of borrowers, loans,
+    installments and payments. Dates are relative to today (default: the
+    current date), so only the same seed, sizes and today repeat a portfolio.
+    """
+    return PortfolioGenerator(borrowers, loans=loans, seed=seed, today=today).generate(batch_size, progress)
@@ -0,0 +1,87 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from dateutil.relativedelta import relativedelta
+
+from .cache import invalidate_dashboard_cache
+from .models import Loan, Installment, Payment, payments_deleted
+from .utils import invalidate_collection_months, invalidate_performance_month
+
+
+# Only Loan has post_delete receivers: with one on Installment or Payment,
+# Django would load and delete the schedule and payments of a deleted loan
+# row by row. A deleted loan invalidates everything its children fed.
+
+@receiver(post_save, sender=Loan)
+@receiver(post_delete, sender=Loan)
+@receiver(post_save, sender=Installment)
+@receiver(post_save, sender=Payment)
+def invalidate_dashboard_on_change(sender, **kwargs):
+    """Any change to loans, installments or payments makes the dashboard stale"""
+    invalidate_dashboard_cache()
+
+
+@receiver(post_save, sender=Loan)
+def invalidate_performance_on_loan_change(sender, instance, **kwargs):
+    """A (back-dated) loan changes the disbursements of its start month, and of the month it was moved from"""
+    invalidate_performance_month(instance.start_date)
+    loaded_start_date = getattr(instance, '_loaded_start_date', None)
+    if loaded_start_date != instance.start_date:
+        invalidate_performance_month(loaded_start_date)
+
+
+@receiver(post_delete, sender=Loan)
+def invalidate_on_loan_delete(sender, instance, **kwargs):
+    """The payments and schedule of a deleted loan go with it"""
+    invalidate_performance_month(instance.start_date, timezone.now())
+    invalidate_collection_months(
+        instance.start_date,
+        instance.start_date + relativedelta(months=instance.tenure_months + 1)
+    )
+
+
+@receiver(post_save, sender=Payment)
+def invalidate_performance_on_payment_change(sender, instance, **kwargs):
+    """A (back-dated) payment changes the collections of its payment month, and of the month it was moved from"""
+    invalidate_performance_month(instance.payment_date)
+    loaded_payment_date = getattr(instance, '_loaded_payment_date', None)
+    if loaded_payment_date != instance.payment_date:
+        invalidate_performance_month(loaded_payment_date)
+
+
+@receiver(post_save, sender=Installment)
+def invalidate_collection_on_installment_change(sender, instance, **kwargs):
+    """Amounts due and paid feed the persisted collection figures of the due month"""
+    invalidate_collection_months(instance.due_date)
+
+
+@receiver(payments_deleted, sender=Payment)
+def invalidate_on_payments_deleted(sender, payments, **kwargs):
+    """Deleted payments change the collections of their payment months and their installments' due months"""
+    if not payments:
+        return
+    invalidate_dashboard_cache()
+    payment_dates = [payment_date for _, payment_date, _ in payments]
+    invalidate_performance_month(min(payment_dates), max(payment_dates))
+    due_dates = [due_date for _, _, due_date in payments]
+    invalidate_collection_months(min(due_dates), max(due_dates))
+
+
+@receiver(post_save, sender=Loan)
+def invalidate_collection_on_loan_change(sender, instance, **kwargs):
+    """
+    A new or edited (back-dated) loan gets a schedule bulk-created without
+    signals; an edit that moves the start date or changes the tenure also
+    changes the months of the schedule it replaces
+    """
+    invalidate_collection_months(
+        instance.start_date,
+        instance.start_date + relativedelta(months=instance.tenure_months + 1)
+    )
+    loaded_start_date = getattr(instance, '_loaded_start_date', None)
+    loaded_tenure_months = getattr(instance, '_loaded_tenure_months', None) or instance.tenure_months
+    if loaded_start_date and (loaded_start_date, loaded_tenure_months) != (instance.start_date, instance.tenure_months):
+        invalidate_collection_months(
+            loaded_start_date,
+            loaded_start_date + relativedelta(months=loaded_tenure_months + 1)
+        )
@@ -1,3 +1,888 @@
-from django.test import TestCase
+import base64
+import csv
+import json
+import os
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from dateutil.relativedelta import relativedelta
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .cache import (
+    DASHBOARD_VERSION_KEY, PRIVATE_CACHES, _get_version, get_cached_dashboard_stats, invalidate_dashboard_cache
+)
+from .exports import iter_export
+from .imports import PORTFOLIO_IMPORT_COLUMNS, PaymentImport, PortfolioImport
+from .models import Borrower, Checkpoint, CollectionSnapshot, Installment, Loan, Payment
+from .pagination import CursorPaginator, approximate_count
+from .sample_data import generate_portfolio
+from .utils import (
+    get_aging_bucket_installments, get_aging_by_borrower, get_aging_summary, get_collection_report,
+    get_loan_performance_data, refresh_overdue_statuses, update_overdue_statuses
+)
+from .urls import urlpatterns
+
+
+# Most queries one request of each view may run, cold dashboard cache
+# included. The query count must also stay the same between a portfolio of
+# SMALL_PORTFOLIO borrowers and one ten times larger, whose sample borrower
+# has ten times the loans. Adding a URL to loans/urls.py means adding it here.
+QUERY_BUDGETS = {
+    'login': 2,
+    'home': 0,
+    'dashboard': 7,
+    'dashboard_cache_stats': 2,
+    'metrics': 2,
+    'borrower_list': 4,
+    'borrower_add': 2,
+    'borrower_detail': 9,
+    'borrower_edit': 3,
+    'borrower_delete': 5,
+    'loan_list': 4,
+    'loan_list?sort=outstanding': 4,
+    'loan_list?sort=overdue': 4,
+    'loan_add': 3,
+    'loan_detail': 8,
+    'loan_edit': 5,
+    'loan_delete': 5,
+    'loan_close': 4,
+    'installment_schedule': 4,
+    'installment_pay': 3,
+    'payment_history': 4,
+    'overdue_installments': 4,
+    'overdue_installments?group=date': 4,
+    'overdue_installments?group=borrower': 5,
+    'upcoming_dues': 5,
+    'upcoming_dues?group=date': 5,
+    'upcoming_dues?group=borrower': 6,
+    'all_payments': 4,
+    'payment_import': 2,
+    'aging_report': 5,
+    'aging_report?bucket=1_30': 4,
+    'collection_report': 6,
+    'export': 3,
+    'calculate_loan_ajax': 2,
+    'loan_performance_ajax': 6,
+    'mark_installment_paid_ajax': 13,
+    'aging_report_ajax': 5,
+    'admin:loans_borrower_changelist': 5,
+    'admin:loans_loan_changelist': 6,
+    'admin:loans_installment_changelist': 4,
+    'admin:loans_payment_changelist': 4,
+}
+# Ends the session of the test client
+UNMEASURED_URLS = {'logout'}
+POST_URLS = {'mark_installment_paid_ajax'}
+# Enough loans for more than one page of every list
+SMALL_PORTFOLIO = 25
+
+
+@override_settings(CACHES=PRIVATE_CACHES)
+class QueryCountTests(TestCase):
+    """Every view and admin changelist runs a fixed number of queries, whatever the data size"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def get_requests(self, sample_loans):
+        """(budget key, method, URL) of every URL, against a borrower with sample_loans loans"""
+        generate_portfolio(1, loans=sample_loans, seed=sample_loans)
+        borrower_id = Borrower.objects.latest('id').id
+        loan = (
+            Borrower.objects.get(pk=borrower_id).loans
+            .annotate(payments=Count('installments__payments')).order_by('-payments', 'id').first()
+        )
+        installment = loan.installments.annotate(payments_count=Count('payments')).order_by('-payments_count', 'id').first()
+        # Paying it must not settle its loan, which takes extra queries
+        unpaid = Installment.objects.unpaid().filter(loan__borrower_id=borrower_id).order_by('-due_date').first()
+        kwargs = {
+            'borrower_id': borrower_id,
+            'loan_id': loan.id,
+            'installment_id': installment.id,
+            'dataset': 'loans',
+        }
+        # Edit and delete pages are only shown for loans without payments and
+        # borrowers without active loans
+        new_loan = Loan.objects.create(
+            borrower=Borrower.objects.create(name='New Borrower', phone='9000000000', address='Jaipur'),
+            amount=Decimal('50000'), interest_rate=Decimal('24'), tenure_months=12,
+            start_date=timezone.now().date(), installment_day=5,
+        )
+        new_borrower = Borrower.objects.create(name='No Loans', phone='9000000001', address='Jaipur')
+        overrides = {
+            'loan_edit': {'loan_id': new_loan.id},
+            'loan_delete': {'loan_id': new_loan.id},
+            'borrower_delete': {'borrower_id': new_borrower.id},
+            'mark_installment_paid_ajax': {'installment_id': unpaid.id},
+        }
+
+        requests = []
+        for pattern in urlpatterns:
+            if pattern.name in UNMEASURED_URLS:
+                continue
+            url_kwargs = {key: kwargs[key] for key in pattern.pattern.converters}
+            url_kwargs.update(overrides.get(pattern.name, {}))
+            url = reverse(pattern.name, kwargs=url_kwargs)
+            requests.append((pattern.name, 'post' if pattern.name in POST_URLS else 'get', url))
+        for key in QUERY_BUDGETS:
+            name, _, query = key.partition('?')
+            if query:
+                requests.append((key, 'get', f'{reverse(name)}?{query}'))
+        for model in admin.site._registry:
+            if model._meta.app_label == 'loans':
+                name = f'admin:loans_{model._meta.model_name}_changelist'
+                requests.append((name, 'get', reverse(name)))
+        return requests
+
+    def measure(self, sample_loans):
+        counts = {}
+        for key, method, url in self.get_requests(sample_loans):
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = getattr(self.client, method)(url)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            self.assertLess(response.status_code, 400, f'{key} failed: {url}')
+            counts[key] = len(queries)
+        return counts
+
+    def test_query_counts(self):
+        generate_portfolio(SMALL_PORTFOLIO, seed=1)
+        small = self.measure(sample_loans=2)
+        generate_portfolio(SMALL_PORTFOLIO * 9, seed=2)
+        large = self.measure(sample_loans=20)
+
+        self.assertEqual(set(small) - set(QUERY_BUDGETS), set(), 'URLs without a query budget')
+        for key, count in sorted(large.items()):
+            with self.subTest(key):
+                self.assertEqual(count, small[key], f'{key}: query count grows with the data')
+                self.assertLessEqual(count, QUERY_BUDGETS[key], f'{key}: over its query budget')
+
+
+@override_settings(CACHES=PRIVATE_CACHES)
+class LoanBalanceTests(TestCase):
+    """The stored paid/outstanding/overdue rollups follow the payments"""
+
+    def setUp(self):
+        self.loan = Loan.objects.create(
+            borrower=Borrower.objects.create(name='Ravi', phone='9000000000', address='Jaipur'),
+            amount=Decimal('50000'), interest_rate=Decimal('24'), tenure_months=12,
+            start_date=timezone.now().date(), installment_day=5,
+        )
+        self.installment = self.loan.installments.order_by('due_date').first()
+
+    def pay(self, amount):
+        return Payment.objects.create(installment=self.installment, amount=amount)
+
+    def test_saving_stale_loan_keeps_balances(self):
+        stale = Loan.objects.get(pk=self.loan.pk)
+        self.pay(Decimal('1000'))
+        stale.status = 'DEFAULTED'
+        stale.save()
+
+        loan = Loan.objects.get(pk=self.loan.pk)
+        self.assertEqual(loan.status, 'DEFAULTED')
+        self.assertEqual(loan.paid_amount, Decimal('1000'))
+        self.assertEqual(loan.outstanding_amount, loan.total_amount - Decimal('1000'))
+
+    def test_deleting_payment_refreshes_balances(self):
+        self.pay(Decimal('1000'))
+        self.pay(self.installment.amount_due - Decimal('1000')).delete()
+
+        self.installment.refresh_from_db()
+        self.assertEqual(self.installment.amount_paid, Decimal('1000'))
+        self.assertEqual(self.installment.status, 'PARTIAL')
+        loan = Loan.objects.get(pk=self.loan.pk)
+        self.assertEqual(loan.paid_amount, Decimal('1000'))
+        self.assertEqual(loan.outstanding_amount, loan.total_amount - Decimal('1000'))
+
+        Payment.objects.filter(installment=self.installment).delete()
+        self.installment.refresh_from_db()
+        self.assertEqual(self.installment.amount_paid, Decimal('0'))
+        self.assertEqual(Loan.objects.get(pk=self.loan.pk).paid_amount, Decimal('0'))
+
+
+@override_settings(CACHES=PRIVATE_CACHES)
+class CollectionReportTests(TestCase):
+    """The collection report falls back to the default range for months it cannot show"""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+
+    def test_out_of_range_months(self):
+        current_month = timezone.now().date().replace(day=1)
+        for query in ('from=0001-01', 'to=0001-01', 'to=9999-12', 'from=2024-13'):
+            with self.subTest(query):
+                response = self.client.get(f'{reverse("collection_report")}?{query}')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    (response.context['start_month'], response.context['end_month']),
+                    (current_month - relativedelta(months=11), current_month)
+                )
+
+
+@override_settings(CACHES=PRIVATE_CACHES)
+class PaginationLinkTests(TestCase):
+    """Page links keep the filters, URL-encoded"""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        generate_portfolio(SMALL_PORTFOLIO, seed=1)
+        Borrower.objects.update(name='Rao & Sons #1')
+
+    def test_filters_are_encoded(self):
+        for url, params in [
+            (reverse('loan_list'), {'borrower_name': 'Rao & Sons #1'}),
+            (reverse('loan_list'), {'borrower_name': 'Rao & Sons #1', 'sort': 'outstanding'}),
+            (reverse('all_payments'), {'borrower': 'Rao & Sons #1'}),
+        ]:
+            with self.subTest(params):
+                response = self.client.get(url, params)
+                self.assertTrue(response.context['page_obj'].has_next())
+                self.assertContains(response, 'Rao+%26+Sons+%231')
+                self.assertNotContains(response, '=Rao &')
+
+
+@override_settings(CACHES=PRIVATE_CACHES)
+class PortfolioImportTests(TestCase):
+    """import_portfolio validates every row, imports in batches and resumes after an interruption"""
+
+    def import_rows(self, rows):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'portfolio.csv')
+        with open(path, 'w', newline='') as portfolio_file:
+            writer = csv.DictWriter(portfolio_file, fieldnames=PORTFOLIO_IMPORT_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        return PortfolioImport.from_file(path)
+
+    def row(self, number, **values):
+        row = {
+            'borrower_name': f'Borrower {number}', 'phone': f'98765{number:05d}', 'email': '',
+            'address': 'Jaipur', 'amount': '50000', 'interest_rate': '24', 'tenure_months': '12',
+            'start_date': timezone.now().date().isoformat(), 'installment_day': '5', 'status': 'ACTIVE',
+        }
+        row.update(values)
+        return row
+
+    def test_validation_errors(self):
+        portfolio_import = self.import_rows([
+            self.row(1),
+            self.row(2, phone='98765'),
+            self.row(3, status='CLOSED'),
+            self.row(4, amount='500'),
+            self.row(5, status='LOST'),
+        ])
+        self.assertFalse(portfolio_import.is_valid())
+        self.assertEqual([error.split(':')[0] for error in portfolio_import.errors],
+                         ['Line 3', 'Line 4', 'Line 5', 'Line 6'])
+        self.assertIn('at least 10 digits', portfolio_import.errors[0])
+        self.assertIn('only ACTIVE loans', portfolio_import.errors[1])
+        with self.assertRaises(ValueError):
+            portfolio_import.apply()
+        self.assertFalse(Loan.objects.exists())
+
+    def test_batches(self):
+        rows = [self.row(number) for number in range(5)]
+        # Two loans for one borrower: the borrower is created once
+        rows.append(self.row(0, amount='20000'))
+        progress = []
+        borrowers, loans, installments = self.import_rows(rows).apply(
+            batch_size=4, progress=lambda done, installments: progress.append((done, installments))
+        )
+
+        self.assertEqual((borrowers, loans, installments), (5, 6, 72))
+        self.assertEqual(progress, [(4, 48), (6, 72)])
+        self.assertEqual(Borrower.objects.count(), 5)
+        for loan in Loan.objects.all():
+            self.assertEqual(loan.installments.count(), 12)
+            self.assertEqual(loan.outstanding_amount, loan.total_amount)
+            self.assertEqual(loan.first_unpaid_due_date, loan.installments.order_by('due_date')[0].due_date)
+
+    def test_resume_after_interruption(self):
+        rows = [self.row(number) for number in range(5)]
+
+        def interrupt(done, installments):
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            self.import_rows(rows).apply(batch_size=2, progress=interrupt)
+        self.assertEqual(Loan.objects.count(), 2)
+
+        portfolio_import = self.import_rows(rows)
+        self.assertEqual(portfolio_import.get_position(), 2)
+        self.assertEqual(portfolio_import.apply(batch_size=2), (3, 3, 36))
+        self.assertEqual(Loan.objects.count(), 5)
+        self.assertEqual(Borrower.objects.count(), 5)
+
+        # Nothing left to do for a third run
+        self.assertEqual(self.import_rows(rows).apply(batch_size=2), (0, 0, 0))
+        self.assertEqual(Loan.objects.count(), 5)
+
+
+@override_settings(CACHES=PRIVATE_CACHES)
+class PaymentImportTests(TestCase):
+    """A day-sheet import validates every row and leaves the same balances as Payment.save()"""
+
+    def setUp(self):
+        borrower = Borrower.objects.create(name='Ravi', phone='9000000000', address='Jaipur')
+        start_date = timezone.now().date() - relativedelta(months=3)
+        self.loans = [
+            Loan.objects.create(
+                borrower=borrower, amount=Decimal('12000'), interest_rate=Decimal('0'), tenure_months=3,
+                start_date=start_date, installment_day=5,
+            )
+            for _ in range(2)
+        ]
+
+    def installments(self, loan):
+        return list(loan.installments.order_by('installment_number'))
+
+    def read(self, *rows, header='installment_id,loan_id,installment_number,amount,payment_date,payment_method'):
+        return PaymentImport.from_csv([header, *rows])
+
+    def test_overpayment_across_rows(self):
+        installment = self.installments(self.loans[0])[0]
+        payment_import = self.read(
+            f'{installment.id},,,3000,,',
+            f'{installment.id},,,1000,,',
+            f'{installment.id},,,1,,',
+        )
+        self.assertEqual(payment_import.errors, [
+            f'Line 4: amount 1.00 exceeds the remaining 0.00 of installment {installment.id}'
+        ])
+
+    def test_lookup_by_loan_and_number(self):
+        loan = self.loans[1]
+        payment_import = self.read(f',{loan.id},2,500,,bank', f',{loan.id},9,500,,')
+        self.assertEqual(payment_import.errors, [f'Line 3: loan {loan.id} has no installment #9'])
+        self.assertEqual(len(payment_import.payments), 1)
+        self.assertEqual(payment_import.payments[0].installment_id, self.installments(loan)[1].id)
+        self.assertEqual(payment_import.payments[0].payment_method, 'BANK')
+
+    def test_dry_run_summary_writes_nothing(self):
+        rows = [f'{installment.id},,,4000,,' for installment in self.installments(self.loans[0])]
+        rows.append(f'{self.installments(self.loans[1])[0].id},,,1000,,')
+        payment_import = self.read(*rows)
+
+        with self.assertNumQueries(0):
+            summary = payment_import.summary()
+        self.assertEqual(summary, {
+            'rows': 4, 'payments': 4, 'errors': 0, 'total_amount': Decimal('13000'),
+            'installments': 4, 'loans': 2, 'loans_closing': 1,
+        })
+        self.assertFalse(Payment.objects.exists())
+
+    def test_apply_matches_payment_save(self):
+        saved, imported = self.loans
+        amounts = [Decimal('4000'), Decimal('1500'), Decimal('0')]
+        for installment, amount in zip(self.installments(saved), amounts):
+            if amount:
+                Payment.objects.create(installment=installment, amount=amount)
+        payment_import = self.read(*(
+            f'{installment.id},,,{amount},,'
+            for installment, amount in zip(self.installments(imported), amounts) if amount
+        ))
+        self.assertEqual(payment_import.apply(), 0)
+
+        fields = ('amount_paid', 'status', 'payment_date')
+        for saved_installment, imported_installment in zip(self.installments(saved), self.installments(imported)):
+            with self.subTest(installment_number=saved_installment.installment_number):
+                self.assertEqual(
+                    [getattr(imported_installment, field) for field in fields],
+                    [getattr(saved_installment, field) for field in fields],
+                )
+        saved.refresh_from_db()
+        imported.refresh_from_db()
+        for field in (*Loan.ROLLUP_FIELDS, 'status'):
+            self.assertEqual(getattr(imported, field), getattr(saved, field), field)
+
+    def test_apply_closes_settled_loans(self):
+        settled, partly_paid = self.loans
+        rows = [f'{installment.id},,,4000,,' for installment in self.installments(settled)]
+        rows.append(f'{self.installments(partly_paid)[0].id},,,4000,,')
+        self.assertEqual(self.read(*rows).apply(batch_size=2), 1)
+
+        settled.refresh_from_db()
+        partly_paid.refresh_from_db()
+        self.assertEqual((settled.status, settled.outstanding_amount), ('CLOSED', Decimal('0')))
+        self.assertEqual((partly_paid.status, partly_paid.outstanding_amount), ('ACTIVE', Decimal('8000')))
+
+
+@override_settings(CACHES=PRIVATE_CACHES)
+class PerformanceChartTests(TestCase):
+    """Persisted chart months follow edits that move a loan or payment to another month"""
+
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.loan = Loan.objects.create(
+            borrower=Borrower.objects.create(name='Ravi', phone='9000000000', address='Jaipur'),
+            amount=Decimal('50000'), interest_rate=Decimal('24'), tenure_months=12,
+            start_date=self.months_ago(3), installment_day=5,
+        )
+
+    def months_ago(self, months):
+        return self.today - relativedelta(months=months)
+
+    def chart(self, field):
+        """{months ago: figure} of the chart, persisting the months that have ended"""
+        data = get_loan_performance_data(months=12)
+        return {11 - index: entry[field] for index, entry in enumerate(data) if entry[field]}
+
+    def test_moved_loan(self):
+        self.assertEqual(self.chart('disbursed'), {3: 50000})
+        loan = Loan.objects.get(pk=self.loan.pk)
+        loan.start_date = self.months_ago(5)
+        loan.save()
+        self.assertEqual(self.chart('disbursed'), {5: 50000})
+        loan.start_date = self.months_ago(4)
+        loan.save()
+        self.assertEqual(self.chart('disbursed'), {4: 50000})
+
+    def test_moved_payment(self):
+        Payment.objects.create(
+            installment=self.loan.installments.first(), amount=Decimal('1000'), payment_date=self.months_ago(2)
+        )
+        self.assertEqual(self.chart('collected'), {2: 1000})
+        payment = Payment.objects.get()
+        payment.payment_date = self.months_ago(1)
+        payment.save()
+        self.assertEqual(self.chart('collected'), {1: 1000})
+        payment.delete()
+        self.assertEqual(self.chart('collected'), {})
+
+
+@override_settings(CACHES=PRIVATE_CACHES)
+class CollectionSnapshotTests(TestCase):
+    """Persisted collection report months follow payments and loan edits"""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        self.today = timezone.now().date()
+        # 1,000 due in each of the months 19 to 8 months ago
+        self.loan = Loan.objects.create(
+            borrower=Borrower.objects.create(name='Ravi', phone='9000000000', address='Jaipur'),
+            amount=Decimal('12000'), interest_rate=Decimal('0'), tenure_months=12,
+            start_date=self.months_ago(20), installment_day=5,
+        )
+
+    def months_ago(self, months):
+        return self.today - relativedelta(months=months)
+
+    def report(self):
+        """The report of the last 21 months, as {months ago: month entry}; persists the months that have ended"""
+        months = get_collection_report(self.months_ago(20), self.today)['months']
+        return {20 - index: entry for index, entry in enumerate(months)}
+
+    def due_months(self):
+        return sorted((months for months, entry in self.report().items() if entry['total_due']), reverse=True)
+
+    def test_payment(self):
+        self.assertEqual(self.report()[19]['total_collected'], Decimal('0'))
+        payment = Payment.objects.create(
+            installment=self.loan.installments.order_by('due_date').first(), amount=Decimal('400'),
+            payment_method='BANK',
+        )
+        entry = self.report()[19]
+        self.assertEqual((entry['total_collected'], entry['by_method']), (Decimal('400'), {'BANK': Decimal('400')}))
+
+        payment.delete()
+        entry = self.report()[19]
+        self.assertEqual((entry['total_collected'], entry['by_method']), (Decimal('0'), {}))
+
+    def test_loan_moved(self):
+        self.assertEqual(self.due_months(), list(range(19, 7, -1)))
+        response = self.client.post(reverse('loan_edit', kwargs={'loan_id': self.loan.id}), {
+            'borrower': self.loan.borrower_id, 'amount': '12000', 'interest_rate': '0', 'tenure_months': '12',
+            'start_date': self.months_ago(17).isoformat(), 'installment_day': '5',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.due_months(), list(range(16, 4, -1)))
+
+    def test_tenure_shortened(self):
+        self.report()
+        old_months = [self.months_ago(months).replace(day=1) for months in range(12, 6, -1)]
+        self.assertEqual(CollectionSnapshot.objects.filter(month__in=old_months).count(), 6)
+
+        loan = Loan.objects.get(pk=self.loan.pk)
+        loan.tenure_months = 6
+        loan.save()
+        self.assertFalse(CollectionSnapshot.objects.filter(month__in=old_months).exists())
+
+
+@override_settings(CACHES=PRIVATE_CACHES)
+class DashboardCacheTests(TestCase):
+    """Saves and deletes invalidate the cached dashboard; deletes stay set-based"""
+
+    def setUp(self):
+        self.borrower = Borrower.objects.create(name='Ravi', phone='9000000000', address='Jaipur')
+
+    def tearDown(self):
+        cache.clear()
+
+    def create_loan(self, tenure_months, paid=False):
+        loan = Loan.objects.create(
+            borrower=self.borrower, amount=Decimal('12000'), interest_rate=Decimal('0'),
+            tenure_months=tenure_months, start_date=timezone.now().date() - relativedelta(months=tenure_months),
+            installment_day=5,
+        )
+        if paid:
+            for installment in loan.installments.all():
+                Payment.objects.create(installment=installment, amount=installment.amount_due)
+        return loan
+
+    def receivable(self):
+        return get_cached_dashboard_stats()['total_receivable']
+
+    def test_save_and_delete_invalidate(self):
+        self.assertEqual(self.receivable(), Decimal('0'))
+        loan = self.create_loan(12)
+        self.assertEqual(self.receivable(), Decimal('12000'))
+
+        payment = Payment.objects.create(installment=loan.installments.first(), amount=Decimal('1000'))
+        self.assertEqual(self.receivable(), Decimal('11000'))
+        Payment.objects.get(pk=payment.pk).delete()
+        self.assertEqual(self.receivable(), Decimal('12000'))
+
+        Loan.objects.get(pk=loan.pk).delete()
+        self.assertEqual(self.receivable(), Decimal('0'))
+
+    def test_loan_delete_is_set_based(self):
+        counts = []
+        for tenure_months in (2, 12):
+            loan = Loan.objects.get(pk=self.create_loan(tenure_months, paid=True).pk)
+            with CaptureQueriesContext(connection) as queries:
+                loan.delete()
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1], 'deleting a loan runs queries per installment or payment')
+        self.assertFalse(Installment.objects.exists() or Payment.objects.exists())
+
+    def test_lost_version_key_moves_forward(self):
+        version = _get_version()
+        invalidate_dashboard_cache()
+        self.assertEqual(_get_version(), version + 1)
+        cache.delete(DASHBOARD_VERSION_KEY)
+        self.assertGreater(_get_version(), version + 1)
+
+
+@override_settings(CACHES=PRIVATE_CACHES)
+class OverdueStatusRefreshTests(TestCase):
+    """refresh_overdue_statuses() works through due dates in chunks from its watermark"""
+
+    WATERMARK = 'test_refresh'
+
+    def setUp(self):
+        self.first_due = date(2025, 1, 1)
+        loan = Loan.objects.create(
+            borrower=Borrower.objects.create(name='Ravi', phone='9000000000', address='Jaipur'),
+            amount=Decimal('6000'), interest_rate=Decimal('0'), tenure_months=6,
+            start_date=self.first_due - relativedelta(months=1), installment_day=1,
+        )
+        self.loan_id = loan.id
+        # Due on both sides of the chunk boundaries of chunk_days=7 from the first due date
+        self.installments = list(loan.installments.order_by('installment_number'))
+        for installment, days in zip(self.installments, (0, 6, 7, 13, 14, 20)):
+            Installment.objects.filter(pk=installment.pk).update(
+                due_date=self.first_due + timedelta(days=days), amount_paid=0, status='PENDING', payment_date=None
+            )
+
+    def day(self, days):
+        return self.first_due + timedelta(days=days)
+
+    def statuses(self):
+        return list(Installment.objects.filter(loan_id=self.loan_id).order_by('due_date').values_list('status', flat=True))
+
+    def test_chunks(self):
+        chunks = []
+        totals = refresh_overdue_statuses(
+            today=self.day(14), watermark=self.WATERMARK, progress=lambda start, end, totals: chunks.append((start, end))
+        )
+        self.assertEqual(chunks, [(self.day(0), self.day(7)), (self.day(7), self.day(14))])
+        self.assertEqual((totals['chunks'], totals['installments']), (2, 4))
+        self.assertEqual(self.statuses(), ['OVERDUE'] * 4 + ['PENDING'] * 2)
+        self.assertEqual(Loan.objects.get(pk=self.loan_id).overdue_amount, Decimal('4000'))
+        self.assertEqual(Checkpoint.get(self.WATERMARK), self.day(14).isoformat())
+
+    def test_resumes_from_watermark(self):
+        refresh_overdue_statuses(today=self.day(10), watermark=self.WATERMARK)
+        self.assertEqual(self.statuses(), ['OVERDUE'] * 3 + ['PENDING'] * 3)
+
+        totals = refresh_overdue_statuses(today=self.day(21), watermark=self.WATERMARK)
+        self.assertEqual((totals['start'], totals['installments']), (self.day(10), 3))
+        self.assertEqual(self.statuses(), ['OVERDUE'] * 6)
+
+    def test_full(self):
+        refresh_overdue_statuses(today=self.day(14), watermark=self.WATERMARK)
+        # Restated behind the watermark (e.g. by hand): only a full run sees it
+        Installment.objects.filter(due_date=self.day(0)).update(status='PENDING')
+        self.assertEqual(refresh_overdue_statuses(today=self.day(14), watermark=self.WATERMARK)['installments'], 0)
+        totals = refresh_overdue_statuses(today=self.day(14), watermark=self.WATERMARK, full=True)
+        self.assertEqual((totals['start'], totals['installments']), (self.day(0), 1))
+        self.assertEqual(self.statuses()[0], 'OVERDUE')
+
+    def test_without_watermark(self):
+        Checkpoint.set(self.WATERMARK, self.day(14).isoformat())
+        self.assertEqual(refresh_overdue_statuses(today=self.day(14))['installments'], 4)
+        self.assertEqual(Checkpoint.get(self.WATERMARK), self.day(14).isoformat())
+        self.assertEqual(Checkpoint.objects.count(), 1)
+
+        Installment.objects.filter(loan_id=self.loan_id).update(status='PENDING')
+        self.assertEqual(update_overdue_statuses(), 6)
+        self.assertEqual(Checkpoint.objects.count(), 1)
+
+    def test_paid_and_partial_keep_their_status(self):
+        partial, paid = self.installments[:2]
+        Installment.objects.filter(pk=partial.pk).update(amount_paid=Decimal('400'), status='PARTIAL')
+        Installment.objects.filter(pk=paid.pk).update(amount_paid=F('amount_due'), status='PAID')
+        totals = refresh_overdue_statuses(today=self.day(14), watermark=self.WATERMARK)
+
+        self.assertEqual(totals['installments'], 2)
+        self.assertEqual(self.statuses(), ['PARTIAL', 'PAID', 'OVERDUE', 'OVERDUE', 'PENDING', 'PENDING'])
+        self.assertEqual(Loan.objects.get(pk=self.loan_id).overdue_amount, Decimal('2600'))
+
+
+@override_settings(CACHES=PRIVATE_CACHES)
+class CursorPaginatorTests(TestCase):
+    """Keyset pages cover every row once in both directions and survive bad cursors"""
+
+    @classmethod
+    def setUpTestData(cls):
+        loan = Loan.objects.create(
+            borrower=Borrower.objects.create(name='Ravi', phone='9000000000', address='Jaipur'),
+            amount=Decimal('12000'), interest_rate=Decimal('0'), tenure_months=12,
+            start_date=date(2025, 1, 1), installment_day=5,
+        )
+        installment = loan.installments.first()
+        # Runs of payments sharing a date, so pages break inside a tie
+        Payment.objects.bulk_create(
+            Payment(installment=installment, amount=Decimal('10'), payment_date=date(2025, 2, 1 + number // 4))
+            for number in range(11)
+        )
+        cls.ids = list(Payment.objects.order_by('-payment_date', '-id').values_list('id', flat=True))
+
+    def paginator(self, **kwargs):
+        return CursorPaginator(Payment.objects.all(), 3, ['-payment_date', '-id'], **kwargs)
+
+    def ids_of(self, page):
+        return [payment.id for payment in page]
+
+    def test_pages_forwards_and_backwards(self):
+        paginator = self.paginator()
+        pages = [paginator.get_page()]
+        while pages[-1].has_next():
+            pages.append(paginator.get_page(pages[-1].next_cursor))
+        self.assertEqual([self.ids_of(page) for page in pages], [self.ids[i:i + 3] for i in range(0, 11, 3)])
+        self.assertFalse(pages[0].has_previous())
+
+        page = pages[-1]
+        for expected in reversed(pages[:-1]):
+            page = paginator.get_page(page.previous_cursor)
+            self.assertEqual(self.ids_of(page), self.ids_of(expected))
+            self.assertTrue(page.has_next())
+        self.assertFalse(page.has_previous())
+
+    def test_bad_cursors_give_first_page(self):
+        def token(payload):
+            return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+        first_page = self.ids[:3]
+        for cursor in [
+            'not-a-cursor', '!!!', base64.urlsafe_b64encode(b'\xff\xfe').decode(), token([1]),
+            token({'v': 5, 'r': False}), token({'v': ['2025-02-01'], 'r': False}),
+            token({'v': ['2025-13-01', 1], 'r': False}), token({'v': ['2025-02-01', 'abc'], 'r': True}),
+            token({'v': [None, None], 'r': False}), token({'v': [{'a': 1}, [1]], 'r': True}),
+        ]:
+            with self.subTest(cursor):
+                page = self.paginator().get_page(cursor)
+                self.assertEqual(self.ids_of(page), first_page)
+                self.assertFalse(page.has_previous())
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        response = self.client.get(reverse('all_payments'), {'cursor': token({'v': [None, None], 'r': True})})
+        self.assertEqual(response.status_code, 200)
+
+    def test_approximate_count(self):
+        self.assertEqual(approximate_count(Payment.objects.all(), limit=5), (5, True))
+        self.assertEqual(approximate_count(Payment.objects.all(), limit=11), (11, False))
+        self.assertEqual(self.paginator(count_limit=10).count, 10)
+        self.assertTrue(self.paginator(count_limit=10).count_is_capped)
+        self.assertFalse(self.paginator(count_limit=20).count_is_capped)
+        self.assertIsNone(self.paginator().count)
+
+
+@override_settings(CACHES=PRIVATE_CACHES)
+class ExportTests(TestCase):
+    """Exports show the figures the screens show"""
+
+    def test_installment_status_is_derived(self):
+        loan = Loan.objects.create(
+            borrower=Borrower.objects.create(name='Ravi', phone='9000000000', address='Jaipur'),
+            amount=Decimal('12000'), interest_rate=Decimal('0'), tenure_months=12,
+            start_date=timezone.now().date() - relativedelta(months=4), installment_day=5,
+        )
+        # Stored statuses as they were when the loan was created, before any fell due
+        loan.installments.update(status='PENDING')
+        Installment.objects.filter(pk=loan.installments.order_by('due_date')[1].pk).update(amount_paid=Decimal('100'))
+
+        rows = list(csv.DictReader(iter_export('installments')))
+        self.assertEqual([row['status'] for row in rows[:3]], ['OVERDUE', 'PARTIAL', 'OVERDUE'])
+        self.assertEqual(rows[-1]['status'], 'PENDING')
+
+
+def per_row_schedule(loan):
+    """(number, due date, amount due) of every installment, as the old per-row Installment.objects.create() loop built them"""
+    current_date = loan.start_date + relativedelta(months=1)
+    schedule = []
+    for number in range(1, loan.tenure_months + 1):
+        next_month = current_date.replace(day=28) + timedelta(days=4)
+        last_day = (next_month - timedelta(days=next_month.day)).day
+        schedule.append((number, current_date.replace(day=min(loan.installment_day, last_day)), loan.monthly_installment))
+        current_date = current_date + relativedelta(months=1)
+    return schedule
+
+
+@override_settings(CACHES=PRIVATE_CACHES)
+class InstallmentScheduleTests(TestCase):
+    """The bulk-built schedule is the one the per-row loop built"""
+
+    TERMS = [
+        # (start date, installment day, tenure months, amount, interest rate)
+        (date(2024, 1, 31), 31, 14, '10000', '17'),
+        (date(2023, 12, 30), 30, 3, '12345', '13.5'),
+        (date(2024, 1, 15), 29, 13, '50000', '24'),
+        (date(2025, 11, 30), 31, 60, '99999', '7.25'),
+        (date(2025, 6, 5), 1, 1, '1000', '0'),
+    ]
+
+    def setUp(self):
+        self.borrower = Borrower.objects.create(name='Ravi', phone='9000000000', address='Jaipur')
+
+    def new_loan(self, start_date, installment_day, tenure_months, amount, interest_rate):
+        return Loan(
+            borrower=self.borrower, amount=Decimal(amount), interest_rate=Decimal(interest_rate),
+            tenure_months=tenure_months, start_date=start_date, installment_day=installment_day,
+        )
+
+    def schedule(self, loan):
+        return list(loan.installments.order_by('installment_number').values_list(
+            'installment_number', 'due_date', 'amount_due'
+        ))
+
+    def test_matches_per_row_loop(self):
+        for terms in self.TERMS:
+            with self.subTest(terms):
+                loan = self.new_loan(*terms)
+                loan.save()
+                self.assertEqual(self.schedule(loan), per_row_schedule(loan))
+
+    def test_day_clamp(self):
+        loan = self.new_loan(*self.TERMS[0])
+        loan.save()
+        due_dates = [due_date for _, due_date, _ in self.schedule(loan)]
+        self.assertEqual(due_dates[:6], [
+            date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30),
+            date(2024, 5, 31), date(2024, 6, 30), date(2024, 7, 31),
+        ])
+        self.assertEqual(due_dates[12], date(2025, 2, 28))
+
+    def test_last_installment_rounding(self):
+        # 10,000 at 17% over 14 months is 11,983, due as 14 whole installments of 856;
+        # like the per-row loop, the last one is not adjusted to the rounding
+        loan = self.new_loan(*self.TERMS[0])
+        loan.save()
+        self.assertEqual((loan.total_amount, loan.monthly_installment), (Decimal('11983'), Decimal('856')))
+        schedule = self.schedule(loan)
+        self.assertEqual(len(schedule), 14)
+        self.assertEqual(schedule[-1][2], Decimal('856'))
+        self.assertEqual(loan.outstanding_amount, Decimal('11983'))
+
+    def test_bulk_generate_matches_save(self):
+        loans = [self.new_loan(*terms) for terms in self.TERMS]
+        for loan in loans:
+            loan.calculate_totals()
+        Loan.objects.bulk_create(loans)
+        self.assertEqual(Loan.bulk_generate_installments(loans), sum(terms[2] for terms in self.TERMS))
+        for loan in loans:
+            with self.subTest(loan.start_date):
+                self.assertEqual(self.schedule(loan), per_row_schedule(loan))
+                self.assertEqual(loan.installments.count(), loan.tenure_months)
+
+
+@override_settings(CACHES=PRIVATE_CACHES)
+class AgingBucketTests(TestCase):
+    """Aging buckets split by whole days past due and count only what is left to pay"""
+
+    TODAY = date(2025, 6, 15)
+    # Days past due of each installment -> bucket
+    BOUNDARIES = [(0, 'current'), (1, '1_30'), (30, '1_30'), (31, '31_60'),
+                  (60, '31_60'), (61, '61_90'), (90, '61_90'), (91, '90_plus')]
+
+    def setUp(self):
+        borrower = Borrower.objects.create(name='Ravi', phone='9000000000', address='Jaipur')
+        self.borrower_id = borrower.id
+        # 1,000 per installment
+        loan = Loan.objects.create(
+            borrower=borrower, amount=Decimal('12000'), interest_rate=Decimal('0'), tenure_months=12,
+            start_date=date(2024, 1, 1), installment_day=5,
+        )
+        installments = list(loan.installments.order_by('installment_number'))
+        for installment, (days, _) in zip(installments, self.BOUNDARIES):
+            Installment.objects.filter(pk=installment.pk).update(due_date=self.TODAY - timedelta(days=days))
+        # Partly paid in the 31-60 bucket, fully paid at 61 days
+        Installment.objects.filter(pk=installments[3].pk).update(amount_paid=Decimal('250'))
+        Installment.objects.filter(pk=installments[5].pk).update(amount_paid=Decimal('1000'))
+        # The rest is a year or more ahead: current
+        Installment.objects.filter(pk__in=[installment.pk for installment in installments[8:]]).update(
+            due_date=self.TODAY + timedelta(days=365)
+        )
+        # Installments of closed loans are not receivables
+        closed = Loan.objects.create(
+            borrower=borrower, amount=Decimal('12000'), interest_rate=Decimal('0'), tenure_months=12,
+            start_date=date(2024, 1, 1), installment_day=5,
+        )
+        Loan.objects.filter(pk=closed.pk).update(status='CLOSED')
+
+    def test_summary(self):
+        summary = get_aging_summary(today=self.TODAY)
+        buckets = {bucket['key']: (bucket['count'], bucket['amount']) for bucket in summary['buckets']}
+        self.assertEqual(buckets, {
+            'current': (5, Decimal('5000')),
+            '1_30': (2, Decimal('2000')),
+            '31_60': (2, Decimal('1750')),
+            '61_90': (1, Decimal('1000')),
+            '90_plus': (1, Decimal('1000')),
+        })
+        self.assertEqual((summary['total_count'], summary['total_amount']), (11, Decimal('10750')))
+        self.assertEqual(summary['overdue_amount'], Decimal('5750'))
+
+    def test_by_borrower_and_drill_down(self):
+        aging = get_aging_by_borrower([self.borrower_id], today=self.TODAY)[self.borrower_id]
+        self.assertEqual(
+            (aging['31_60_count'], aging['31_60_amount'], aging['61_90_count'], aging['61_90_amount']),
+            (2, Decimal('1750'), 1, Decimal('1000'))
+        )
+        for days, bucket in self.BOUNDARIES:
+            with self.subTest(days=days):
+                due_dates = get_aging_bucket_installments(bucket, today=self.TODAY).values_list('due_date', flat=True)
+                if days == 61:
+                    # Fully paid: in no bucket
+                    self.assertNotIn(self.TODAY - timedelta(days=days), due_dates)
+                else:
+                    self.assertIn(self.TODAY - timedelta(days=days), due_dates)
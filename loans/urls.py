@@ -1,5 +1,7 @@
 from django.urls import path, include
-from .views.dashboard import dashboard_view, home_view
+from .views.dashboard import (
+    dashboard_view, home_view, dashboard_cache_stats_view, metrics_view, loan_performance_ajax
+)
 from .views.borrowers import (
     borrower_list_view, borrower_detail_view, borrower_add_view, 
     borrower_edit_view, borrower_delete_view
@@ -10,8 +12,11 @@ from .views.loans import (
 )
 from .views.installments import (
     installment_pay_view, payment_history_view, mark_installment_paid_ajax,
-    overdue_installments_view, upcoming_dues_view, all_payments_view
+    overdue_installments_view, upcoming_dues_view, all_payments_view,
+    payment_import_view
 )
+from .views.exports import export_view
+from .views.reports import aging_report_view, aging_report_ajax, collection_report_view
 from .views.auth import CustomLoginView, logout_view
 
 urlpatterns = [
@@ -22,6 +27,8 @@ urlpatterns = [
     # Dashboard
     path('', home_view, name='home'),
     path('dashboard/', dashboard_view, name='dashboard'),
+    path('ops/cache-stats/', dashboard_cache_stats_view, name='dashboard_cache_stats'),
+    path('ops/metrics/', metrics_view, name='metrics'),
     
     # Borrowers
     path('borrowers/', borrower_list_view, name='borrower_list'),
@@ -45,8 +52,18 @@ urlpatterns = [
     path('installments/overdue/', overdue_installments_view, name='overdue_installments'),
     path('installments/upcoming/', upcoming_dues_view, name='upcoming_dues'),
     path('payments/', all_payments_view, name='all_payments'),
+    path('payments/import/', payment_import_view, name='payment_import'),
+    
+    # Reports
+    path('reports/aging/', aging_report_view, name='aging_report'),
+    path('reports/collections/', collection_report_view, name='collection_report'),
+    
+    # Exports
+    path('export/<str:dataset>/', export_view, name='export'),
     
     # AJAX endpoints
     path('ajax/calculate-loan/', calculate_loan_ajax, name='calculate_loan_ajax'),
+    path('ajax/loan-performance/', loan_performance_ajax, name='loan_performance_ajax'),
     path('ajax/mark-paid/<int:installment_id>/', mark_installment_paid_ajax, name='mark_installment_paid_ajax'),
+    path('ajax/aging-report/', aging_report_ajax, name='aging_report_ajax'),
 ]
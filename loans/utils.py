@@ -1,85 +1,148 @@
 from django.utils import timezone
-from django.db.models import Sum, Count, Q
+from django.db import transaction
+from django.db.models import Sum, Count, Q, F, Min, Max, Exists, OuterRef
+from django.db.models.functions import TruncMonth, TruncWeek
 from decimal import Decimal
-from datetime import datetime, timedelta
-from .models import Loan, Installment, Payment
+from datetime import date, datetime, timedelta
+from dateutil.relativedelta import relativedelta
+from .models import Borrower, Checkpoint, CollectionSnapshot, Loan, Installment, Payment, PerformanceSnapshot
 
 
 def get_dashboard_stats():
-    """Get dashboard statistics"""
+    """Get dashboard statistics with a fixed number of queries"""
     today = timezone.now().date()
-    current_month = today.month
-    current_year = today.year
+    month_start = today.replace(day=1)
+    next_month_start = month_start + relativedelta(months=1)
     
-    # Total amount disbursed
-    total_disbursed = Loan.objects.aggregate(
-        total=Sum('amount')
-    )['total'] or Decimal('0')
-    
-    # Total amount receivable (outstanding from all active loans)
-    total_receivable = Decimal('0')
-    for loan in Loan.objects.filter(status='ACTIVE'):
-        total_receivable += loan.get_outstanding_amount()
-    
-    # Expected income for current month
-    current_month_installments = Installment.objects.filter(
-        due_date__month=current_month,
-        due_date__year=current_year,
-        loan__status='ACTIVE'
+    # Loan-level totals: disbursed, receivable (outstanding from all active
+    # loans), active loans and borrowers
+    loan_totals = Loan.objects.aggregate(
+        total_disbursed=Sum('amount'),
+        total_receivable=Sum('outstanding_amount', filter=Q(status='ACTIVE')),
+        active_loans_count=Count('id', filter=Q(status='ACTIVE')),
+        total_borrowers=Count('borrower', distinct=True),
     )
     
-    expected_income = current_month_installments.aggregate(
-        total=Sum('amount_due')
-    )['total'] or Decimal('0')
+    # Installment-level totals: expected income for current month and overdue
+    # installments, restricted to the two due date windows they need
+    current_month = Q(due_date__gte=month_start, due_date__lt=next_month_start)
+    overdue = Q(due_date__lt=today, amount_paid__lt=F('amount_due'))
     
-    received_this_month = current_month_installments.aggregate(
-        total=Sum('amount_paid')
-    )['total'] or Decimal('0')
-    
-    pending_this_month = expected_income - received_this_month
-    
-    # Overdue installments
-    overdue_installments = Installment.objects.filter(
-        due_date__lt=today,
-        status__in=['PENDING', 'PARTIAL'],
+    installment_totals = Installment.objects.filter(
+        current_month | overdue,
         loan__status='ACTIVE'
+    ).aggregate(
+        expected_income=Sum('amount_due', filter=current_month),
+        received_this_month=Sum('amount_paid', filter=current_month),
+        overdue_count=Count('id', filter=overdue),
+        overdue_amount=Sum(F('amount_due') - F('amount_paid'), filter=overdue),
     )
     
-    overdue_count = overdue_installments.count()
-    overdue_amount = Decimal('0')
-    for installment in overdue_installments:
-        overdue_amount += installment.get_remaining_amount()
-    
-    # Active loans count
-    active_loans_count = Loan.objects.filter(status='ACTIVE').count()
-    
-    # Total borrowers
-    total_borrowers = Loan.objects.values('borrower').distinct().count()
+    expected_income = installment_totals['expected_income'] or Decimal('0')
+    received_this_month = installment_totals['received_this_month'] or Decimal('0')
     
     return {
-        'total_disbursed': total_disbursed,
-        'total_receivable': total_receivable,
+        'total_disbursed': loan_totals['total_disbursed'] or Decimal('0'),
+        'total_receivable': loan_totals['total_receivable'] or Decimal('0'),
         'expected_income': expected_income,
         'received_this_month': received_this_month,
-        'pending_this_month': pending_this_month,
-        'overdue_count': overdue_count,
-        'overdue_amount': overdue_amount,
-        'active_loans_count': active_loans_count,
-        'total_borrowers': total_borrowers,
+        'pending_this_month': expected_income - received_this_month,
+        'overdue_count': installment_totals['overdue_count'],
+        'overdue_amount': installment_totals['overdue_amount'] or Decimal('0'),
+        'active_loans_count': loan_totals['active_loans_count'],
+        'total_borrowers': loan_totals['total_borrowers'],
     }
 
 
 def get_upcoming_dues(days=7):
     """Get installments due in the next specified days"""
-    today = timezone.now().date()
-    future_date = today + timedelta(days=days)
-    
+    return get_upcoming_installments(days=days).select_related(
+        'loan', 'loan__borrower'
+    ).order_by('due_date')
+
+
+def _active_loan():
+    """
+    Exists() test for an installment's loan being active; unlike a join it
+    lets SQLite walk the unpaid due date index and probe loans by primary key.
+    """
+    return Exists(Loan.objects.filter(pk=OuterRef('loan_id'), status='ACTIVE'))
+
+
+def get_overdue_installments(today=None):
+    """Unpaid installments of active loans past their due date"""
+    return Installment.objects.overdue(today).filter(_active_loan())
+
+
+def get_upcoming_installments(days=30, today=None):
+    """Installments of active loans due in the next days with nothing paid yet (effective PENDING)"""
+    today = today or timezone.now().date()
     return Installment.objects.filter(
+        _active_loan(),
         due_date__gte=today,
-        due_date__lte=future_date,
-        status='PENDING',
-        loan__status='ACTIVE'
-    ).select_related('loan', 'loan__borrower').order_by('due_date')
+        due_date__lte=today + timedelta(days=days),
+        amount_paid=0
+    )
+
+
+def get_installment_totals(installments):
+    """Count, unpaid remainder and number of borrowers and due dates of an installment queryset, in one query"""
+    totals = installments.aggregate(
+        count=Count('id'),
+        amount=Sum(F('amount_due') - F('amount_paid')),
+        borrowers=Count('loan__borrower', distinct=True),
+        due_dates=Count('due_date', distinct=True),
+    )
+    totals['amount'] = totals['amount'] or Decimal('0')
+    return totals
+
+
+def get_weekly_totals(installments):
+    """Count and unpaid remainder per calendar week (Monday) of the due date"""
+    return list(installments.annotate(
+        week=TruncWeek('due_date')
+    ).order_by('week').values('week').annotate(
+        count=Count('id'),
+        amount=Sum(F('amount_due') - F('amount_paid'))
+    ))
+
+
+def group_installments_by_date(installments):
+    """One row per due date with its installment count, unpaid remainder and borrowers"""
+    return installments.order_by().values('due_date').annotate(
+        count=Count('id'),
+        amount=Sum(F('amount_due') - F('amount_paid')),
+        borrowers=Count('loan__borrower', distinct=True),
+    )
+
+
+def get_installment_borrowers(installments):
+    """Borrowers with at least one installment in the queryset"""
+    return Borrower.objects.filter(Exists(installments.filter(loan__borrower=OuterRef('pk'))))
+
+
+def get_borrower_rollup(installments, borrower_ids, today=None):
+    """
+    Per-borrower totals of an installment queryset for the given borrowers
+    (one page of get_installment_borrowers()), in one grouped query, as
+    {borrower_id: {'count', 'loans', 'amount', 'oldest_due_date', 'latest_due_date', 'days_overdue'}}.
+    """
+    today = today or timezone.now().date()
+    rows = installments.filter(
+        loan__borrower_id__in=borrower_ids
+    ).order_by().values('loan__borrower_id').annotate(
+        count=Count('id'),
+        loans=Count('loan', distinct=True),
+        amount=Sum(F('amount_due') - F('amount_paid')),
+        oldest_due_date=Min('due_date'),
+        latest_due_date=Max('due_date'),
+    )
+
+    rollup = {}
+    for row in rows:
+        row['days_overdue'] = max((today - row['oldest_due_date']).days, 0)
+        rollup[row.pop('loan__borrower_id')] = row
+    return rollup
 
 
 def get_recent_payments(limit=10):
@@ -108,31 +171,96 @@ def calculate_loan_details(principal, interest_rate, tenure_months):
     }
 
 
-def get_loan_performance_data():
-    """Get data for loan performance charts"""
-    # Monthly disbursement data for the last 12 months
+PERFORMANCE_MONTH_CHOICES = (12, 24, 60)
+
+
+def invalidate_performance_month(first_day, last_day=None):
+    """
+    Forget the persisted chart figures of the months from first_day's to
+    last_day's (or just first_day's). Only months that have ended are
+    persisted, so changes in the current month cost no query.
+    """
+    if not first_day:
+        return
+    # Payment.payment_date defaults to timezone.now(), a datetime, until saved and reloaded
+    first_day, last_day = (
+        timezone.localdate(day) if isinstance(day, datetime) else day for day in (first_day, last_day or first_day)
+    )
+    first_month = first_day.replace(day=1)
+    last_month = last_day.replace(day=1)
+    current_month = timezone.now().date().replace(day=1)
+    if first_month >= current_month:
+        return
+    PerformanceSnapshot.objects.filter(month__gte=first_month, month__lte=last_month).delete()
+
+
+def get_loan_performance_data(months=12):
+    """Get data for loan performance charts, one entry per calendar month"""
+    # Monthly disbursement data for the last N calendar months, current month included
     today = timezone.now().date()
-    twelve_months_ago = today - timedelta(days=365)
+    current_month = today.replace(day=1)
+    month_starts = [
+        current_month - relativedelta(months=i) for i in range(months - 1, -1, -1)
+    ]
+    
+    # Months that have already ended are served from PerformanceSnapshot, so
+    # every process sees the same figures and invalidations; only the current
+    # month and closed months without a snapshot are aggregated
+    snapshots = {
+        snapshot.month: snapshot
+        for snapshot in PerformanceSnapshot.objects.filter(month__gte=month_starts[0], month__lt=current_month)
+    }
+    missing = [month_start for month_start in month_starts if month_start not in snapshots]
+    
+    range_start = missing[0]
+    range_end = current_month + relativedelta(months=1)
+    
+    disbursed_by_month = dict(
+        Loan.objects.filter(
+            start_date__gte=range_start,
+            start_date__lt=range_end
+        ).annotate(month=TruncMonth('start_date')).values('month').annotate(
+            total=Sum('amount')
+        ).order_by().values_list('month', 'total')
+    )
+    
+    collected_by_month = dict(
+        Payment.objects.filter(
+            payment_date__gte=range_start,
+            payment_date__lt=range_end
+        ).annotate(month=TruncMonth('payment_date')).values('month').annotate(
+            total=Sum('amount')
+        ).order_by().values_list('month', 'total')
+    )
+    
+    closed = [month_start for month_start in missing if month_start < current_month]
+    if closed:
+        PerformanceSnapshot.objects.bulk_create(
+            [
+                PerformanceSnapshot(
+                    month=month_start,
+                    disbursed=disbursed_by_month.get(month_start) or Decimal('0'),
+                    collected=collected_by_month.get(month_start) or Decimal('0'),
+                )
+                for month_start in closed
+            ],
+            update_conflicts=True,
+            unique_fields=['month'],
+            update_fields=['disbursed', 'collected', 'computed_at'],
+        )
     
     monthly_data = []
-    for i in range(12):
-        month_start = twelve_months_ago + timedelta(days=30*i)
-        month_end = month_start + timedelta(days=30)
-        
-        disbursed = Loan.objects.filter(
-            start_date__gte=month_start,
-            start_date__lt=month_end
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
-        
-        collected = Payment.objects.filter(
-            payment_date__gte=month_start,
-            payment_date__lt=month_end
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
-        
+    for month_start in month_starts:
+        if month_start in snapshots:
+            disbursed = snapshots[month_start].disbursed
+            collected = snapshots[month_start].collected
+        else:
+            disbursed = disbursed_by_month.get(month_start)
+            collected = collected_by_month.get(month_start)
         monthly_data.append({
             'month': month_start.strftime('%b %Y'),
-            'disbursed': float(disbursed),
-            'collected': float(collected)
+            'disbursed': float(disbursed or 0),
+            'collected': float(collected or 0)
         })
     
     return monthly_data
@@ -151,11 +279,7 @@ def get_borrower_loan_summary(borrower):
         if loan.status == 'ACTIVE':
             total_outstanding += loan.get_outstanding_amount()
     
-    overdue_installments = Installment.objects.filter(
-        loan__borrower=borrower,
-        due_date__lt=timezone.now().date(),
-        status__in=['PENDING', 'PARTIAL']
-    ).count()
+    overdue_installments = Installment.objects.filter(loan__borrower=borrower).overdue().count()
     
     return {
         'total_borrowed': total_borrowed,
@@ -167,30 +291,225 @@ def get_borrower_loan_summary(borrower):
     }
 
 
+STATUS_WATERMARK = 'refresh_installment_status'
+
+
 def update_overdue_statuses():
-    """Update installment statuses for overdue items"""
-    today = timezone.now().date()
-    
-    # Update overdue installments
-    overdue_installments = Installment.objects.filter(
-        due_date__lt=today,
-        status='PENDING'
-    )
-    
-    updated_count = overdue_installments.update(status='OVERDUE')
-    return updated_count
+    """Update installment statuses for overdue items; leaves the watermark of refresh_installment_status alone"""
+    return refresh_overdue_statuses()['installments']
+
+
+def refresh_overdue_statuses(today=None, chunk_days=7, full=False, progress=None, watermark=None):
+    """
+    Bring stored statuses and loan overdue amounts up to date for installments
+    whose due date has passed since the last run.
+
+    Only unpaid installments due between the watermark (the day of the last
+    run) and today can change, so each chunk is one short transaction over a
+    due-date range, served by the partial unpaid index: PENDING rows get
+    their status from InstallmentQuerySet.refresh_statuses() (the rules of
+    Installment.update_status()), and the owning loans, PARTIAL ones
+    included, get their overdue_amount recomputed.
+
+    watermark names the Checkpoint a scheduled job resumes from; it moves
+    with every chunk, so an interrupted run loses nothing, and full=True
+    starts again from the oldest unpaid installment. Without one (ad hoc
+    calls) every unpaid installment is checked and no Checkpoint is touched.
+    """
+    today = today or timezone.now().date()
+    position = Checkpoint.get(watermark) if watermark and not full else None
+    if position:
+        start = date.fromisoformat(position)
+    else:
+        start = Installment.objects.filter(
+            amount_paid__lt=F('amount_due')
+        ).aggregate(oldest=Min('due_date'))['oldest'] or today
+
+    totals = {'chunks': 0, 'installments': 0, 'loan_refreshes': 0, 'start': start, 'end': today}
+    while start < today:
+        end = min(start + timedelta(days=chunk_days), today)
+        unpaid = Installment.objects.filter(
+            due_date__gte=start,
+            due_date__lt=end,
+            amount_paid__lt=F('amount_due')
+        )
+        with transaction.atomic():
+            totals['installments'] += unpaid.filter(status='PENDING').refresh_statuses(today)
+            totals['loan_refreshes'] += Loan.objects.filter(
+                pk__in=unpaid.values('loan_id')
+            ).refresh_balances(today)
+            if watermark:
+                Checkpoint.set(watermark, end.isoformat())
+        totals['chunks'] += 1
+        if progress:
+            progress(start, end, totals)
+        start = end
+
+    if watermark and not position and not totals['chunks']:
+        # Nothing unpaid is past due yet; later runs start from today
+        Checkpoint.set(watermark, today.isoformat())
+    return totals
+
+
+def invalidate_collection_months(first_day, last_day=None):
+    """
+    Forget the persisted collection figures of the months from first_day's
+    to last_day's (or just first_day's). Only months that have ended are
+    persisted, so changes in the current month cost no query.
+    """
+    if not first_day:
+        return
+    first_month = first_day.replace(day=1)
+    last_month = (last_day or first_day).replace(day=1)
+    current_month = timezone.now().date().replace(day=1)
+    if first_month >= current_month:
+        return
+    CollectionSnapshot.objects.filter(month__gte=first_month, month__lte=last_month).delete()
+
+
+def _compute_collection_months(first_month, last_month):
+    """
+    Collection figures of every month from first_month to last_month, keyed
+    by month start. Two grouped queries cover the whole range: installments
+    by due month, and their payments by due month and method (one query
+    would join the two and count amount_due once per payment).
+    """
+    due_range = {
+        'due_date__gte': first_month,
+        'due_date__lt': last_month + relativedelta(months=1),
+    }
+    months = {}
+    for row in Installment.objects.filter(**due_range).annotate(
+        month=TruncMonth('due_date')
+    ).values('month').annotate(
+        total_due=Sum('amount_due'),
+        total_collected=Sum('amount_paid'),
+        installments_count=Count('id'),
+        paid_count=Count('id', filter=Q(amount_paid__gte=F('amount_due'))),
+    ).order_by():
+        months[row.pop('month')] = dict(row, by_method={})
+
+    for month, method, total in Payment.objects.filter(
+        **{f'installment__{lookup}': value for lookup, value in due_range.items()}
+    ).annotate(
+        month=TruncMonth('installment__due_date')
+    ).values('month', 'payment_method').annotate(
+        total=Sum('amount')
+    ).order_by().values_list('month', 'payment_method', 'total'):
+        if month in months:
+            months[month]['by_method'][method] = total
+    return months
+
+
+def _collection_entry(month, figures=None):
+    """Report row of one month from computed figures or a CollectionSnapshot"""
+    if isinstance(figures, CollectionSnapshot):
+        figures = {
+            'total_due': figures.total_due,
+            'total_collected': figures.total_collected,
+            'installments_count': figures.installments_count,
+            'paid_count': figures.paid_count,
+            'by_method': {method: Decimal(total) for method, total in figures.by_method.items()},
+        }
+    figures = figures or {}
+    total_due = figures.get('total_due') or Decimal('0')
+    total_collected = figures.get('total_collected') or Decimal('0')
+    return {
+        'month': month,
+        'total_due': total_due,
+        'total_collected': total_collected,
+        'collection_rate': (total_collected / total_due * 100) if total_due > 0 else 0,
+        'installments_count': figures.get('installments_count') or 0,
+        'paid_count': figures.get('paid_count') or 0,
+        'by_method': figures.get('by_method') or {},
+    }
+
+
+def get_collection_report(start_month, end_month):
+    """
+    Per-month due, collected, collection rate and payment-method breakdown of
+    the installments due from start_month to end_month (inclusive), with
+    totals over the range. Months that have ended are served from
+    CollectionSnapshot; missing ones are computed and persisted, so only the
+    current month (and months invalidated by a change) hit the installment
+    table.
+    """
+    start_month = start_month.replace(day=1)
+    end_month = end_month.replace(day=1)
+    current_month = timezone.now().date().replace(day=1)
+    month_starts = []
+    month_start = start_month
+    while month_start <= end_month:
+        month_starts.append(month_start)
+        month_start += relativedelta(months=1)
+
+    snapshots = {
+        snapshot.month: snapshot
+        for snapshot in CollectionSnapshot.objects.filter(month__gte=start_month, month__lte=end_month)
+    }
+    missing = [month_start for month_start in month_starts if month_start not in snapshots]
+    # One pass per run of consecutive missing months, so an invalidated old
+    # month and the current one do not pull in the whole range between them
+    computed = {}
+    run = []
+    for month_start in missing:
+        if run and month_start != run[-1] + relativedelta(months=1):
+            computed.update(_compute_collection_months(run[0], run[-1]))
+            run = []
+        run.append(month_start)
+    if run:
+        computed.update(_compute_collection_months(run[0], run[-1]))
+
+    closed = [month_start for month_start in missing if month_start < current_month]
+    if closed:
+        fields = ['total_due', 'total_collected', 'installments_count', 'paid_count', 'by_method']
+        CollectionSnapshot.objects.bulk_create(
+            [
+                CollectionSnapshot(month=month_start, **{
+                    field: _collection_entry(month_start, computed.get(month_start))[field] for field in fields
+                })
+                for month_start in closed
+            ],
+            update_conflicts=True,
+            unique_fields=['month'],
+            update_fields=fields + ['computed_at'],
+        )
+
+    months = [
+        _collection_entry(month_start, snapshots.get(month_start) or computed.get(month_start))
+        for month_start in month_starts
+    ]
+    total_due = sum((entry['total_due'] for entry in months), Decimal('0'))
+    total_collected = sum((entry['total_collected'] for entry in months), Decimal('0'))
+    by_method = {}
+    for entry in months:
+        for method, total in entry['by_method'].items():
+            by_method[method] = by_method.get(method, Decimal('0')) + total
+    return {
+        'months': months,
+        'total_due': total_due,
+        'total_collected': total_collected,
+        'collection_rate': (total_collected / total_due * 100) if total_due > 0 else 0,
+        'by_method': by_method,
+    }
 
 
 def get_monthly_collection_report(year, month):
-    """Get collection report for a specific month"""
+    """
+    Get collection report for a specific month, over active loans only.
+    get_collection_report() counts closed and defaulted loans too, so that
+    the figures of a past month do not change when a loan is closed.
+    """
+    month_start = date(year, month, 1)
     installments = Installment.objects.filter(
-        due_date__year=year,
-        due_date__month=month,
+        due_date__gte=month_start,
+        due_date__lt=month_start + relativedelta(months=1),
         loan__status='ACTIVE'
     ).select_related('loan', 'loan__borrower')
     
-    total_due = installments.aggregate(total=Sum('amount_due'))['total'] or Decimal('0')
-    total_collected = installments.aggregate(total=Sum('amount_paid'))['total'] or Decimal('0')
+    totals = installments.aggregate(total_due=Sum('amount_due'), total_collected=Sum('amount_paid'))
+    total_due = totals['total_due'] or Decimal('0')
+    total_collected = totals['total_collected'] or Decimal('0')
     
     collection_rate = (total_collected / total_due * 100) if total_due > 0 else 0
     
@@ -202,6 +521,108 @@ def get_monthly_collection_report(year, month):
     }
 
 
+AGING_BUCKETS = [
+    ('current', 'Current'),
+    ('1_30', '1-30 days'),
+    ('31_60', '31-60 days'),
+    ('61_90', '61-90 days'),
+    ('90_plus', '90+ days'),
+]
+
+
+def get_aging_bucket_filters(today=None):
+    """
+    Q per aging bucket of unpaid installments, by days overdue. The buckets
+    are due date ranges, so they need no per-row date math and can use the
+    due date indexes.
+    """
+    today = today or timezone.now().date()
+
+    def due(**lookups):
+        return Q(**{f'due_date__{lookup}': value for lookup, value in lookups.items()})
+
+    def days_ago(days):
+        return today - timedelta(days=days)
+
+    return {
+        'current': due(gte=today),
+        '1_30': due(gte=days_ago(30), lt=today),
+        '31_60': due(gte=days_ago(60), lt=days_ago(30)),
+        '61_90': due(gte=days_ago(90), lt=days_ago(60)),
+        '90_plus': due(lt=days_ago(90)),
+    }
+
+
+def get_aging_aggregates(today=None):
+    """Conditional aggregates <bucket>_amount (unpaid remainder) and <bucket>_count for every bucket"""
+    remaining = F('amount_due') - F('amount_paid')
+    aggregates = {}
+    for key, bucket in get_aging_bucket_filters(today).items():
+        aggregates[f'{key}_amount'] = Sum(remaining, filter=bucket)
+        aggregates[f'{key}_count'] = Count('id', filter=bucket)
+    return aggregates
+
+
+def get_aging_summary(today=None):
+    """Receivables of active loans per aging bucket, by amount and count, in one query"""
+    totals = Installment.objects.unpaid().filter(
+        _active_loan()
+    ).aggregate(**get_aging_aggregates(today))
+
+    buckets = [
+        {
+            'key': key,
+            'label': label,
+            'amount': totals[f'{key}_amount'] or Decimal('0'),
+            'count': totals[f'{key}_count'],
+        }
+        for key, label in AGING_BUCKETS
+    ]
+    return {
+        'buckets': buckets,
+        'total_amount': sum((bucket['amount'] for bucket in buckets), Decimal('0')),
+        'total_count': sum(bucket['count'] for bucket in buckets),
+        'overdue_amount': sum((bucket['amount'] for bucket in buckets[1:]), Decimal('0')),
+    }
+
+
+def get_aging_borrowers():
+    """Borrowers with something unpaid on an active loan, i.e. the rows of the per-borrower breakdown"""
+    return Borrower.objects.filter(
+        Exists(Installment.objects.unpaid().filter(loan__borrower=OuterRef('pk'), loan__status='ACTIVE'))
+    )
+
+
+def get_aging_by_borrower(borrower_ids, today=None):
+    """
+    Aging buckets of the given borrowers in one grouped query, as
+    {borrower_id: {'<bucket>_amount': ..., '<bucket>_count': ...}}. Meant for
+    one page of get_aging_borrowers(); grouping the whole book per borrower
+    and sorting it is what makes a full breakdown slow.
+    """
+    rows = Installment.objects.unpaid().filter(
+        loan__status='ACTIVE',
+        loan__borrower_id__in=borrower_ids
+    ).order_by().values('loan__borrower_id').annotate(**get_aging_aggregates(today))
+
+    aging = {}
+    for row in rows:
+        borrower_id = row.pop('loan__borrower_id')
+        aging[borrower_id] = {
+            key: value if value is not None else Decimal('0')
+            for key, value in row.items()
+        }
+    return aging
+
+
+def get_aging_bucket_installments(bucket, today=None):
+    """Unpaid installments of active loans in one aging bucket (the drill-down)"""
+    return Installment.objects.unpaid().filter(
+        get_aging_bucket_filters(today)[bucket],
+        _active_loan()
+    ).with_effective_status(today).select_related('loan', 'loan__borrower')
+
+
 def validate_file_upload(file):
     """Validate uploaded files"""
     if not file:
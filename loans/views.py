@@ -1,4 +1,4 @@
-from .dashboard import dashboard_view, home_view
+from .dashboard import dashboard_view, home_view, dashboard_cache_stats_view, metrics_view, loan_performance_ajax
 from .borrowers import (
     borrower_list_view, borrower_detail_view, borrower_add_view, 
     borrower_edit_view, borrower_delete_view
@@ -9,5 +9,8 @@ from .loans import (
 )
 from .installments import (
     installment_pay_view, payment_history_view, mark_installment_paid_ajax,
-    overdue_installments_view, upcoming_dues_view, all_payments_view
+    overdue_installments_view, upcoming_dues_view, all_payments_view,
+    payment_import_view
 )
+from .exports import export_view
+from .reports import aging_report_view, aging_report_ajax, collection_report_view
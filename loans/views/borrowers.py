@@ -10,11 +10,11 @@ from ..utils import get_borrower_loan_summary
 
 @login_required
 def borrower_list_view(request):
-    """List all borrowers with search functionality"""
+    """List all borrowers with search and sort functionality"""
     search_form = BorrowerSearchForm(request.GET)
-    borrowers = Borrower.objects.all()
+    borrowers = Borrower.objects.with_loan_summary()
     
-    # Apply search filter
+    # Apply search filter and sorting
     if search_form.is_valid():
         search_query = search_form.cleaned_data.get('search')
         if search_query:
@@ -23,6 +23,10 @@ def borrower_list_view(request):
                 Q(phone__icontains=search_query) |
                 Q(email__icontains=search_query)
             )
+        
+        sort = search_form.cleaned_data.get('sort')
+        if sort:
+            borrowers = borrowers.order_by(sort, 'name', 'id')
     
     # Pagination
     paginator = Paginator(borrowers, 20)
@@ -1,9 +1,15 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.utils import timezone
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, JsonResponse
 from ..models import Loan, Installment, Borrower, Payment
-from ..utils import get_dashboard_stats, get_upcoming_dues, get_recent_payments
+from ..utils import get_loan_performance_data, get_overdue_installments, PERFORMANCE_MONTH_CHOICES
+from ..cache import (
+    get_cached_dashboard_stats, get_cached_upcoming_dues, get_cached_recent_payments,
+    get_dashboard_cache_stats
+)
+from ..metrics import render_prometheus
 
 
 @login_required
@@ -11,20 +17,18 @@ def dashboard_view(request):
     """Dashboard view with key statistics and recent activities"""
     
     # Get dashboard statistics
-    stats = get_dashboard_stats()
+    stats = get_cached_dashboard_stats()
     
-    # Get upcoming dues (next 7 days)
-    upcoming_dues = get_upcoming_dues(days=7)
+    # Get the first upcoming dues (next 7 days); the full list is paginated on its own page
+    upcoming_dues = get_cached_upcoming_dues(days=7, limit=10)
     
     # Get recent payments
-    recent_payments = get_recent_payments(limit=5)
+    recent_payments = get_cached_recent_payments(limit=5)
     
     # Get overdue installments
-    overdue_installments = Installment.objects.filter(
-        due_date__lt=timezone.now().date(),
-        status__in=['PENDING', 'PARTIAL'],
-        loan__status='ACTIVE'
-    ).select_related('loan', 'loan__borrower').order_by('due_date')[:10]
+    overdue_installments = get_overdue_installments().with_effective_status().select_related(
+        'loan', 'loan__borrower'
+    ).order_by('due_date')[:10]
     
     context = {
         'stats': stats,
@@ -37,6 +41,34 @@ def dashboard_view(request):
     return render(request, 'loans/dashboard.html', context)
 
 
+@login_required
+def loan_performance_ajax(request):
+    """AJAX endpoint with monthly disbursed/collected chart data"""
+    try:
+        months = int(request.GET.get('months', 12))
+    except (TypeError, ValueError):
+        months = 12
+    if months not in PERFORMANCE_MONTH_CHOICES:
+        months = 12
+    
+    return JsonResponse({
+        'months': months,
+        'data': get_loan_performance_data(months=months)
+    })
+
+
+@staff_member_required
+def dashboard_cache_stats_view(request):
+    """Hit/miss counters of the dashboard cache in this server process"""
+    return JsonResponse(get_dashboard_cache_stats())
+
+
+@staff_member_required
+def metrics_view(request):
+    """Per-view request/query metrics and cache counters of this server process, for Prometheus"""
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 def home_view(request):
     """Redirect to dashboard"""
     return redirect('dashboard')
@@ -0,0 +1,29 @@
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from ..exports import EXPORT_DATASETS, EXPORT_FORMATS, iter_export
+
+
+@login_required
+def export_view(request, dataset):
+    """Stream a full payments/installments/loans export as CSV or JSON lines"""
+    if dataset not in EXPORT_DATASETS:
+        raise Http404('Unknown export')
+    
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        export_format = 'csv'
+    
+    response = StreamingHttpResponse(
+        iter_export(
+            dataset,
+            export_format,
+            borrower=request.GET.get('borrower'),
+            date_from=request.GET.get('date_from'),
+            date_to=request.GET.get('date_to'),
+        ),
+        content_type='text/csv' if export_format == 'csv' else 'application/x-ndjson',
+    )
+    filename = f'{dataset}-{timezone.now().date().isoformat()}.{export_format}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
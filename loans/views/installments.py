@@ -4,8 +4,46 @@ from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone
+import codecs
 from ..models import Installment, Payment
-from ..forms import PaymentForm
+from ..forms import PaymentForm, PaymentImportForm
+from ..exports import filter_ledger
+from ..imports import PAYMENT_IMPORT_COLUMNS, PaymentImport
+from ..pagination import CursorPaginator
+from ..cache import get_cached_overdue_totals, get_cached_upcoming_totals
+from ..utils import (
+    get_overdue_installments, get_upcoming_installments, group_installments_by_date,
+    get_installment_borrowers, get_borrower_rollup
+)
+
+
+def _get_grouped_page(request, installments, today):
+    """
+    Keyset page of an installment list, as picked by ?group=: one row per
+    installment (default), per due date, or per borrower with a rollup of
+    their installments attached as `rollup`. Returns (group, page).
+    """
+    group = request.GET.get('group')
+    cursor = request.GET.get('cursor')
+
+    if group == 'date':
+        paginator = CursorPaginator(group_installments_by_date(installments), 50, ['due_date'])
+        return group, paginator.get_page(cursor)
+
+    if group == 'borrower':
+        paginator = CursorPaginator(get_installment_borrowers(installments), 25, ['name', 'id'])
+        page = paginator.get_page(cursor)
+        rollup = get_borrower_rollup(installments, [borrower.id for borrower in page], today)
+        for borrower in page:
+            borrower.rollup = rollup.get(borrower.id, {})
+        return group, page
+
+    paginator = CursorPaginator(
+        installments.with_effective_status(today).select_related('loan', 'loan__borrower'),
+        50,
+        ['due_date', 'id']
+    )
+    return 'installment', paginator.get_page(cursor)
 
 
 @login_required
@@ -51,7 +89,7 @@ def installment_pay_view(request, installment_id):
 def payment_history_view(request, installment_id):
     """View payment history for an installment"""
     installment = get_object_or_404(
-        Installment.objects.select_related('loan', 'loan__borrower'), 
+        Installment.objects.with_effective_status().select_related('loan', 'loan__borrower'), 
         id=installment_id
     )
     payments = installment.payments.all().order_by('-payment_date')
@@ -104,20 +142,14 @@ def mark_installment_paid_ajax(request, installment_id):
 
 @login_required
 def overdue_installments_view(request):
-    """View all overdue installments"""
-    overdue_installments = Installment.objects.filter(
-        due_date__lt=timezone.now().date(),
-        status__in=['PENDING', 'PARTIAL'],
-        loan__status='ACTIVE'
-    ).select_related('loan', 'loan__borrower').order_by('due_date')
-    
-    total_overdue_amount = sum(
-        installment.get_remaining_amount() for installment in overdue_installments
-    )
+    """View all overdue installments, paginated, optionally grouped by due date or borrower"""
+    today = timezone.now().date()
+    group, page_obj = _get_grouped_page(request, get_overdue_installments(today), today)
     
     context = {
-        'overdue_installments': overdue_installments,
-        'total_overdue_amount': total_overdue_amount,
+        'group': group,
+        'page_obj': page_obj,
+        'totals': get_cached_overdue_totals(),
         'title': 'Overdue Installments'
     }
     
@@ -126,24 +158,14 @@ def overdue_installments_view(request):
 
 @login_required
 def upcoming_dues_view(request):
-    """View upcoming dues for the next 30 days"""
+    """View upcoming dues for the next 30 days, paginated, optionally grouped by due date or borrower"""
     today = timezone.now().date()
-    future_date = today + timezone.timedelta(days=30)
-    
-    upcoming_installments = Installment.objects.filter(
-        due_date__gte=today,
-        due_date__lte=future_date,
-        status='PENDING',
-        loan__status='ACTIVE'
-    ).select_related('loan', 'loan__borrower').order_by('due_date')
-    
-    total_upcoming_amount = sum(
-        installment.amount_due for installment in upcoming_installments
-    )
+    group, page_obj = _get_grouped_page(request, get_upcoming_installments(days=30, today=today), today)
     
     context = {
-        'upcoming_installments': upcoming_installments,
-        'total_upcoming_amount': total_upcoming_amount,
+        'group': group,
+        'page_obj': page_obj,
+        'totals': get_cached_upcoming_totals(days=30),
         'title': 'Upcoming Dues (Next 30 Days)'
     }
     
@@ -157,26 +179,16 @@ def all_payments_view(request):
         'installment', 'installment__loan', 'installment__loan__borrower'
     ).order_by('-payment_date')
     
-    # Add filtering logic here if needed
     borrower_filter = request.GET.get('borrower')
-    if borrower_filter:
-        payments = payments.filter(
-            installment__loan__borrower__name__icontains=borrower_filter
-        )
-    
     date_from = request.GET.get('date_from')
-    if date_from:
-        payments = payments.filter(payment_date__gte=date_from)
-    
     date_to = request.GET.get('date_to')
-    if date_to:
-        payments = payments.filter(payment_date__lte=date_to)
+    payments = filter_ledger(
+        payments, 'payments', borrower=borrower_filter, date_from=date_from, date_to=date_to
+    )
     
-    # Pagination
-    from django.core.paginator import Paginator
-    paginator = Paginator(payments, 50)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination: deep pages cost the same as the first one
+    paginator = CursorPaginator(payments, 50, ordering=['-payment_date', '-id'], count_limit=1000)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     
     context = {
         'page_obj': page_obj,
@@ -187,3 +199,41 @@ def all_payments_view(request):
     }
     
     return render(request, 'loans/all_payments.html', context)
+
+
+@login_required
+def payment_import_view(request):
+    """Validate and import a CSV of collected payments in bulk"""
+    summary = None
+    errors = []
+    
+    if request.method == 'POST':
+        form = PaymentImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            lines = codecs.iterdecode(form.cleaned_data['csv_file'], 'utf-8-sig')
+            try:
+                payment_import = PaymentImport.from_csv(lines)
+            except UnicodeDecodeError:
+                form.add_error('csv_file', 'The file is not UTF-8 encoded CSV.')
+            else:
+                summary = payment_import.summary()
+                errors = payment_import.errors
+                if payment_import.is_valid() and not form.cleaned_data['dry_run']:
+                    closed = payment_import.apply()
+                    message = f"Imported {summary['payments']} payments totalling ₹{summary['total_amount']:,.2f}."
+                    if closed:
+                        message += f' {closed} loans are now fully paid and closed.'
+                    messages.success(request, message)
+                    return redirect('all_payments')
+    else:
+        form = PaymentImportForm()
+    
+    context = {
+        'form': form,
+        'summary': summary,
+        'errors': errors,
+        'columns': PAYMENT_IMPORT_COLUMNS,
+        'title': 'Import Payments'
+    }
+    
+    return render(request, 'loans/payment_import.html', context)
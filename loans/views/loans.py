@@ -2,19 +2,30 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
-from django.db.models import Q
+from django.db.models import F, Q
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from ..models import Loan, Borrower, Installment
 from ..forms import LoanForm, LoanSearchForm
+from ..pagination import CursorPaginator
 from ..utils import calculate_loan_details
 
 
+# Stored, indexed columns only: each page reads the first rows of an index
+# instead of sorting the whole loan table
+LOAN_LIST_ORDERING = {
+    'outstanding': ['-outstanding_amount', 'id'],
+    # Earliest unpaid installment first: most overdue loans, then the rest by next due date
+    'overdue': [F('first_unpaid_due_date').asc(nulls_last=True), 'id'],
+}
+
+
 @login_required
 def loan_list_view(request):
-    """List all loans with search and filter functionality"""
+    """List all loans with search, filter and sort functionality"""
     search_form = LoanSearchForm(request.GET)
-    loans = Loan.objects.select_related('borrower').all()
+    loans = Loan.objects.select_related('borrower').with_schedule_summary()
+    sort = None
     
     # Apply filters
     if search_form.is_valid():
@@ -34,14 +45,23 @@ def loan_list_view(request):
         
         if start_date_to:
             loans = loans.filter(start_date__lte=start_date_to)
-    
-    # Pagination
-    paginator = Paginator(loans, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+        
+        sort = search_form.cleaned_data.get('sort')
+        if sort:
+            loans = loans.order_by(*LOAN_LIST_ORDERING[sort])
+    
+    # Pagination: keyset on the default (start_date, id) order, numbered
+    # pages for the other sort keys
+    if sort:
+        paginator = Paginator(loans, 20)
+        page_obj = paginator.get_page(request.GET.get('page'))
+    else:
+        paginator = CursorPaginator(loans, 20, ordering=['-start_date', '-id'], count_limit=1000)
+        page_obj = paginator.get_page(request.GET.get('cursor'))
     
     context = {
         'page_obj': page_obj,
+        'cursor_pagination': not sort,
         'search_form': search_form,
         'title': 'Loans'
     }
@@ -53,7 +73,7 @@ def loan_list_view(request):
 def loan_detail_view(request, loan_id):
     """View loan details with installment schedule"""
     loan = get_object_or_404(Loan.objects.select_related('borrower'), id=loan_id)
-    installments = loan.installments.all().order_by('due_date')
+    installments = loan.installments.with_effective_status().order_by('due_date')
     
     # Calculate loan statistics
     total_paid = loan.get_paid_amount()
@@ -110,6 +130,7 @@ def loan_edit_view(request, loan_id):
             # Delete existing installments and recreate them
             loan.installments.all().delete()
             loan = form.save()
+            loan.generate_installments()
             messages.success(request, f'Loan for "{loan.borrower.name}" updated successfully!')
             return redirect('loan_detail', loan_id=loan.id)
     else:
@@ -203,7 +224,7 @@ def calculate_loan_ajax(request):
 def installment_schedule_view(request, loan_id):
     """View detailed installment schedule for a loan"""
     loan = get_object_or_404(Loan.objects.select_related('borrower'), id=loan_id)
-    installments = loan.installments.all().order_by('installment_number')
+    installments = loan.installments.with_effective_status().order_by('installment_number')
     
     context = {
         'loan': loan,
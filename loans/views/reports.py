@@ -0,0 +1,165 @@
+from datetime import date, datetime
+from dateutil.relativedelta import relativedelta
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import render
+from django.utils import timezone
+from ..cache import get_cached_aging_summary, get_cached_collection_report
+from ..models import Payment
+from ..pagination import CursorPaginator
+from ..utils import (
+    AGING_BUCKETS, get_aging_borrowers, get_aging_by_borrower, get_aging_bucket_installments
+)
+
+
+AGING_PAGE_SIZE = 25
+AGING_DRILLDOWN_PAGE_SIZE = 50
+COLLECTION_REPORT_MAX_MONTHS = 120
+# Months ?from= and ?to= may name; the report also reads the year before
+# and the month after, which must stay within the years date supports
+COLLECTION_REPORT_MONTHS = (date(1900, 1, 1), date(2999, 12, 1))
+
+
+def _get_aging_page(request, today):
+    """
+    Page of the per-borrower breakdown, or of one bucket's installments when
+    ?bucket= names a bucket. Returns (bucket, page); the borrowers on the page
+    carry an `aging` dict of <bucket>_amount/<bucket>_count values.
+    """
+    bucket = request.GET.get('bucket')
+    cursor = request.GET.get('cursor')
+
+    if bucket in dict(AGING_BUCKETS):
+        paginator = CursorPaginator(
+            get_aging_bucket_installments(bucket, today), AGING_DRILLDOWN_PAGE_SIZE, ['due_date', 'id']
+        )
+        return bucket, paginator.get_page(cursor)
+
+    paginator = CursorPaginator(get_aging_borrowers(), AGING_PAGE_SIZE, ['name', 'id'])
+    page = paginator.get_page(cursor)
+    aging = get_aging_by_borrower([borrower.id for borrower in page], today)
+    for borrower in page:
+        borrower.aging = aging.get(borrower.id, {})
+        borrower.aging_buckets = [
+            (borrower.aging.get(f'{key}_amount', 0), borrower.aging.get(f'{key}_count', 0))
+            for key, _ in AGING_BUCKETS
+        ]
+    return None, page
+
+
+@login_required
+def aging_report_view(request):
+    """Receivables aging: bucket totals, a per-borrower breakdown and a drill-down into each bucket"""
+    today = timezone.now().date()
+    bucket, page_obj = _get_aging_page(request, today)
+
+    context = {
+        'summary': get_cached_aging_summary(),
+        'buckets': AGING_BUCKETS,
+        'bucket': bucket,
+        'bucket_label': dict(AGING_BUCKETS).get(bucket),
+        'page_obj': page_obj,
+        'today': today,
+        'title': 'Aging Report'
+    }
+    return render(request, 'loans/aging_report.html', context)
+
+
+@login_required
+def aging_report_ajax(request):
+    """JSON aging report; same paging as the HTML view, with ?bucket= for the drill-down"""
+    today = timezone.now().date()
+    bucket, page_obj = _get_aging_page(request, today)
+    summary = get_cached_aging_summary()
+
+    if bucket:
+        rows = [
+            {
+                'installment_id': installment.id,
+                'loan_id': installment.loan_id,
+                'borrower_id': installment.loan.borrower_id,
+                'borrower': installment.loan.borrower.name,
+                'installment_number': installment.installment_number,
+                'due_date': installment.due_date,
+                'days_overdue': installment.overdue_days,
+                'amount_due': installment.amount_due,
+                'amount_paid': installment.amount_paid,
+                'remaining': installment.get_remaining_amount(),
+                'status': installment.effective_status,
+            }
+            for installment in page_obj
+        ]
+    else:
+        rows = [
+            {'borrower_id': borrower.id, 'borrower': borrower.name, **borrower.aging}
+            for borrower in page_obj
+        ]
+
+    return JsonResponse({
+        'as_of': today,
+        'buckets': summary['buckets'],
+        'total_amount': summary['total_amount'],
+        'total_count': summary['total_count'],
+        'bucket': bucket,
+        'results': rows,
+        'next_cursor': page_obj.next_cursor,
+        'previous_cursor': page_obj.previous_cursor,
+    })
+
+
+def _parse_month(value):
+    """First day of a YYYY-MM month, or None when missing, invalid or outside COLLECTION_REPORT_MONTHS"""
+    try:
+        month = datetime.strptime(value or '', '%Y-%m').date()
+    except ValueError:
+        return None
+    first_month, last_month = COLLECTION_REPORT_MONTHS
+    return month if first_month <= month <= last_month else None
+
+
+@login_required
+def collection_report_view(request):
+    """Monthly due/collected/rate with payment methods over a month range, next to the year before"""
+    current_month = timezone.now().date().replace(day=1)
+    end_month = _parse_month(request.GET.get('to')) or current_month
+    start_month = _parse_month(request.GET.get('from')) or end_month - relativedelta(months=11)
+    if start_month > end_month:
+        start_month, end_month = end_month, start_month
+    start_month = max(start_month, end_month - relativedelta(months=COLLECTION_REPORT_MAX_MONTHS - 1))
+
+    # One report over both years; closed months come from the persisted snapshots
+    report = get_cached_collection_report(start_month - relativedelta(months=12), end_month)
+    by_month = {entry['month']: entry for entry in report['months']}
+    methods = Payment._meta.get_field('payment_method').choices
+
+    rows = []
+    for entry in report['months']:
+        if entry['month'] < start_month:
+            continue
+        previous = by_month[entry['month'] - relativedelta(months=12)]
+        rows.append({
+            **entry,
+            'methods': [entry['by_method'].get(key, 0) for key, _ in methods],
+            'previous': previous,
+            'collected_change': entry['total_collected'] - previous['total_collected'],
+        })
+
+    totals = {
+        'total_due': sum(row['total_due'] for row in rows),
+        'total_collected': sum(row['total_collected'] for row in rows),
+        'methods': [sum(row['methods'][index] for row in rows) for index in range(len(methods))],
+        'previous_collected': sum(row['previous']['total_collected'] for row in rows),
+    }
+    totals['collection_rate'] = (
+        totals['total_collected'] / totals['total_due'] * 100 if totals['total_due'] > 0 else 0
+    )
+
+    context = {
+        'rows': rows,
+        'totals': totals,
+        'methods': methods,
+        'start_month': start_month,
+        'end_month': end_month,
+        'title': 'Collection Report'
+    }
+    return render(request, 'loans/collection_report.html', context)
@@ -41,6 +41,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so the other middleware's queries are counted; no-ops unless
+    # QUERY_METRICS_ENABLED / SLOW_QUERY_THRESHOLD_MS are set
+    'loans.middleware.QueryMetricsMiddleware',
+    'loans.middleware.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -75,13 +79,81 @@ WSGI_APPLICATION = 'loantracker.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite tuned for several collectors writing at once, applied to every
+# connection:
+# - WAL lets readers carry on while a payment is being written.
+# - synchronous=NORMAL is durable across application crashes (an OS crash
+#   may lose the last commits).
+# - busy_timeout waits up to 20s for the write lock instead of failing with
+#   "database is locked".
+# - mmap_size, cache_size (negative: KiB) and temp_store keep hot pages and
+#   sort/group temporaries in memory.
+# - IMMEDIATE transactions take the write lock at BEGIN. A deferred
+#   transaction that reads first cannot wait for the lock when it tries to
+#   write; it fails at once.
+# - CONN_MAX_AGE reuses a connection (and its page cache) across requests
+#   of a worker. runserver starts a thread per request, so this only pays
+#   off under gunicorn and the like.
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64000,
+    'temp_store': 'MEMORY',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            'transaction_mode': 'IMMEDIATE',
+        },
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Shared by every server process and management command, so invalidations
+# from imports, status refreshes and other workers reach the dashboard of
+# the running server. A local-memory cache would be per process: commands
+# could not invalidate it and it would serve stale totals until the TTL.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
     }
 }
 
+# Seconds cached dashboard data may be served; entries are also dropped
+# whenever a loan, installment or payment changes
+DASHBOARD_CACHE_TIMEOUT = 60
+
+
+# Request metrics
+# Per-view wall time, DB time, query and duplicate query counts, logged to
+# a rotating file and served to staff at /ops/metrics/ (Prometheus format).
+# Off by default: the middleware then removes itself at startup.
+
+QUERY_METRICS_ENABLED = False
+QUERY_METRICS_LOG_FILE = BASE_DIR / 'logs' / 'request_metrics.log'
+QUERY_METRICS_LOG_MAX_BYTES = 10 * 1024 * 1024
+QUERY_METRICS_LOG_BACKUP_COUNT = 5
+
+# Slow-query log: queries slower than this many milliseconds are appended
+# to SLOW_QUERY_LOG_FILE with their call site; summarize them with
+# `python manage.py slow_queries`. None turns the log off.
+
+SLOW_QUERY_THRESHOLD_MS = None
+SLOW_QUERY_LOG_FILE = BASE_DIR / 'logs' / 'slow_queries.jsonl'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators